@@ -0,0 +1,67 @@
+-- Make supplier_calls.call_id unique so the transcript webhook can write each
+-- call with a single upsert (ON CONFLICT (call_id)) instead of update-then-insert.
+-- Concurrent webhook deliveries for the same call then update one row rather
+-- than racing to insert duplicates.
+
+-- Remove duplicate rows left by earlier concurrent inserts. For each call_id
+-- keep the row linked to a supplier (the one written when the call was placed),
+-- or the most recently created row when none is; ctid only breaks exact ties.
+-- The kept row first takes the transcript/summary of the newest duplicate that
+-- has one, so a webhook-written duplicate's content is not lost.
+CREATE TEMP TABLE supplier_calls_ranked AS
+SELECT ctid AS row_ctid,
+       call_id,
+       created_at,
+       transcript,
+       summary,
+       ROW_NUMBER() OVER (
+           PARTITION BY call_id
+           ORDER BY (supplier_id IS NOT NULL) DESC, created_at DESC NULLS LAST, ctid DESC
+       ) AS row_rank
+FROM public.supplier_calls
+WHERE call_id IN (
+    SELECT call_id FROM public.supplier_calls
+    WHERE call_id IS NOT NULL
+    GROUP BY call_id
+    HAVING COUNT(*) > 1
+);
+
+UPDATE public.supplier_calls kept
+SET transcript = COALESCE(kept.transcript, merged.transcript),
+    summary = COALESCE(kept.summary, merged.summary)
+FROM (
+    SELECT first_row.row_ctid,
+           (ARRAY_AGG(dup.transcript ORDER BY dup.created_at DESC NULLS LAST)
+               FILTER (WHERE dup.transcript IS NOT NULL))[1] AS transcript,
+           (ARRAY_AGG(dup.summary ORDER BY dup.created_at DESC NULLS LAST)
+               FILTER (WHERE dup.summary IS NOT NULL))[1] AS summary
+    FROM supplier_calls_ranked first_row
+    JOIN supplier_calls_ranked dup ON dup.call_id = first_row.call_id AND dup.row_rank > 1
+    WHERE first_row.row_rank = 1
+    GROUP BY first_row.row_ctid
+) merged
+WHERE kept.ctid = merged.row_ctid;
+
+DELETE FROM public.supplier_calls
+WHERE ctid IN (SELECT row_ctid FROM supplier_calls_ranked WHERE row_rank > 1);
+
+DROP TABLE supplier_calls_ranked;
+
+-- Add the unique constraint if it doesn't exist
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM information_schema.table_constraints
+        WHERE constraint_name = 'supplier_calls_call_id_key'
+        AND table_name = 'supplier_calls'
+    ) THEN
+        ALTER TABLE public.supplier_calls
+        ADD CONSTRAINT supplier_calls_call_id_key UNIQUE (call_id);
+    END IF;
+END $$;
+
+-- Rows created by the webhook may not know the supplier; the upsert leaves
+-- supplier_name out so it never overwrites a name set when the call was placed
+ALTER TABLE public.supplier_calls
+ALTER COLUMN supplier_name SET DEFAULT 'Unknown Supplier';
@@ -0,0 +1,21 @@
+-- Keep long transcripts and summaries out of supplier_calls rows
+-- Text above TRANSCRIPT_OFFLOAD_THRESHOLD_BYTES is stored zstd-compressed in the
+-- call-transcripts storage bucket; the row keeps the object path and the SHA-256
+-- of the text, and transcript/summary are left NULL.
+
+ALTER TABLE public.supplier_calls
+    ADD COLUMN IF NOT EXISTS transcript_path TEXT,
+    ADD COLUMN IF NOT EXISTS transcript_sha256 TEXT,
+    ADD COLUMN IF NOT EXISTS summary_path TEXT,
+    ADD COLUMN IF NOT EXISTS summary_sha256 TEXT;
+
+-- Private bucket, read and written with the service role key
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('call-transcripts', 'call-transcripts', false)
+ON CONFLICT (id) DO NOTHING;
+
+-- Add comments to columns
+COMMENT ON COLUMN public.supplier_calls.transcript_path IS 'Object path of the zstd-compressed transcript in the call-transcripts bucket (NULL when stored inline)';
+COMMENT ON COLUMN public.supplier_calls.transcript_sha256 IS 'SHA-256 of the uncompressed transcript, checked when it is loaded';
+COMMENT ON COLUMN public.supplier_calls.summary_path IS 'Object path of the zstd-compressed summary in the call-transcripts bucket (NULL when stored inline)';
+COMMENT ON COLUMN public.supplier_calls.summary_sha256 IS 'SHA-256 of the uncompressed summary, checked when it is loaded';
@@ -0,0 +1,44 @@
+-- Responses to webhook deliveries, replayed when the same delivery is retried
+-- Shared by every backend instance; only the service role key reads and writes it.
+
+CREATE TABLE IF NOT EXISTS public.idempotency_keys (
+    key TEXT PRIMARY KEY,
+    response JSONB NOT NULL,
+    status INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON public.idempotency_keys(expires_at);
+
+-- No policies: anon and authenticated clients get no access
+ALTER TABLE public.idempotency_keys ENABLE ROW LEVEL SECURITY;
+
+-- Store the response for a key unless a live entry exists (an expired one is
+-- replaced). Returns true when this call's response was stored.
+CREATE OR REPLACE FUNCTION public.put_idempotency_key(
+    p_key TEXT,
+    p_response JSONB,
+    p_status INTEGER,
+    p_ttl_secs DOUBLE PRECISION
+)
+RETURNS BOOLEAN
+LANGUAGE sql
+AS $$
+    WITH stored AS (
+        INSERT INTO public.idempotency_keys (key, response, status, created_at, expires_at)
+        VALUES (p_key, p_response, p_status, NOW(), NOW() + make_interval(secs => p_ttl_secs))
+        ON CONFLICT (key) DO UPDATE
+            SET response = EXCLUDED.response,
+                status = EXCLUDED.status,
+                created_at = EXCLUDED.created_at,
+                expires_at = EXCLUDED.expires_at
+            WHERE public.idempotency_keys.expires_at <= NOW()
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM stored);
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.put_idempotency_key(TEXT, JSONB, INTEGER, DOUBLE PRECISION) FROM PUBLIC, anon, authenticated;
+
+COMMENT ON TABLE public.idempotency_keys IS 'First response to each webhook delivery, replayed for retries until expires_at';
@@ -0,0 +1,31 @@
+-- Create supplier_call_turns table
+-- One row per agent/user turn of a supplier call, so a page of turns (or the
+-- last N turns) can be read without fetching the whole supplier_calls.transcript.
+-- Requires add_supplier_calls_call_id_unique.sql (call_id must be unique).
+CREATE TABLE IF NOT EXISTS public.supplier_call_turns (
+    id BIGSERIAL PRIMARY KEY,
+    call_id TEXT NOT NULL REFERENCES public.supplier_calls(call_id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    speaker TEXT NOT NULL,
+    text TEXT NOT NULL,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    -- Add constraints
+    CONSTRAINT valid_speaker CHECK (speaker IN ('Agent', 'User')),
+    CONSTRAINT valid_offsets CHECK (start_offset >= 0 AND end_offset >= start_offset)
+);
+
+-- Turns are written and paged by (call_id, seq); the unique index also makes
+-- re-processing a webhook an idempotent upsert
+CREATE UNIQUE INDEX IF NOT EXISTS idx_supplier_call_turns_call_id_seq
+    ON public.supplier_call_turns(call_id, seq);
+
+-- Enable Row Level Security (written and read through the service role)
+ALTER TABLE public.supplier_call_turns ENABLE ROW LEVEL SECURITY;
+
+-- Add comment to table
+COMMENT ON TABLE public.supplier_call_turns IS 'Agent/user turns of supplier call transcripts, in call order';
+COMMENT ON COLUMN public.supplier_call_turns.start_offset IS 'Character offset of the turn''s line in supplier_calls.transcript';
+COMMENT ON COLUMN public.supplier_call_turns.end_offset IS 'Character offset just past the turn''s line in supplier_calls.transcript';
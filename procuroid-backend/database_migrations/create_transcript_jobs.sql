@@ -0,0 +1,52 @@
+-- Durable queue for post-call transcript webhooks
+-- /quotation-agent/transcript inserts the payload here before acknowledging
+-- ElevenLabs; transcript workers (or POST /quotation-agent/transcript/queue/drain)
+-- claim jobs with claim_transcript_job, which leases one ready job with
+-- FOR UPDATE SKIP LOCKED so concurrent instances never take the same job.
+-- Only the service role key reads and writes this table.
+
+CREATE TABLE IF NOT EXISTS public.transcript_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    dedupe_key TEXT UNIQUE,
+    payload JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    available_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    leased_until TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    last_error TEXT,
+
+    CONSTRAINT valid_transcript_job_status CHECK (status IN ('pending', 'processing', 'done', 'failed'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_transcript_jobs_ready ON public.transcript_jobs(status, available_at);
+
+-- No policies: anon and authenticated clients get no access
+ALTER TABLE public.transcript_jobs ENABLE ROW LEVEL SECURITY;
+
+-- Lease the oldest ready job (pending and due, or processing with an expired lease)
+CREATE OR REPLACE FUNCTION public.claim_transcript_job(lease_secs DOUBLE PRECISION)
+RETURNS SETOF public.transcript_jobs
+LANGUAGE sql
+AS $$
+    UPDATE public.transcript_jobs
+    SET status = 'processing',
+        leased_until = NOW() + make_interval(secs => lease_secs),
+        attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM public.transcript_jobs
+        WHERE (status = 'pending' AND available_at <= NOW())
+           OR (status = 'processing' AND leased_until < NOW())
+        ORDER BY id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.claim_transcript_job(DOUBLE PRECISION) FROM PUBLIC, anon, authenticated;
+
+COMMENT ON TABLE public.transcript_jobs IS 'Post-call transcript webhooks waiting for extraction and the supplier_calls update';
+COMMENT ON COLUMN public.transcript_jobs.dedupe_key IS 'Delivery key of the webhook; retried deliveries are not queued twice';
+COMMENT ON COLUMN public.transcript_jobs.leased_until IS 'A processing job whose lease has passed is claimed again';
@@ -1,7 +1,7 @@
 """
 conversation_analysis_agent.py
 Analyzes supplier call transcripts and extracts quotation information.
-Saves results to quotation_details table using Google Gemini API.
+Saves results to quotation_details table using the analysis LLM providers (Gemini by default).
 """
 
 import os
@@ -10,13 +10,24 @@ import asyncio
 from typing import Dict, Optional, List
 from datetime import datetime
 from dotenv import load_dotenv
-from google import genai
 from supabase import create_client, Client
 
+from services.llm_client import analysis_client
+from services.llm_metrics import llm_metrics
+from services.transcript_storage import load_cold_text
+from services.transcript_windows import split_transcript
+
 load_dotenv()
 
+# Transcripts above this many (estimated) tokens are extracted window by window
+ANALYSIS_WINDOW_TOKENS = int(os.getenv("ANALYSIS_WINDOW_TOKENS", "6000"))
+# Turns repeated at the start of each window for context
+ANALYSIS_WINDOW_OVERLAP_TURNS = int(os.getenv("ANALYSIS_WINDOW_OVERLAP_TURNS", "1"))
+
+# Fields taken from the latest window that states them
+QUOTATION_FIELDS = ("price_per_unit", "minimum_quantity", "quantity_required", "delivery_date", "payment_terms")
+
 # Initialize clients
-genai_client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
 supabase: Client = create_client(
     os.getenv("SUPABASE_URL"),
     os.getenv("SUPABASE_KEY")
@@ -27,7 +38,7 @@ class ConversationAnalysisAgent:
     """Analyzes supplier call transcripts and extracts quotation details"""
     
     def __init__(self):
-        self.model = "gemini-2.0-flash-exp"
+        self.client = analysis_client
     
     async def analyze_call(self, call_id: str, user_id: Optional[str] = None) -> Dict:
         """
@@ -40,6 +51,10 @@ class ConversationAnalysisAgent:
         Returns:
             Dict with success status and extracted information
         """
+        with llm_metrics.scope(f"analysis of call {call_id}"):
+            return await self._analyze_call(call_id, user_id)
+    
+    async def _analyze_call(self, call_id: str, user_id: Optional[str] = None) -> Dict:
         try:
             # Fetch the call record
             result = await asyncio.to_thread(
@@ -55,7 +70,8 @@ class ConversationAnalysisAgent:
             if not call_data:
                 return {"success": False, "error": "Call not found"}
             
-            transcript = call_data.get("transcript")
+            # Long transcripts live in cold storage; fetched (and cached) on demand
+            transcript = await asyncio.to_thread(load_cold_text, call_data, "transcript")
             supplier_name = call_data.get("supplier_name", "Unknown")
             supplier_id = call_data.get("supplier_id")
             job_id = call_data.get("job_id")
@@ -98,16 +114,79 @@ class ConversationAnalysisAgent:
     
     async def _extract_quotation_details(self, transcript: str, supplier_name: str) -> Dict:
         """
-        Use Gemini AI to extract quotation details from transcript.
+        Use the analysis LLM to extract quotation details from transcript.
         Only extracts the required fields.
+        
+        Transcripts longer than ANALYSIS_WINDOW_TOKENS are split by turn into
+        windows that are extracted concurrently, then reduced into one result.
         """
         
-        prompt = f"""
+        windows = split_transcript(transcript, ANALYSIS_WINDOW_TOKENS, ANALYSIS_WINDOW_OVERLAP_TURNS)
+        if len(windows) > 1:
+            print(f"🧩 Transcript of {supplier_name} call split into {len(windows)} windows")
+            prompts = [
+                self._quotation_prompt(
+                    window,
+                    supplier_name,
+                    f" (part {index} of {len(windows)} of the call; extract only what this part states, "
+                    "use null for anything it does not mention)",
+                )
+                for index, window in enumerate(windows, start=1)
+            ]
+        else:
+            prompts = [self._quotation_prompt(transcript, supplier_name)]
+
+        try:
+            # Provider fallback, concurrency limits, metrics and JSON parsing live in the client
+            partials = await asyncio.gather(*(
+                asyncio.to_thread(self.client.complete_json, prompt, site="quotation_details")
+                for prompt in prompts
+            ))
+            partials = [partial for partial in partials if partial is not None]
+            if not partials:
+                raise RuntimeError("no LLM provider returned quotation details")
+            
+            return self._reduce_quotation_details(partials)
+            
+        except Exception as e:
+            print(f"❌ Extraction failed: {e}")
+            # Return default values on error
+            return {
+                "price_per_unit": None,
+                "minimum_quantity": None,
+                "quantity_required": None,
+                "delivery_date": None,
+                "payment_terms": None,
+                "sentiment_score": 5,
+                "confidence_score": 1
+            }
+    
+    def _reduce_quotation_details(self, partials: List[Dict]) -> Dict:
+        """
+        Combine per-window extractions, in call order, into one result.
+        For each field the latest window that states it wins, since later
+        statements in a negotiation revise earlier ones; scores are averaged
+        over the windows that gave them.
+        """
+        result = {field: None for field in QUOTATION_FIELDS}
+        for partial in partials:
+            for field in QUOTATION_FIELDS:
+                if partial.get(field) is not None:
+                    result[field] = partial[field]
+        
+        for score in ("sentiment_score", "confidence_score"):
+            values = [p[score] for p in partials if isinstance(p.get(score), (int, float))]
+            result[score] = max(1, min(10, round(sum(values) / len(values)))) if values else 5
+        
+        return result
+    
+    def _quotation_prompt(self, transcript: str, supplier_name: str, part: str = "") -> str:
+        return f"""
 Analyze this supplier phone call transcript and extract quotation information.
 
 SUPPLIER: {supplier_name}
 
-TRANSCRIPT:
+TRANSCRIPT{part}:
 {transcript}
 
 Extract and return ONLY valid JSON with these exact fields:
@@ -156,48 +235,6 @@ IMPORTANT:
 - Be honest and conservative with confidence_score
 - Do not make assumptions or infer information not in the transcript
 """
-
-        try:
-            response = await asyncio.to_thread(
-                genai_client.models.generate_content,
-                model=self.model,
-                contents=prompt
-            )
-            
-            # Extract JSON from response
-            text = response.text.strip()
-            if '```json' in text:
-                text = text.split('```json')[1].split('```')[0].strip()
-            elif '```' in text:
-                text = text.split('```')[1].split('```')[0].strip()
-            
-            extracted_data = json.loads(text)
-            
-            # Ensure all required fields exist with validation
-            result = {
-                "price_per_unit": extracted_data.get("price_per_unit"),
-                "minimum_quantity": extracted_data.get("minimum_quantity"),
-                "quantity_required": extracted_data.get("quantity_required"),
-                "delivery_date": extracted_data.get("delivery_date"),
-                "payment_terms": extracted_data.get("payment_terms"),
-                "sentiment_score": max(1, min(10, extracted_data.get("sentiment_score", 5))),
-                "confidence_score": max(1, min(10, extracted_data.get("confidence_score", 5)))
-            }
-            
-            return result
-            
-        except Exception as e:
-            print(f"❌ Extraction failed: {e}")
-            # Return default values on error
-            return {
-                "price_per_unit": None,
-                "minimum_quantity": None,
-                "quantity_required": None,
-                "delivery_date": None,
-                "payment_terms": None,
-                "sentiment_score": 5,
-                "confidence_score": 1
-            }
     
     async def _save_quotation_details(
         self, 
@@ -1,6 +1,10 @@
 import asyncio
 import os
+import sys
 from supabase import create_async_client
+
+# Add src/ to sys.path so the agent can import services
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
 from conversation_analysis_agent import ConversationAnalysisAgent
 from dotenv import load_dotenv
 
@@ -20,8 +24,8 @@ async def process_new_calls(supabase):
     """
     print("🔄 Polling for new supplier calls...")
 
-    # Fetch all calls
-    calls_result = await supabase.table("supplier_calls").select("*").execute()
+    # Fetch all calls (only the columns needed here, not transcripts)
+    calls_result = await supabase.table("supplier_calls").select("id, supplier_name").execute()
     all_calls = calls_result.data or []
 
     for call in all_calls:
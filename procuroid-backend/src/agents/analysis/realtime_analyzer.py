@@ -1,6 +1,10 @@
 import asyncio
 import os
+import sys
 from supabase import create_async_client
+
+# Add src/ to sys.path so the agent can import services
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
 from conversation_analysis_agent import ConversationAnalysisAgent
 from dotenv import load_dotenv
 
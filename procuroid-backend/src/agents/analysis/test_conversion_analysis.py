@@ -1,11 +1,16 @@
 import asyncio
+import os
+import sys
+
+# Add src/ to sys.path so the agent can import services
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
 from conversation_analysis_agent import ConversationAnalysisAgent, supabase
 
 async def test_latest_call():
     # Step 1: Fetch the latest call (most recent created_at)
     result = await asyncio.to_thread(
         lambda: supabase.table("supplier_calls")
-        .select("*")
+        .select("id, supplier_name")
         .order("created_at", desc=True)
         .limit(1)
         .execute()
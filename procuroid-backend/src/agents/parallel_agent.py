@@ -1,44 +1,157 @@
 # src/agents/parallel_agent.py
 
 import concurrent.futures
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .quotation.async_dispatcher import AsyncQuoteDispatcher
 from .quotation.quotation_agent import QuotationAgent
 
+PARALLEL_AGENT_MAX_WORKERS = int(os.getenv("PARALLEL_AGENT_MAX_WORKERS", "10"))
+
+
+class QuoteBatch:
+    """
+    Handle for one round of quote requests running on the ParallelAgent's pool.
+    Iterate it to receive each quote as soon as its supplier finishes.
+    """
+    def __init__(self, future_to_supplier: Dict[concurrent.futures.Future, dict]):
+        self.future_to_supplier = future_to_supplier
+        self.cancelled = False
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.as_completed()
+
+    def as_completed(self, timeout: Optional[float] = None) -> Iterator[dict]:
+        """
+        Yield each supplier's quote (with timing) in completion order.
+        Stopping early cancels whatever has not started yet.
+        """
+        try:
+            for future in concurrent.futures.as_completed(self.future_to_supplier, timeout=timeout):
+                if future.cancelled():
+                    continue
+                supplier = self.future_to_supplier[future]
+                try:
+                    yield future.result()
+                except Exception as exc:
+                    print(f"❌ {supplier.get('name')} generated an exception: {exc}")
+        finally:
+            self.cancel()
+
+    def cancel(self) -> int:
+        """
+        Cancel supplier calls that have not started. Calls already dialing
+        run to completion. Returns the number of calls cancelled.
+        """
+        self.cancelled = True
+        return sum(1 for future in self.future_to_supplier if future.cancel())
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for future in self.future_to_supplier if not future.done())
+
+
 class ParallelAgent:
     """
-    Manages the parallel execution of QuotationAgents to speed up 
+    Manages the parallel execution of QuotationAgents to speed up
     the process of gathering bids from multiple suppliers.
     """
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None):
         # The ParallelAgent creates instances of the agent it needs to manage.
         self.quotation_agent = QuotationAgent()
-        print("ParallelAgent is online.")
+        # One long-lived pool shared by every batch; outbound call pacing is
+        # handled by the call admission controller, not by the pool size.
+        self.max_workers = max_workers or PARALLEL_AGENT_MAX_WORKERS
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="quotation",
+        )
+        self._lock = threading.Lock()
+        self._batches: List[QuoteBatch] = []
+        print(f"ParallelAgent is online ({self.max_workers} workers).")
+
+    def submit_quotes(self, suppliers: list, product_details: str) -> QuoteBatch:
+        """
+        Queue a QuotationAgent run for each supplier and return immediately.
+        """
+        submitted_at = time.monotonic()
+        future_to_supplier = {
+            self.executor.submit(self._timed_quote, supplier, product_details, submitted_at): supplier
+            for supplier in suppliers
+        }
+        batch = QuoteBatch(future_to_supplier)
+        with self._lock:
+            self._batches = [b for b in self._batches if b.pending] + [batch]
+        return batch
 
-    def get_quotes_in_parallel(self, suppliers: list, product_details: str) -> list:
+    def iter_quotes(self, suppliers: list, product_details: str, timeout: Optional[float] = None) -> Iterator[dict]:
         """
-        Takes a list of suppliers and uses a thread pool to run a 
-        QuotationAgent for each one simultaneously.
+        Yield each quote as soon as its supplier finishes, so results can be
+        persisted and shown immediately.
+        """
+        yield from self.submit_quotes(suppliers, product_details).as_completed(timeout)
+
+    def get_quotes_in_parallel(
+        self,
+        suppliers: list,
+        product_details: str,
+        on_quote: Optional[Callable[[dict], None]] = None,
+    ) -> list:
+        """
+        Takes a list of suppliers and runs a QuotationAgent for each one
+        simultaneously. ``on_quote`` is invoked with each quote as it arrives.
         """
         quotes = []
-        # We use a ThreadPoolExecutor to manage a pool of worker threads.
-        # max_workers can be adjusted based on performance needs.
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            # We submit a new task to the pool for each supplier.
-            # The task is to call the 'get_quote' method.
-            future_to_supplier = {
-                executor.submit(self.quotation_agent.get_quote, supplier, product_details): supplier 
-                for supplier in suppliers
-            }
-            
-            # As each future (task) completes, we gather its result.
-            for future in concurrent.futures.as_completed(future_to_supplier):
-                supplier_name = future_to_supplier[future]
+        for quote_result in self.iter_quotes(suppliers, product_details):
+            if not quote_result:
+                continue
+            quotes.append(quote_result)
+            print(f"✅ Successfully received quote from {quote_result.get('supplier_name')} "
+                  f"in {quote_result['timing']['call_secs']}s")
+            if on_quote:
                 try:
-                    quote_result = future.result()
-                    if quote_result:
-                        quotes.append(quote_result)
-                        print(f"✅ Successfully received quote from {supplier_name}")
+                    on_quote(quote_result)
                 except Exception as exc:
-                    print(f"❌ {supplier_name} generated an exception: {exc}")
-        
+                    print(f"❌ on_quote callback failed for {quote_result.get('supplier_name')}: {exc}")
+
         print(f"Finished gathering all quotes. Total received: {len(quotes)}")
-        return quotes
\ No newline at end of file
+        return quotes
+
+    def get_quotes_async(
+        self,
+        suppliers: list,
+        product_details: str,
+        on_quote: Optional[Callable[[dict], None]] = None,
+    ) -> list:
+        """
+        Quote a large supplier list (hundreds per job) from one event loop
+        instead of the thread pool. Same result shape as get_quotes_in_parallel.
+        """
+        dispatcher = AsyncQuoteDispatcher(self.quotation_agent)
+        return dispatcher.run(suppliers, product_details, on_quote)
+
+    def cancel_all(self) -> int:
+        """Cancel every queued supplier call across all outstanding batches."""
+        with self._lock:
+            batches, self._batches = self._batches, []
+        return sum(batch.cancel() for batch in batches)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancel queued work and stop the worker pool."""
+        self.cancel_all()
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _timed_quote(self, supplier: dict, product_details: str, submitted_at: float) -> Optional[dict]:
+        started_at = time.monotonic()
+        quote_result = self.quotation_agent.get_quote(supplier, product_details)
+        finished_at = time.monotonic()
+        if quote_result is not None:
+            quote_result["timing"] = {
+                "queued_secs": round(started_at - submitted_at, 3),
+                "call_secs": round(finished_at - started_at, 3),
+                "total_secs": round(finished_at - submitted_at, 3),
+            }
+        return quote_result
@@ -0,0 +1,184 @@
+# src/agents/quotation/async_dispatcher.py
+
+"""
+Asyncio dispatcher for category-wide RFQs.
+
+Drives hundreds of QuotationAgent call setups from one event loop using async
+HTTP clients for ElevenLabs text-to-speech and Twilio call creation, instead
+of one blocked thread per supplier. Call pacing still goes through the shared
+call admission controller; ``max_in_flight`` only bounds local concurrency.
+Each supplier yields the same result dict ``QuotationAgent.get_quote`` returns.
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, List, Optional, Union
+
+import httpx
+
+from services.call_admission import call_admission
+from services.elevenlabs import ELEVENLABS_API_BASE_URL
+from services.prompt_renderer import stitch_audio
+from services.tts_cache import tts_cache, tts_cache_key
+from services.twilio_client import TWILIO_API_BASE_URL
+
+from .quotation_agent import (
+    QUOTE_AUDIO_FORMAT,
+    QUOTE_TTS_MODEL_ID,
+    QUOTE_VOICE_ID,
+    QuotationAgent,
+)
+
+ASYNC_DISPATCH_CONCURRENCY = int(os.getenv("ASYNC_DISPATCH_CONCURRENCY", "200"))
+ASYNC_DISPATCH_HTTP_TIMEOUT = float(os.getenv("ASYNC_DISPATCH_HTTP_TIMEOUT", "30"))
+
+
+QuoteCallback = Callable[[dict], Union[None, Awaitable[None]]]
+
+
+class AsyncQuoteDispatcher:
+    """Quotes many suppliers concurrently with bounded in-flight call setups."""
+
+    def __init__(self, quotation_agent: Optional[QuotationAgent] = None, max_in_flight: Optional[int] = None):
+        self.agent = quotation_agent or QuotationAgent()
+        self.max_in_flight = max_in_flight or ASYNC_DISPATCH_CONCURRENCY
+
+    def run(self, suppliers: list, product_details: str, on_quote: Optional[QuoteCallback] = None) -> List[dict]:
+        """Blocking entry point for synchronous callers."""
+        return asyncio.run(self.dispatch(suppliers, product_details, on_quote))
+
+    async def dispatch(self, suppliers: list, product_details: str, on_quote: Optional[QuoteCallback] = None) -> List[dict]:
+        """
+        Quote every supplier and return their results in completion order.
+        ``on_quote`` (sync or async) receives each result as soon as it is ready.
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+
+        async with httpx.AsyncClient(timeout=ASYNC_DISPATCH_HTTP_TIMEOUT, limits=limits) as client:
+            submitted_at = time.monotonic()
+            tasks = [
+                asyncio.create_task(self._bounded_quote(client, semaphore, supplier, product_details, submitted_at))
+                for supplier in suppliers
+            ]
+
+            quotes = []
+            for task in asyncio.as_completed(tasks):
+                quote_result = await task
+                quotes.append(quote_result)
+                if on_quote:
+                    try:
+                        outcome = on_quote(quote_result)
+                        if asyncio.iscoroutine(outcome):
+                            await outcome
+                    except Exception as exc:
+                        print(f"❌ on_quote callback failed for {quote_result.get('supplier_name')}: {exc}")
+
+        succeeded = sum(1 for q in quotes if q.get("status") == "success")
+        print(f"Async dispatch finished: {succeeded}/{len(quotes)} calls initiated")
+        return quotes
+
+    async def _bounded_quote(self, client, semaphore, supplier, product_details, submitted_at) -> dict:
+        async with semaphore:
+            started_at = time.monotonic()
+            try:
+                quote_result = await self.get_quote(client, supplier, product_details)
+            except Exception as e:
+                quote_result = self._error(supplier, f"Unexpected dispatch failure: {e}")
+            finished_at = time.monotonic()
+
+        quote_result["timing"] = {
+            "queued_secs": round(started_at - submitted_at, 3),
+            "call_secs": round(finished_at - started_at, 3),
+            "total_secs": round(finished_at - submitted_at, 3),
+        }
+        return quote_result
+
+    async def get_quote(self, client: httpx.AsyncClient, supplier: dict, product_details: str) -> dict:
+        """Async counterpart of ``QuotationAgent.get_quote``."""
+        prompt_values, quote_text = self.agent.compose_quote(supplier, product_details)
+
+        audio_key = None
+        try:
+            if self.agent.synthesize_audio:
+                audio_key = await self._render_audio(client, prompt_values, quote_text)
+        except Exception as e:
+            print(f"✗ ElevenLabs TTS failed: {e}")
+            return self._error(supplier, f"Failed to generate speech: {e}")
+
+        twiml = self.agent.build_twiml(quote_text, audio_key)
+        try:
+            call = await call_admission.place_call_async(
+                lambda from_phone: self._create_call(client, supplier["phone"], from_phone, twiml),
+                from_number=self.agent.from_phone,
+                call_ids=lambda c: (c.get("sid"),),
+                timeout=self.agent.admission_timeout,
+            )
+        except Exception as e:
+            print(f"✗ Twilio call failed: {e}")
+            return self._error(supplier, f"Twilio call failed: {e}")
+
+        return {
+            "supplier_id": supplier["id"],
+            "supplier_name": supplier["name"],
+            "status": "success",
+            "quote_text": quote_text,
+            "call_sid": call.get("sid"),
+            "audio_cache_key": audio_key,
+        }
+
+    async def _create_call(self, client: httpx.AsyncClient, to: str, from_phone: str, twiml: str) -> dict:
+        twilio = self.agent.twilio_client
+        response = await client.post(
+            f"{TWILIO_API_BASE_URL}/2010-04-01/Accounts/{twilio.username}/Calls.json",
+            data={
+                "To": to,
+                "From": from_phone,
+                "Twiml": twiml,
+                # Twilio posts the final status here, which frees the call's admission slot
+                "StatusCallback": self.agent.status_callback_url,
+                "StatusCallbackMethod": "POST",
+            },
+            auth=(twilio.username, twilio.password),
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _render_audio(self, client: httpx.AsyncClient, prompt_values: dict, quote_text: str) -> str:
+        audio_key = tts_cache_key(quote_text, QUOTE_VOICE_ID, QUOTE_TTS_MODEL_ID, QUOTE_AUDIO_FORMAT)
+        if await asyncio.to_thread(tts_cache.get, audio_key, QUOTE_AUDIO_FORMAT) is not None:
+            return audio_key
+
+        texts = [
+            (str(prompt_values[text]) if is_variable else text).strip()
+            for is_variable, text in self.agent.prompt_renderer.segments
+        ]
+        clips = await asyncio.gather(*(self._synthesize(client, text) for text in texts if text))
+        await asyncio.to_thread(tts_cache.put, audio_key, stitch_audio(list(clips), QUOTE_AUDIO_FORMAT), QUOTE_AUDIO_FORMAT)
+        return audio_key
+
+    async def _synthesize(self, client: httpx.AsyncClient, text: str) -> bytes:
+        key = tts_cache_key(text, QUOTE_VOICE_ID, QUOTE_TTS_MODEL_ID, QUOTE_AUDIO_FORMAT)
+        audio = await asyncio.to_thread(tts_cache.get, key, QUOTE_AUDIO_FORMAT)
+        if audio is not None:
+            return audio
+
+        response = await client.post(
+            f"{ELEVENLABS_API_BASE_URL}/v1/text-to-speech/{QUOTE_VOICE_ID}",
+            params={"output_format": QUOTE_AUDIO_FORMAT},
+            headers={"xi-api-key": os.getenv("ELEVENLABS_API_KEY", "")},
+            json={"text": text, "model_id": QUOTE_TTS_MODEL_ID},
+        )
+        response.raise_for_status()
+        await asyncio.to_thread(tts_cache.put, key, response.content, QUOTE_AUDIO_FORMAT)
+        return response.content
+
+    @staticmethod
+    def _error(supplier: dict, message: str) -> dict:
+        return {
+            "supplier_id": supplier["id"],
+            "supplier_name": supplier["name"],
+            "status": "error",
+            "error": message,
+        }
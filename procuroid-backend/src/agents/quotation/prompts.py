@@ -0,0 +1,11 @@
+# src/agents/quotation/prompts.py
+
+# Script read to each supplier. Fields in braces are synthesized per call;
+# everything else is static and pre-rendered once by the prompt renderer.
+QUOTE_REQUEST_TEMPLATE = (
+    "Hello {supplier_name}. "
+    "We are requesting a quotation for the following product: "
+    "{product_details}. "
+    "Please provide your best quote including pricing, availability, and delivery timeline. "
+    "Thank you."
+)
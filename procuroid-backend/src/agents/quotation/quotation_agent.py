@@ -1,56 +1,120 @@
 import os
+import threading
+from typing import Optional
+
 from elevenlabs import ElevenLabs
-from twilio.rest import Client as TwilioClient
+
+from services.call_admission import CALL_DISPATCH_ADMISSION_TIMEOUT, call_admission
+from services.elevenlabs import ELEVENLABS_API_BASE_URL
+from services import twiml
+from services.prompt_renderer import SegmentedPromptRenderer
+from services.tts_cache import tts_cache, tts_cache_key
+from services.twilio_client import get_twilio_client
+
+from .prompts import QUOTE_REQUEST_TEMPLATE
+
+QUOTE_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # Default "Rachel" voice
+QUOTE_TTS_MODEL_ID = "eleven_monolingual_v1"
+QUOTE_AUDIO_FORMAT = "mp3_22050_32"
+
+# Without synthesized audio the call reads the script with TwiML <Say>.
+# When enabled, the stitched audio is played from our own endpoint instead,
+# which requires a publicly reachable WEBHOOK_BASE_URL.
+QUOTATION_SYNTHESIZE_AUDIO = os.getenv("QUOTATION_SYNTHESIZE_AUDIO", "false").lower() in {"1", "true", "yes"}
+
 
 class QuotationAgent:
-    def __init__(self):
-        # ElevenLabs client
-        api_key = os.getenv("ELEVENLABS_API_KEY")
-        if not api_key:
-            raise ValueError("ELEVENLABS_API_KEY not set")
-        self.elevenlabs_client = ElevenLabs(api_key=api_key)
+    def __init__(self, synthesize_audio: Optional[bool] = None):
+        self.synthesize_audio = QUOTATION_SYNTHESIZE_AUDIO if synthesize_audio is None else synthesize_audio
+
+        # ElevenLabs client (only needed when synthesizing audio)
+        self.elevenlabs_client = None
+        if self.synthesize_audio:
+            api_key = os.getenv("ELEVENLABS_API_KEY")
+            if not api_key:
+                raise ValueError("ELEVENLABS_API_KEY not set")
+            self.elevenlabs_client = ElevenLabs(api_key=api_key, base_url=ELEVENLABS_API_BASE_URL)
+
+        # Static parts of the script are synthesized once in the background;
+        # each call then only synthesizes the supplier name and product details.
+        self.prompt_renderer = SegmentedPromptRenderer(
+            QUOTE_REQUEST_TEMPLATE,
+            synthesize=self.synthesize,
+            output_format=QUOTE_AUDIO_FORMAT,
+        )
+        if self.synthesize_audio:
+            threading.Thread(target=self._prewarm_prompt, daemon=True).start()
         
         # Twilio client
         account_sid = os.getenv("TWILIO_ACCOUNT_SID")
         auth_token = os.getenv("TWILIO_AUTH_TOKEN")
         if not account_sid or not auth_token:
             raise ValueError("Twilio credentials not set")
-        self.twilio_client = TwilioClient(account_sid, auth_token)
+        self.twilio_client = get_twilio_client(account_sid, auth_token)
         
         self.from_phone = os.getenv("TWILIO_PHONE_NUMBER")
         if not self.from_phone:
             raise ValueError("TWILIO_PHONE_NUMBER not set")
+
+        self.audio_base_url = os.getenv("WEBHOOK_BASE_URL")
+        # Twilio reports the end of each call here, which frees its admission slot
+        self.status_callback_url = f"{os.getenv('WEBHOOK_BASE_URL', 'http://localhost:8080').rstrip('/')}/elevenlabs/call-status"
+        # Quotes are dispatched in batches, so calls queue for a slot instead of failing after CALL_ADMISSION_TIMEOUT
+        self.admission_timeout = CALL_DISPATCH_ADMISSION_TIMEOUT
         
         print("QuotationAgent initialized")
+
+    def _prewarm_prompt(self):
+        try:
+            self.prompt_renderer.prewarm()
+            print("📜 Pre-rendered static quote prompt segments")
+        except Exception as e:
+            print(f"✗ Failed to pre-render quote prompt segments: {e}")
     
+    def synthesize(self, text: str) -> bytes:
+        """
+        Text-to-speech for ``text``, served from the shared audio cache when the
+        same text has already been synthesized with this voice and format.
+        """
+        return tts_cache.get_or_synthesize(
+            text,
+            QUOTE_VOICE_ID,
+            QUOTE_TTS_MODEL_ID,
+            QUOTE_AUDIO_FORMAT,
+            lambda: self.elevenlabs_client.text_to_speech.convert(
+                text=text,
+                voice_id=QUOTE_VOICE_ID,
+                model_id=QUOTE_TTS_MODEL_ID,
+                output_format=QUOTE_AUDIO_FORMAT
+            ),
+        )
+
+    def compose_quote(self, supplier, product_details):
+        """Template values and full script text for one supplier."""
+        prompt_values = {
+            "supplier_name": supplier["name"],
+            "product_details": product_details.strip().rstrip("."),
+        }
+        return prompt_values, self.prompt_renderer.render_text(prompt_values)
+
+    def build_twiml(self, quote_text, audio_key=None):
+        """TwiML that plays the rendered audio when it is reachable, or says the text."""
+        if audio_key and self.audio_base_url:
+            return twiml.play(f"{self.audio_base_url.rstrip('/')}/quotation-agent/audio/{audio_key}")
+        return twiml.say(quote_text)
+
     def get_quote(self, supplier, product_details):
+        # Compose prompt for the quote
+        prompt_values, quote_text = self.compose_quote(supplier, product_details)
+
+        audio_key = None
         try:
-            # Compose prompt for the quote
-            quote_text = f"""
-            Hello {supplier['name']},
-            
-            We are requesting a quotation for the following product:
-            {product_details}
-            
-            Please provide your best quote including pricing, availability, and delivery timeline.
-            Thank you.
-            """
-            
-            # Generate speech using ElevenLabs Text-to-Speech
-            # You can use a specific voice_id or use the default
-            audio = self.elevenlabs_client.text_to_speech.convert(
-                text=quote_text.strip(),
-                voice_id="21m00Tcm4TlvDq8ikWAM",  # Default "Rachel" voice
-                model_id="eleven_monolingual_v1",
-                output_format="mp3_22050_32"
-            )
-            
-            # Save the audio temporarily (optional - for debugging)
-            # with open("quote_audio.mp3", "wb") as f:
-            #     for chunk in audio:
-            #         f.write(chunk)
-            
-            print(f"📜 Generated quote audio for {supplier['name']}")
+            if self.synthesize_audio:
+                # Stitch pre-rendered static segments with freshly synthesized variable ones
+                audio_key = tts_cache_key(quote_text, QUOTE_VOICE_ID, QUOTE_TTS_MODEL_ID, QUOTE_AUDIO_FORMAT)
+                if tts_cache.get(audio_key, QUOTE_AUDIO_FORMAT) is None:
+                    tts_cache.put(audio_key, self.prompt_renderer.render(prompt_values), QUOTE_AUDIO_FORMAT)
+                print(f"📜 Generated quote audio for {supplier['name']}")
             
         except Exception as e:
             print(f"✗ ElevenLabs TTS failed: {e}")
@@ -61,12 +125,21 @@ class QuotationAgent:
                 "error": f"Failed to generate speech: {e}"
             }
         
-        # Twilio call with TwiML to say the text
+        # Twilio call with TwiML to play the rendered audio, or say the text
+        twiml = self.build_twiml(quote_text, audio_key)
+
         try:
-            call = self.twilio_client.calls.create(
-                to=supplier["phone"],
-                from_=self.from_phone,
-                twiml=f"<Response><Say>{quote_text.strip()}</Say></Response>"
+            call = call_admission.place_call(
+                lambda from_phone: self.twilio_client.calls.create(
+                    to=supplier["phone"],
+                    from_=from_phone,
+                    twiml=twiml,
+                    status_callback=self.status_callback_url,
+                    status_callback_method="POST"
+                ),
+                from_number=self.from_phone,
+                call_ids=lambda c: (c.sid,),
+                timeout=self.admission_timeout,
             )
             print(f"📞 Call initiated, SID: {call.sid}")
             
@@ -83,6 +156,7 @@ class QuotationAgent:
             "supplier_id": supplier["id"],
             "supplier_name": supplier["name"],
             "status": "success",
-            "quote_text": quote_text.strip(),
-            "call_sid": call.sid
+            "quote_text": quote_text,
+            "call_sid": call.sid,
+            "audio_cache_key": audio_key
         }
\ No newline at end of file
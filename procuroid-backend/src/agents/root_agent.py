@@ -1,5 +1,7 @@
 # src/agents/root_agent.py
 
+import os
+
 # --- Import all the specialized agents it needs to control ---
 from .parallel_agent import ParallelAgent
 from .supplier_scout.supplier_scout_agent import SupplierScoutAgent
@@ -7,6 +9,10 @@ from .order_placement.order_placement_agent import OrderPlacementAgent
 from .logistics.logistics_agent import LogisticsAgent
 from .contract.contract_agent import ContractAgent
 from .scheduling.scheduling_agent import SchedulingAgent
+from services.call_scheduler import CallCampaignScheduler
+
+# Supplier lists larger than this are quoted with the asyncio dispatcher.
+ASYNC_DISPATCH_THRESHOLD = int(os.getenv("ASYNC_DISPATCH_THRESHOLD", "50"))
 
 class RootAgent:
     """
@@ -21,6 +27,8 @@ class RootAgent:
         self.logistics_agent = LogisticsAgent()
         self.contract_agent = ContractAgent()
         self.scheduling_agent = SchedulingAgent()
+        # Holds calls to suppliers outside their local business hours
+        self.call_scheduler = CallCampaignScheduler(dispatch=self._dispatch_quotes)
         print("RootAgent is online and has initialized all specialized agents.")
 
     def run_procurement_workflow(self, user_request: dict):
@@ -37,13 +45,35 @@ class RootAgent:
         
         print(f"Found {len(suppliers)} potential suppliers.")
 
-        # Step 2: Use the ParallelAgent to get quotes from all suppliers simultaneously
-        quotes = self.parallel_agent.get_quotes_in_parallel(suppliers, product_details)
+        # Step 2: Call suppliers inside their business hours now; queue the rest
+        # for when their local window opens.
+        callable_now, deferred = self.call_scheduler.split(suppliers)
+        quotes = self._dispatch_quotes(callable_now, product_details) if callable_now else []
+        scheduled = self.call_scheduler.schedule(
+            [dict(supplier, product_details=product_details) for supplier in deferred]
+        )
+        if scheduled:
+            print(f"Scheduled {len(scheduled)} supplier call(s) for their local business hours.")
         
         # The workflow now PAUSES. The quotes are saved to the DB and await user approval.
         # The frontend will notify us when a quote is approved.
         print("Quotes obtained. Workflow paused, awaiting user approval via the dashboard.")
-        return {"status": "pending_approval", "quotes": quotes}
+        return {"status": "pending_approval", "quotes": quotes, "scheduled_calls": scheduled}
+
+    def _dispatch_quotes(self, suppliers: list, product_details: str = None) -> list:
+        """
+        Quote a batch of suppliers with the ParallelAgent. Batches released by
+        the call scheduler carry their product details on each supplier.
+        """
+        if product_details is None:
+            by_product = {}
+            for supplier in suppliers:
+                by_product.setdefault(supplier["product_details"], []).append(supplier)
+            return [quote for details, batch in by_product.items() for quote in self._dispatch_quotes(batch, details)]
+
+        if len(suppliers) > ASYNC_DISPATCH_THRESHOLD:
+            return self.parallel_agent.get_quotes_async(suppliers, product_details)
+        return self.parallel_agent.get_quotes_in_parallel(suppliers, product_details)
 
     def resume_workflow_after_approval(self, approved_quote: dict):
         """
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from functools import wraps
+import hmac
 import json
 import os
 from datetime import datetime
@@ -25,6 +26,7 @@ from services.database import (
     get_profile,
     create_order,
     get_orders,
+    get_call_turns,
     get_quotations,
     update_quotation,
     get_quotation_by_id,
@@ -32,12 +34,25 @@ from services.database import (
     get_contracts,
     supabase_admin,
 )
-from services.llm import extract_call_conclusion
 from services.elevenlabs import (
     initiate_elevenlabs_call,
     initiate_elevenlabs_call_via_api,
     ElevenLabsCallError
 )
+from services.call_admission import CallAdmissionTimeout, call_admission
+from services.single_flight import SingleFlightTimeout, quote_request_flights, quote_request_key
+from services.tts_cache import tts_cache
+from services import twiml
+from services.idempotency import webhook_idempotency
+from services.live_transcripts import live_transcripts
+from services.llm import conclusion_batcher, fast_path_stats
+from services.llm_cache import llm_result_cache
+from services.llm_client import provider_stats
+from services.llm_metrics import llm_metrics
+from services.transcript_parser import TranscriptPayloadError, parse_transcript_stream
+from services.transcript_queue import TRANSCRIPT_QUEUE_DRAIN_TOKEN
+from services.transcript_storage import get_call_transcript
+from services.transcripts import call_identifiers, delivery_key, transcript_queue
 
 # Create a blueprint for API routes
 api_bp = Blueprint('api', __name__)
@@ -167,17 +182,28 @@ def send_quote_request(user_id):
     # Get the authenticated user's ID from the token
     authenticated_user_id = request.user["id"]
     
-    # Create the procurement job in the database
-    result = create_procurement_job(authenticated_user_id, data)
+    # Create the procurement job in the database. Identical concurrent
+    # submissions by the same user (e.g. a double-submitted form) share a single job.
+    supplier_phone = data.get("supplierPhone") or data.get("supplier_phone")
+    flight_key = quote_request_key(supplier_phone, {"userId": authenticated_user_id, "request": data})
+    try:
+        result, deduplicated = quote_request_flights.do(
+            flight_key,
+            lambda: create_procurement_job(authenticated_user_id, data),
+        )
+    except SingleFlightTimeout as exc:
+        return jsonify({"error": str(exc)}), 503
     
     if result.get("success"):
         return jsonify({
             "status": "ok",
             "message": "Job created successfully",
             "job_id": result["job"]["id"],
-            "user_id": authenticated_user_id
+            "user_id": authenticated_user_id,
+            "deduplicated": deduplicated
         }), 201
     else:
+        quote_request_flights.forget(flight_key)
         return jsonify({"error": result.get("error", "Failed to create job")}), 500
 
 @api_bp.route("/procurement-jobs", methods=["GET"])
@@ -357,18 +383,57 @@ def initiate_elevenlabs_call_endpoint():
 
     metadata_payload = {key: value for key, value in metadata_payload.items() if value is not None}
 
+    # Repeated requests for the same supplier, agent and product from the same
+    # user and job coalesce onto one call. userId/jobId are part of the key:
+    # the call's transcript is delivered to the job in its metadata, so another
+    # job must get its own call.
+    flight_key = quote_request_key(to_number, {"agent_id": agent_id, "metadata": metadata_payload})
+
     try:
         # Use the simpler ElevenLabs API approach (recommended)
         # This calls ElevenLabs API which handles Twilio internally
-        call_response = initiate_elevenlabs_call_via_api(
-            to=to_number,
-            agent_id=agent_id,
-            metadata=metadata_payload or None,
+        call_response, deduplicated = quote_request_flights.do(
+            flight_key,
+            lambda: initiate_elevenlabs_call_via_api(
+                to=to_number,
+                agent_id=agent_id,
+                metadata=metadata_payload or None,
+            ),
         )
+    except (CallAdmissionTimeout, SingleFlightTimeout) as exc:
+        return jsonify({"success": False, "error": str(exc)}), 503
     except ElevenLabsCallError as exc:
         return jsonify({"success": False, "error": str(exc)}), 502
 
-    return jsonify({"success": True, "call": call_response}), 200
+    return jsonify({"success": True, "call": call_response, "deduplicated": deduplicated}), 200
+
+
+@api_bp.route("/elevenlabs/calls/admission", methods=["GET"])
+@require_auth
+def call_admission_stats_endpoint():
+    """Queue depth, in-flight conversations and admission wait times for outbound calls."""
+    return jsonify({
+        "success": True,
+        "admission": call_admission.stats(),
+        "deduplication": quote_request_flights.stats(),
+    }), 200
+
+
+@api_bp.route("/elevenlabs/call-status", methods=["POST"])
+def elevenlabs_call_status():
+    """
+    Twilio status callback for calls placed by services.elevenlabs_twilio,
+    QuotationAgent and AsyncQuoteDispatcher.
+
+    Releases the call's conversation slot once Twilio reports a terminal status.
+    """
+    call_sid = request.form.get("CallSid")
+    call_status = request.form.get("CallStatus")
+
+    if call_status in {"completed", "busy", "failed", "no-answer", "canceled"}:
+        call_admission.complete(call_sid)
+
+    return jsonify({"status": "received"}), 200
 
 
 @api_bp.route("/quotation-agent/call", methods=["POST"])
@@ -424,7 +489,6 @@ def generate_elevenlabs_twiml():
     - jobId: Optional job ID
     """
     from flask import Response
-    from urllib.parse import urlencode
     
     # Get parameters from query string (Twilio will pass these along)
     agent_id = request.args.get("agent_id")
@@ -432,31 +496,15 @@ def generate_elevenlabs_twiml():
     job_id = request.args.get("jobId")
     
     if not agent_id:
-        return Response(
-            '<?xml version="1.0" encoding="UTF-8"?><Response><Say>Agent ID is required</Say><Hangup/></Response>',
-            mimetype='text/xml'
-        ), 400
-    
-    # Build ElevenLabs webhook URL with parameters
-    elevenlabs_url = "https://api.us.elevenlabs.io/twilio/inbound_call"
-    params = {}
-    if agent_id:
-        params["agent_id"] = agent_id
-    if user_id:
-        params["userId"] = user_id
-    if job_id:
-        params["jobId"] = job_id
-    
-    if params:
-        elevenlabs_url = f"{elevenlabs_url}?{urlencode(params)}"
-    
-    # Generate TwiML that redirects to ElevenLabs
-    twiml = f'''<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Redirect method="POST">{elevenlabs_url}</Redirect>
-</Response>'''
+        return Response(twiml.say("Agent ID is required", hangup=True), mimetype=twiml.TWIML_MIMETYPE), 400
     
-    return Response(twiml, mimetype='text/xml')
+    # Generate TwiML that redirects to ElevenLabs with the call parameters;
+    # repeat hits for the same agent/user/job are served from the render cache
+    body = twiml.redirect(
+        "https://api.us.elevenlabs.io/twilio/inbound_call",
+        query={"agent_id": agent_id, "userId": user_id, "jobId": job_id},
+    )
+    return Response(body, mimetype=twiml.TWIML_MIMETYPE)
 
 
 @api_bp.route("/quotation-agent/webhook", methods=["POST"])
@@ -484,6 +532,8 @@ def quotation_agent_webhook():
         if not job_id:
             return jsonify({"error": "Missing job_id"}), 400
         
+        call_admission.complete(job_id)
+        
         # Update the procurement job with output_result
         updates = {
             "output_result": output_result,
@@ -508,219 +558,202 @@ def quotation_agent_webhook():
         return jsonify({"error": str(e)}), 500
 
 
+@api_bp.route("/quotation-agent/audio/<audio_key>", methods=["GET"])
+def quotation_agent_audio(audio_key: str):
+    """
+    Serve pre-rendered quote prompt audio for Twilio <Play>.
+    The key is the content hash QuotationAgent stored the stitched audio under.
+    """
+    from flask import Response
+
+    if len(audio_key) != 64 or any(c not in "0123456789abcdef" for c in audio_key):
+        return jsonify({"error": "Invalid audio key"}), 400
+
+    audio = tts_cache.get(audio_key, "mp3")
+    if audio is None:
+        return jsonify({"error": "Audio not found"}), 404
+
+    return Response(audio, mimetype="audio/mpeg", headers={"Cache-Control": "public, max-age=86400"})
+
+
 @api_bp.route("/quotation-agent/transcript", methods=["POST"])
 def quotation_agent_transcript():
     """
     Webhook endpoint to receive transcript data from ElevenLabs Quotation Agent.
     
-    This endpoint accepts any JSON data and prints it for logging purposes.
+    The body is parsed in one streaming pass that keeps only the turns,
+    summary and call identifiers; that compact payload is durably queued (in
+    the Supabase transcript_jobs table) and acknowledged right away. LLM
+    extraction and the supplier_calls update run on the transcript workers
+    or in a queue drain request. Retried deliveries (same conversation_id and
+    event_timestamp) get the first delivery's response back without being
+    queued again.
     """
     try:
-        payload = request.get_json()
+        try:
+            payload = parse_transcript_stream(request.stream)
+        except TranscriptPayloadError as e:
+            return jsonify({"error": str(e)}), 400
+
+        conversation_id, call_sid = call_identifiers(payload)
+        idempotency_key = delivery_key(payload)
+        if idempotency_key:
+            idempotency_key = f"transcript:{idempotency_key}"
+            cached = webhook_idempotency.get(idempotency_key)
+            if cached is not None:
+                response, status = cached
+                print(f"♻️ Duplicate transcript delivery for call {conversation_id}, replaying response")
+                return jsonify({**response, "duplicate": True}), status
+
+        # The conversation is over; free its slot for queued outbound calls
+        call_admission.complete(conversation_id)
+        call_admission.complete(call_sid)
+
+        job_id, duplicate = transcript_queue.enqueue(payload, dedupe_key=idempotency_key)
+        print(f"📥 Queued transcript for call {conversation_id} (job {job_id}{', duplicate' if duplicate else ''})")
+
+        response = {"success": True, "queued": True, "job_id": job_id, "duplicate": duplicate}
+        if idempotency_key:
+            webhook_idempotency.put(idempotency_key, response, 200)
+        return jsonify(response), 200
 
-        if not payload:
-            return jsonify({"error": "No data provided"}), 400
+    except Exception as e:
+        print(f"Error receiving transcript data: {e}")
+        return jsonify({"error": str(e)}), 500
 
-        # ElevenLabs wraps the call payload in {"type", "event_timestamp", "data"}
-        event_type = payload.get("type") if isinstance(payload, dict) else None
-        event_timestamp = payload.get("event_timestamp") if isinstance(payload, dict) else None
-        data = payload.get("data") if isinstance(payload, dict) else payload
-        if not isinstance(data, dict):
-            data = {}
 
-        # Fallback for legacy format where event fields are at the top level
-        event_timestamp = event_timestamp or data.get("event_timestamp")
-        user_id = data.get("user_id")
+@api_bp.route("/quotation-agent/transcript/live", methods=["POST"])
+def quotation_agent_live_transcript():
+    """
+    Receive transcript turns while a call is in progress.
+    
+    Expects {"conversation_id", "turns": [{"role", "message", "seq"?}]} or a
+    single turn ({"conversation_id", "role", "message", "seq"?}). Turns are
+    appended and folded into the call's running conclusion in the background,
+    so the post-call webhook only has to extract what is left.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
+            return jsonify({"error": "No data provided"}), 400
+        
         conversation_id = data.get("conversation_id")
-        agent_id = data.get("agent_id")
-
-        # Extract conversation messages that belong to the agent or user roles
-        conversation = data.get("conversation")
-        if isinstance(conversation, dict):
-            messages = conversation.get("messages", [])
-        elif isinstance(conversation, list):
-            messages = conversation
-        else:
-            messages = []
-
-        dialogue = []
-        for message in messages:
-            role = message.get("role")
-            if role not in {"agent", "user"}:
-                continue
-
-            content_blocks = message.get("content", [])
-            if isinstance(content_blocks, list) and content_blocks:
-                for block in content_blocks:
-                    text = block.get("text") if isinstance(block, dict) else None
-                    if text:
-                        dialogue.append({"role": role, "text": text})
-
-            # Some payloads provide a direct message field
-            direct_text = message.get("message") or message.get("text")
-            if direct_text:
-                dialogue.append({"role": role, "text": direct_text})
-
-        if not dialogue:
-            transcript_entries = data.get("transcript", [])
-            if isinstance(transcript_entries, list):
-                for entry in transcript_entries:
-                    if not isinstance(entry, dict):
-                        continue
-                    role = entry.get("role")
-                    if role not in {"agent", "user"}:
-                        continue
-                    text = entry.get("message") or entry.get("text")
-                    if text:
-                        dialogue.append({"role": role, "text": text})
-
-        # Retrieve transcript summary from the analysis section following the webhook spec
-        analysis = data.get("analysis")
-        summary = None
-        if isinstance(analysis, dict):
-            summary = analysis.get("transcript_summary") or analysis.get("summary")
-
-            # Some responses may nest the summary
-            summary_obj = analysis.get("transcript_summary") if isinstance(analysis.get("transcript_summary"), dict) else None
-            if isinstance(summary_obj, dict):
-                summary = summary_obj.get("text") or summary_obj.get("summary")
-
-        summary = summary or data.get("transcript_summary")
-
-        # Determine call connection status
-        call_success_raw = None
-        if isinstance(analysis, dict):
-            call_success_raw = analysis.get("call_successful")
-        call_success_raw = call_success_raw or data.get("status") or data.get("call_connected")
-
-        call_connected = None
-        if isinstance(call_success_raw, bool):
-            call_connected = call_success_raw
-        elif isinstance(call_success_raw, str):
-            call_connected = call_success_raw.lower() in {
-                "success",
-                "successful",
-                "connected",
-                "completed",
-                "done",
-                "true",
-                "yes",
-            }
+        if not conversation_id:
+            return jsonify({"error": "conversation_id is required"}), 400
+        
+        turns = data.get("turns")
+        if turns is None:
+            turns = [data]
+        if not isinstance(turns, list) or not all(isinstance(turn, dict) for turn in turns):
+            return jsonify({"error": "turns must be a list of objects"}), 400
+        
+        result = live_transcripts.append(conversation_id, turns)
+        return jsonify({"success": True, "conversation_id": conversation_id, **result}), 200
+        
+    except Exception as e:
+        print(f"Error receiving live transcript turns: {e}")
+        return jsonify({"error": str(e)}), 500
 
-        # Compute call timestamp / datetime
-        metadata = data.get("metadata") if isinstance(data.get("metadata"), dict) else {}
-        call_timestamp = event_timestamp or metadata.get("start_time_unix_secs")
-        call_datetime_iso = None
-        if call_timestamp is not None:
-            try:
-                call_datetime_iso = datetime.fromtimestamp(float(call_timestamp)).isoformat()
-            except Exception:
-                call_datetime_iso = str(call_timestamp)
-
-        transcript_turns = [
-            {
-                "speaker": "Agent" if turn["role"] == "agent" else "User",
-                "text": turn["text"],
-            }
-            for turn in dialogue
-        ]
 
-        conclusion = extract_call_conclusion(summary or "")
+@api_bp.route("/quotation-agent/transcript/live/<conversation_id>", methods=["GET"])
+@require_auth
+def quotation_agent_live_conclusion(conversation_id: str):
+    """Running conclusion of a call in progress."""
+    snapshot = live_transcripts.snapshot(conversation_id)
+    if snapshot is None:
+        return jsonify({"success": False, "error": "Call not found"}), 404
+    return jsonify({"success": True, **snapshot}), 200
 
-        call_report = {
-            "call_id": conversation_id or data.get("id"),
-            "call_connected": call_connected,
-            "call_datetime_iso": call_datetime_iso,
-            "transcript": transcript_turns,
-            "summary": summary,
-            "conclusion": {
-                "quoted_price": conclusion.get("quoted_price"),
-                "moq": conclusion.get("moq"),
-                "terms_of_delivery": conclusion.get("terms_of_delivery"),
-                "payment_terms": conclusion.get("payment_terms"),
-                "meeting_requested": conclusion.get("meeting_requested"),
-                "meeting_preferred_time": conclusion.get("meeting_preferred_time"),
-                "call_success": conclusion.get("call_success"),
-                "decision_reason": conclusion.get("decision_reason"),
-                "important_notes": conclusion.get("important_notes"),
-            },
-        }
 
-        print("📝 QUOTATION AGENT CALL REPORT")
-        print(json.dumps(call_report))
+@api_bp.route("/quotation-agent/transcript/queue", methods=["GET"])
+@require_auth
+def transcript_queue_stats():
+    """Transcript queue depth, failures, queue-wait/processing latency, idempotency hits, live extraction and LLM cache hit rate."""
+    return jsonify({
+        "success": True,
+        "queue": transcript_queue.stats(),
+        "idempotency": webhook_idempotency.stats(),
+        "live": live_transcripts.stats(),
+        "llm_cache": llm_result_cache.stats(),
+        "llm_batches": conclusion_batcher.stats(),
+        "fast_path": fast_path_stats(),
+    }), 200
+
+
+@api_bp.route("/quotation-agent/transcript/queue/drain", methods=["POST"])
+def transcript_queue_drain():
+    """
+    Process queued transcript jobs inside this request.
+    
+    For instances that only get CPU while serving a request (Cloud Run's
+    default), where the background workers stall once the webhook has been
+    answered: Cloud Scheduler or Cloud Tasks calls this with
+    Authorization: Bearer <TRANSCRIPT_QUEUE_DRAIN_TOKEN>. Jobs are claimed
+    until none is ready or TRANSCRIPT_QUEUE_DRAIN_SECS have passed.
+    """
+    if not TRANSCRIPT_QUEUE_DRAIN_TOKEN:
+        return jsonify({"error": "Queue draining is not enabled"}), 404
+    auth_header = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(auth_header.encode(), f"Bearer {TRANSCRIPT_QUEUE_DRAIN_TOKEN}".encode()):
+        return jsonify({"error": "Invalid drain token"}), 401
+
+    try:
+        processed = transcript_queue.drain()
+        return jsonify({"success": True, "processed": processed}), 200
+    except Exception as e:
+        print(f"Error draining transcript queue: {e}")
+        return jsonify({"error": str(e)}), 500
+
 
-        # Update or create supplier_calls table record with transcript and summary
-        call_id = call_report["call_id"]
-        print(f"🔍 Looking for supplier_calls record with call_id: {call_id}")
+@api_bp.route("/metrics/llm", methods=["GET"])
+@require_auth
+def llm_metrics_endpoint():
+    """LLM call latency, token use, estimated cost, retries and failures, by call site and model, and provider concurrency limits."""
+    return jsonify({"success": True, **llm_metrics.snapshot(), "providers": provider_stats()}), 200
+
+
+@api_bp.route("/supplier-calls/<call_id>/turns", methods=["GET"])
+@require_auth
+def get_call_turns_endpoint(call_id: str):
+    """
+    Get the turns of a supplier call, a page at a time.
+    Query parameters:
+    - after_seq: Return turns after this seq (use next_after_seq from the previous page)
+    - limit: Turns per page (default 50, max 500)
+    - last: Return only the last N turns
+    """
+    try:
+        after_seq = request.args.get("after_seq", type=int)
+        limit = request.args.get("limit", 50, type=int)
+        last = request.args.get("last", type=int)
         
-        if call_id:
-            try:
-                # Format transcript as text
-                transcript_text = "\n".join([
-                    f"{turn['speaker']}: {turn['text']}"
-                    for turn in transcript_turns
-                ])
-                
-                # Determine status based on call success
-                status = "completed" if call_connected else "failed"
-                
-                print(f"📊 Call Status: {status}")
-                print(f"📝 Transcript length: {len(transcript_text)} characters")
-                print(f"📄 Summary length: {len(summary or '')} characters")
-                
-                # Check if supabase_admin is available
-                if not supabase_admin:
-                    print(f"❌ Supabase admin client not initialized")
-                    return jsonify({"success": False, "error": "Database client not available"}), 500
-                
-                # Try to update existing record first
-                update_result = supabase_admin.table("supplier_calls")\
-                    .update({
-                        "transcript": transcript_text,
-                        "summary": summary or "",
-                        "status": status,
-                    })\
-                    .eq("call_id", call_id)\
-                    .execute()
-                
-                if update_result.data and len(update_result.data) > 0:
-                    print(f"✅ Updated existing supplier_calls for call_id: {call_id}")
-                    print(f"   Updated {len(update_result.data)} record(s)")
-                    print(f"   Supplier: {update_result.data[0].get('supplier_name', 'Unknown')}")
-                else:
-                    # No existing record found, create a new one
-                    print(f"⚠️ No existing supplier_calls record found for call_id: {call_id}")
-                    print(f"💾 Creating new supplier_calls record...")
-                    
-                    # Extract supplier info from call metadata if available
-                    supplier_name = call_report.get("metadata", {}).get("seller_company_name", "Unknown Supplier")
-                    
-                    insert_result = supabase_admin.table("supplier_calls")\
-                        .insert({
-                            "call_id": call_id,
-                            "supplier_name": supplier_name,
-                            "transcript": transcript_text,
-                            "summary": summary or "",
-                            "status": status,
-                        })\
-                        .execute()
-                    
-                    if insert_result.data and len(insert_result.data) > 0:
-                        print(f"✅ Created new supplier_calls record for call_id: {call_id}")
-                        print(f"   Supplier: {supplier_name}")
-                    else:
-                        print(f"❌ Failed to create supplier_calls record")
-                    
-            except Exception as update_error:
-                print(f"❌ Failed to update/create supplier_calls: {update_error}")
-                import traceback
-                traceback.print_exc()
-
-        return jsonify({"success": True, "call_report": call_report}), 200
+        result = get_call_turns(call_id, after_seq=after_seq, limit=limit, last=last)
+        
+        if result.get("success"):
+            return jsonify(result), 200
+        else:
+            return jsonify(result), 500
+    except Exception as e:
+        print(f"Exception in get_call_turns_endpoint: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
 
+@api_bp.route("/supplier-calls/<call_id>/transcript", methods=["GET"])
+@require_auth
+def get_call_transcript_endpoint(call_id: str):
+    """Get the full transcript and summary of a supplier call (loaded from cold storage if offloaded)."""
+    try:
+        result = get_call_transcript(call_id)
+        
+        if result.get("success"):
+            return jsonify(result), 200
+        elif result.get("error") == "Call not found":
+            return jsonify(result), 404
+        else:
+            return jsonify(result), 500
     except Exception as e:
-        print(f"Error receiving transcript data: {e}")
-        return jsonify({"error": str(e)}), 500
+        print(f"Exception in get_call_transcript_endpoint: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
 
 
 @api_bp.get("/_debug/quote-requests")
@@ -1,36 +1,69 @@
-from flask import Blueprint, request, Response
 import os
+from functools import wraps
+
+from flask import Blueprint, request, Response
+
+from services import twiml
+from services.signed_url_pool import SignedUrlError, signed_url_pool
+from services.twilio_client import is_valid_twilio_request
 
 twiml_bp = Blueprint('twiml', __name__, url_prefix='/twiml')
 
+
+def require_twilio_signature(f):
+    """
+    Decorator for answer webhooks that hand out credentials (signed ElevenLabs
+    URLs): only requests signed by Twilio with our auth token get through.
+    The signed URL is rebuilt from WEBHOOK_BASE_URL, since behind Cloud Run's
+    proxy request.url does not match what Twilio called.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        base_url = os.getenv('WEBHOOK_BASE_URL', request.host_url).rstrip('/')
+        url = base_url + request.full_path.rstrip('?')
+        params = request.form.to_dict() if request.method == 'POST' else {}
+        if not is_valid_twilio_request(url, params, request.headers.get('X-Twilio-Signature')):
+            print(f"❌ Rejected unsigned TwiML request to {request.path}")
+            return Response(twiml.say("Unauthorized request."), mimetype=twiml.TWIML_MIMETYPE), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+
 @twiml_bp.route('/elevenlabs-connect', methods=['POST', 'GET'])
+@require_twilio_signature
 def elevenlabs_connect():
     """
     TwiML endpoint that connects Twilio call to ElevenLabs WebSocket
     This is called when a call is initiated to start the AI conversation
     """
     signed_url = request.args.get('url')
+    agent_id = request.args.get('agent_id')
+    
+    if not signed_url and agent_id:
+        # Take a pre-fetched signed URL so the supplier hears the agent without
+        # waiting on an ElevenLabs round trip
+        try:
+            signed_url = signed_url_pool.take(agent_id)
+        except SignedUrlError as e:
+            print(f"❌ {e}")
     
     if not signed_url:
-        return Response(
-            '<?xml version="1.0" encoding="UTF-8"?><Response><Say>Connection error. Please try again later.</Say></Response>',
-            mimetype='text/xml'
-        )
+        return Response(twiml.say("Connection error. Please try again later."), mimetype=twiml.TWIML_MIMETYPE)
     
     print(f"📞 Connecting call to ElevenLabs WebSocket: {signed_url[:50]}...")
     
-    # TwiML to connect to ElevenLabs WebSocket
-    twiml = f'''<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Connect>
-        <Stream url="{signed_url}" />
-    </Connect>
-</Response>'''
+    # Call metadata (meta_* query parameters) is forwarded as stream parameters
+    parameters = {
+        key[len('meta_'):]: value for key, value in request.args.items() if key.startswith('meta_')
+    }
     
-    return Response(twiml, mimetype='text/xml')
+    # TwiML to connect to ElevenLabs WebSocket
+    body = twiml.connect_stream(signed_url, parameters=parameters, cache=False)
+    return Response(body, mimetype=twiml.TWIML_MIMETYPE)
 
 
 @twiml_bp.route('/elevenlabs-stream', methods=['POST', 'GET'])
+@require_twilio_signature
 def elevenlabs_stream():
     """
     Alternative TwiML endpoint for streaming with agent ID
@@ -38,27 +71,18 @@ def elevenlabs_stream():
     agent_id = request.args.get('agent_id')
     
     if not agent_id:
-        return Response(
-            '<?xml version="1.0" encoding="UTF-8"?><Response><Say>Agent configuration error.</Say></Response>',
-            mimetype='text/xml'
-        )
+        return Response(twiml.say("Agent configuration error."), mimetype=twiml.TWIML_MIMETYPE)
     
-    # Build WebSocket URL for ElevenLabs
-    elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY")
-    ws_url = f"wss://api.elevenlabs.io/v1/convai/conversation?agent_id={agent_id}"
+    # Authenticate with a pre-fetched signed URL rather than sending the API key to Twilio
+    try:
+        signed_url = signed_url_pool.take(agent_id)
+    except SignedUrlError as e:
+        print(f"❌ {e}")
+        return Response(twiml.say("Connection error. Please try again later."), mimetype=twiml.TWIML_MIMETYPE)
     
     print(f"📞 Streaming call to agent: {agent_id}")
     
-    twiml = f'''<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Connect>
-        <Stream url="{ws_url}">
-            <Parameter name="api_key" value="{elevenlabs_api_key}" />
-        </Stream>
-    </Connect>
-</Response>'''
-    
-    return Response(twiml, mimetype='text/xml')
+    return Response(twiml.connect_stream(signed_url, cache=False), mimetype=twiml.TWIML_MIMETYPE)
 
 
 @twiml_bp.route('/webhook/call-status', methods=['POST'])
@@ -99,9 +123,4 @@ def simple_say():
     """
     message = request.args.get('message', 'Hello, this is a test call.')
     
-    twiml = f'''<?xml version="1.0" encoding="UTF-8"?>
-<Response>
-    <Say>{message}</Say>
-</Response>'''
-    
-    return Response(twiml, mimetype='text/xml')
+    return Response(twiml.say(message), mimetype=twiml.TWIML_MIMETYPE)
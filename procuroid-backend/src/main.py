@@ -2,7 +2,7 @@
 Main Flask application entry point.
 Centralizes all route blueprints from agents, api, core, and services modules.
 """
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify, request
 import os
 import sys
 
@@ -18,6 +18,9 @@ except ImportError:
 # Import blueprints from different modules
 from agents import agents_bp
 from api import api_bp
+from api.twiml_routes import twiml_bp
+from services.llm_metrics import llm_metrics
+from services.transcripts import transcript_queue
 
 # Create Flask app
 app = Flask(__name__)
@@ -53,6 +56,35 @@ else:
 # Register all blueprints
 app.register_blueprint(api_bp)
 app.register_blueprint(agents_bp)
+app.register_blueprint(twiml_bp)
+
+
+
+# Per-request LLM usage: logged once per request and reported in a Server-Timing header
+@app.before_request
+def start_llm_scope():
+    g.llm_scope = llm_metrics.start_scope()
+
+
+@app.after_request
+def add_llm_server_timing(response):
+    totals = llm_metrics.current_scope()
+    if totals is not None and totals.calls:
+        response.headers.add(
+            "Server-Timing", f'llm;dur={totals.latency_secs * 1000:.1f};desc="{totals.calls} LLM calls"'
+        )
+    return response
+
+
+@app.teardown_request
+def end_llm_scope(exc):
+    token = g.pop("llm_scope", None)
+    if token is not None:
+        llm_metrics.end_scope(token, f"{request.method} {request.path}")
+
+
+# Process queued transcript webhooks (no-op with TRANSCRIPT_WORKERS=0)
+transcript_queue.start()
 
 
 @app.route("/", methods=["GET"])
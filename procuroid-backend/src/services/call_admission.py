@@ -0,0 +1,562 @@
+"""
+Admission control for outbound supplier calls.
+
+Every call path asks the shared ``call_admission`` controller for a ticket
+before dialing. A ticket is granted once
+
+* a from-number's token bucket has a token (Twilio calls-per-second), and
+* a conversation slot is free under the global cap (ElevenLabs concurrency).
+
+Calls without a fixed from-number are admitted on whichever caller ID in the
+pool (see ``caller_id_pool``) is ready first, chosen by the pool's strategy.
+
+Callers that cannot be admitted yet wait in a queue instead of failing. The
+conversation slot is held until the call's webhook reports completion (or a
+safety TTL expires), so the cap tracks live conversations, not API requests.
+
+Leases and token buckets live in a SQLite file (WAL mode) shared by every
+gunicorn worker on the host, so the cap and rates apply to the host as a
+whole and a status webhook landing on any worker releases the slot. The
+wait queue itself is per worker (FIFO within a worker); queued callers
+re-check the shared state at least every _SHARED_POLL_SECS.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from dotenv import load_dotenv
+
+from .caller_id_pool import CallerIdPool, caller_id_pool
+
+load_dotenv()
+
+CALL_RATE_PER_NUMBER = float(os.getenv("CALL_RATE_PER_NUMBER", "1"))
+CALL_BURST_PER_NUMBER = float(os.getenv("CALL_BURST_PER_NUMBER", "1"))
+MAX_CONCURRENT_CONVERSATIONS = int(os.getenv("MAX_CONCURRENT_CONVERSATIONS", "10"))
+# Must stay below gunicorn's --timeout (120s), or a queued request thread is killed mid-wait
+CALL_ADMISSION_TIMEOUT = float(os.getenv("CALL_ADMISSION_TIMEOUT", "90"))
+# Batch dispatch (quotation agents, scheduled campaigns) runs off the request path and
+# waits for a slot as long as it takes; a 200-supplier job against a cap of 10 queues for many minutes
+CALL_DISPATCH_ADMISSION_TIMEOUT = float(os.getenv("CALL_DISPATCH_ADMISSION_TIMEOUT", "inf"))
+CALL_CONVERSATION_TTL = float(os.getenv("CALL_CONVERSATION_TTL", "1800"))
+CALL_RATE_LIMIT_RETRIES = int(os.getenv("CALL_RATE_LIMIT_RETRIES", "3"))
+CALL_ADMISSION_PATH = os.getenv(
+    "CALL_ADMISSION_PATH", os.path.join(tempfile.gettempdir(), "procuroid-call-admission.sqlite3")
+)
+
+DEFAULT_NUMBER_KEY = "default"
+POOL_KEY = "caller-id-pool"
+
+T = TypeVar("T")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS call_leases (
+    ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    from_number TEXT NOT NULL,
+    admitted_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS call_lease_ids (
+    call_id TEXT PRIMARY KEY,
+    ticket_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS call_lease_ids_ticket ON call_lease_ids (ticket_id);
+CREATE TABLE IF NOT EXISTS call_buckets (
+    number TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    blocked_until REAL NOT NULL
+);
+"""
+
+# How often queued callers re-check the shared state (slots freed by other workers, expired leases).
+_SHARED_POLL_SECS = 0.25
+# How often queued coroutines re-check for a free slot (they are not notified).
+_ASYNC_POLL_SECS = 0.05
+
+
+class CallAdmissionTimeout(RuntimeError):
+    """Raised when a call could not be admitted within the allowed wait."""
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at ``rate`` tokens per second.
+    Times are wall-clock so the state can be shared between processes.
+    """
+
+    def __init__(self, rate: float, capacity: float, tokens: Optional[float] = None,
+                 updated_at: Optional[float] = None, blocked_until: float = 0.0):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity if tokens is None else tokens
+        self.updated_at = time.time() if updated_at is None else updated_at
+        self.blocked_until = blocked_until
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def time_until_available(self, now: float) -> float:
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1.0
+
+    def block_for(self, seconds: float, now: float) -> None:
+        """Refuse tokens for ``seconds`` (used after a provider 429)."""
+        self._refill(now)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class CallTicket:
+    """Admission granted to one outbound call; holds a conversation slot."""
+
+    def __init__(self, controller: "CallAdmissionController", ticket_id: int, from_number: str, waited: float):
+        self.controller = controller
+        self.ticket_id = ticket_id
+        self.from_number = from_number
+        self.waited = waited
+        self.admitted_at = time.time()
+
+    def bind(self, *call_ids: Optional[str]) -> None:
+        """Associate provider ids (call SID, conversation id, job id) with this ticket."""
+        self.controller._bind(self.ticket_id, [str(cid) for cid in call_ids if cid])
+
+    def release(self) -> None:
+        """Give the conversation slot back (call failed or finished)."""
+        self.controller._release(self.ticket_id)
+
+    def rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Release the slot and pause this from-number after a provider 429."""
+        self.release()
+        self.controller.block_number(self.from_number, retry_after)
+
+
+class CallAdmissionController:
+    """Token bucket per from-number plus a global concurrent-conversation cap."""
+
+    def __init__(
+        self,
+        rate_per_number: float = CALL_RATE_PER_NUMBER,
+        burst_per_number: float = CALL_BURST_PER_NUMBER,
+        max_concurrent: int = MAX_CONCURRENT_CONVERSATIONS,
+        conversation_ttl: float = CALL_CONVERSATION_TTL,
+        default_timeout: float = CALL_ADMISSION_TIMEOUT,
+        caller_ids: Optional[CallerIdPool] = None,
+        path: str = CALL_ADMISSION_PATH,
+    ):
+        self.caller_ids = caller_ids
+        self.rate_per_number = rate_per_number
+        self.burst_per_number = burst_per_number
+        self.max_concurrent = max(1, max_concurrent)
+        self.conversation_ttl = conversation_ttl
+        self.default_timeout = default_timeout
+
+        self.path = path
+
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._waiters: Deque[Dict[str, Any]] = deque()
+
+        # Totals for this worker
+        self._admitted = 0
+        self._timeouts = 0
+        self._expired = 0
+        self._recent_waits: Deque[float] = deque(maxlen=500)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    # ------------------------------------------------------------------ #
+    # Admission
+    # ------------------------------------------------------------------ #
+
+    def acquire(
+        self,
+        from_number: Optional[str] = None,
+        timeout: Optional[float] = None,
+        pool_numbers: Optional[Sequence[str]] = None,
+    ) -> CallTicket:
+        """
+        Block until a call from ``from_number`` may be placed and return its ticket.
+
+        Without ``from_number`` the call goes out on the first ready number in
+        the caller ID pool; ``ticket.from_number`` tells which one was chosen.
+        ``pool_numbers`` limits the draw to those pool numbers (an empty list
+        admits the call under the default number instead).
+
+        Raises:
+            CallAdmissionTimeout: If the call is still queued after ``timeout`` seconds
+        """
+        pool, key = self._resolve_key(from_number, pool_numbers)
+        timeout = self.default_timeout if timeout is None else timeout
+        enqueued_at = time.monotonic()
+        deadline = enqueued_at + timeout
+        waiter = {"key": key, "enqueued_at": enqueued_at}
+
+        with self._cond:
+            self._waiters.append(waiter)
+            try:
+                while True:
+                    now = time.monotonic()
+                    ticket, wait_for = self._try_admit(waiter, pool, now)
+                    if ticket is not None:
+                        return ticket
+                    remaining = self._remaining(deadline, now, key, timeout)
+                    self._cond.wait(min(wait_for, remaining))
+            finally:
+                self._waiters.remove(waiter)
+                self._cond.notify_all()
+
+    async def acquire_async(
+        self,
+        from_number: Optional[str] = None,
+        timeout: Optional[float] = None,
+        pool_numbers: Optional[Sequence[str]] = None,
+    ) -> CallTicket:
+        """
+        Coroutine form of ``acquire`` for asyncio dispatchers.
+
+        Queued coroutines share the same FIFO as blocked threads but wait with
+        ``asyncio.sleep``, so hundreds of queued calls do not tie up threads.
+        Each admission attempt (a write transaction that may wait on the shared
+        file's lock) runs in the default executor, off the event loop.
+        """
+        pool, key = self._resolve_key(from_number, pool_numbers)
+        timeout = self.default_timeout if timeout is None else timeout
+        enqueued_at = time.monotonic()
+        deadline = enqueued_at + timeout
+        waiter = {"key": key, "enqueued_at": enqueued_at}
+
+        with self._cond:
+            self._waiters.append(waiter)
+        try:
+            while True:
+                ticket, wait_for = await asyncio.to_thread(self._admit_once, waiter, pool, deadline, timeout)
+                if ticket is not None:
+                    return ticket
+                await asyncio.sleep(min(wait_for, _ASYNC_POLL_SECS))
+        finally:
+            with self._cond:
+                self._waiters.remove(waiter)
+                self._cond.notify_all()
+
+    def _admit_once(
+        self, waiter: Dict[str, Any], pool: Optional[List[str]], deadline: float, timeout: float
+    ) -> Tuple[Optional[CallTicket], float]:
+        """One admission attempt for ``acquire_async``; raises CallAdmissionTimeout past ``deadline``."""
+        with self._cond:
+            now = time.monotonic()
+            ticket, wait_for = self._try_admit(waiter, pool, now)
+            if ticket is not None:
+                return ticket, 0.0
+            return None, min(wait_for, self._remaining(deadline, now, waiter["key"], timeout))
+
+    def place_call(
+        self,
+        dial: Callable[[Optional[str]], T],
+        *,
+        from_number: Optional[str] = None,
+        call_ids: Optional[Callable[[T], Iterable[Optional[str]]]] = None,
+        timeout: Optional[float] = None,
+        pool_numbers: Optional[Sequence[str]] = None,
+    ) -> T:
+        """
+        Run ``dial(from_number)`` once admitted and keep its conversation slot until completion.
+
+        ``dial`` receives the from-number the call was admitted on: the one
+        requested, the caller ID picked from the pool, or None if neither exists.
+
+        A provider 429 releases the slot, pauses the from-number and puts the
+        call back in the queue (up to CALL_RATE_LIMIT_RETRIES times) instead of
+        surfacing the error. Any other exception releases the slot and is re-raised.
+        """
+        attempt = 0
+        while True:
+            ticket = self.acquire(from_number, timeout, pool_numbers)
+            try:
+                result = dial(None if ticket.from_number == DEFAULT_NUMBER_KEY else ticket.from_number)
+            except Exception as exc:  # noqa: BLE001
+                if _status_code(exc) == 429 and attempt < CALL_RATE_LIMIT_RETRIES:
+                    attempt += 1
+                    print(f"⏳ Provider rate limit for {ticket.from_number}; re-queueing call (attempt {attempt})")
+                    ticket.rate_limited(_retry_after(exc))
+                    continue
+                ticket.release()
+                raise
+
+            ticket.bind(*(call_ids(result) if call_ids else ()))
+            return result
+
+    async def place_call_async(
+        self,
+        dial: Callable[[Optional[str]], Awaitable[T]],
+        *,
+        from_number: Optional[str] = None,
+        call_ids: Optional[Callable[[T], Iterable[Optional[str]]]] = None,
+        timeout: Optional[float] = None,
+        pool_numbers: Optional[Sequence[str]] = None,
+    ) -> T:
+        """Coroutine form of ``place_call``; ``dial`` is an async function."""
+        attempt = 0
+        while True:
+            ticket = await self.acquire_async(from_number, timeout, pool_numbers)
+            try:
+                result = await dial(None if ticket.from_number == DEFAULT_NUMBER_KEY else ticket.from_number)
+            except Exception as exc:  # noqa: BLE001
+                if _status_code(exc) == 429 and attempt < CALL_RATE_LIMIT_RETRIES:
+                    attempt += 1
+                    print(f"⏳ Provider rate limit for {ticket.from_number}; re-queueing call (attempt {attempt})")
+                    ticket.rate_limited(_retry_after(exc))
+                    continue
+                ticket.release()
+                raise
+
+            ticket.bind(*(call_ids(result) if call_ids else ()))
+            return result
+
+    def complete(self, call_id: Optional[str]) -> bool:
+        """Release the conversation slot bound to ``call_id``; returns True if one was held."""
+        if not call_id:
+            return False
+        with self._transaction() as conn:
+            row = conn.execute("SELECT ticket_id FROM call_lease_ids WHERE call_id = ?", (str(call_id),)).fetchone()
+            if row is not None:
+                self._drop_lease(conn, row[0])
+        with self._cond:
+            self._cond.notify_all()
+        return row is not None
+
+    def block_number(self, from_number: Optional[str], seconds: Optional[float] = None) -> None:
+        """Stop admitting calls from ``from_number`` for ``seconds`` (default: one refill period)."""
+        key = from_number or DEFAULT_NUMBER_KEY
+        with self._transaction() as conn:
+            bucket = self._bucket(conn, key)
+            bucket.block_for(seconds if seconds is not None else 1.0 / bucket.rate, time.time())
+            self._save_bucket(conn, key, bucket)
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of in-flight conversations and per-number state (shared by all
+        workers on the host), and this worker's queue and admission wait times.
+        """
+        now = time.time()
+        conn = self._conn()
+        in_flight = dict(conn.execute("SELECT from_number, COUNT(*) FROM call_leases GROUP BY from_number").fetchall())
+        buckets = {
+            number: TokenBucket(self.rate_per_number, self.burst_per_number, tokens, updated_at, blocked_until)
+            for number, tokens, updated_at, blocked_until in conn.execute(
+                "SELECT number, tokens, updated_at, blocked_until FROM call_buckets"
+            )
+        }
+        with self._cond:
+            monotonic_now = time.monotonic()
+            waits = sorted(self._recent_waits)
+            oldest = min((w["enqueued_at"] for w in self._waiters), default=None)
+            return {
+                "caller_ids": self.caller_ids.stats() if self.caller_ids is not None else None,
+                "queue_depth": len(self._waiters),
+                "oldest_queued_secs": round(monotonic_now - oldest, 3) if oldest is not None else None,
+                "in_flight_conversations": sum(in_flight.values()),
+                "max_concurrent_conversations": self.max_concurrent,
+                "admitted_total": self._admitted,
+                "timeouts_total": self._timeouts,
+                "expired_leases_total": self._expired,
+                "wait_secs": {
+                    "avg": round(sum(waits) / len(waits), 3) if waits else None,
+                    "p95": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else None,
+                    "max": round(waits[-1], 3) if waits else None,
+                },
+                "numbers": {
+                    key: {
+                        "tokens": round(min(bucket.capacity, bucket.tokens + (now - bucket.updated_at) * bucket.rate), 3),
+                        "blocked_for_secs": round(max(0.0, bucket.blocked_until - now), 3),
+                        "in_flight": in_flight.get(key, 0),
+                        "queued": sum(1 for w in self._waiters if w["key"] == key),
+                    }
+                    for key, bucket in buckets.items()
+                },
+            }
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+
+    def _resolve_key(
+        self, from_number: Optional[str], pool_numbers: Optional[Sequence[str]] = None
+    ) -> Tuple[Optional[List[str]], str]:
+        """The pool numbers to draw from (None when not pooled) and the queue key."""
+        if from_number or self.caller_ids is None:
+            return None, from_number or DEFAULT_NUMBER_KEY
+        if pool_numbers is None:
+            pool = self.caller_ids.numbers
+        else:
+            pool = [number for number in self.caller_ids.numbers if number in pool_numbers]
+        if not pool:
+            return None, DEFAULT_NUMBER_KEY
+        # Callers restricted to part of the pool queue separately, so they never hold up the rest
+        return pool, POOL_KEY if pool == self.caller_ids.numbers else f"{POOL_KEY}:{','.join(pool)}"
+
+    def _try_admit(
+        self, waiter: Dict[str, Any], pool: Optional[List[str]], now: float
+    ) -> Tuple[Optional[CallTicket], float]:
+        """
+        Admit ``waiter`` if possible; otherwise return how long to wait before
+        retrying. Caller holds self._cond; the shared state is read and updated
+        in one write transaction, so workers cannot both take the last slot.
+        """
+        if not self._is_next_for_number(waiter):
+            return None, _SHARED_POLL_SECS
+
+        wall_now = time.time()
+        with self._transaction() as conn:
+            self._expire_leases(conn, wall_now)
+            in_flight = dict(conn.execute("SELECT from_number, COUNT(*) FROM call_leases GROUP BY from_number").fetchall())
+            if sum(in_flight.values()) >= self.max_concurrent:
+                return None, _SHARED_POLL_SECS
+
+            key = waiter["key"]
+            numbers = pool or [key]
+            buckets = {number: self._bucket(conn, number) for number in numbers}
+            delays = {number: bucket.time_until_available(wall_now) for number, bucket in buckets.items()}
+            ready = [number for number in numbers if delays[number] <= 0]
+            if not ready:
+                return None, min(_SHARED_POLL_SECS, min(delays.values()))
+
+            number = self.caller_ids.choose(ready, in_flight) if pool else key
+            buckets[number].consume(wall_now)
+            self._save_bucket(conn, number, buckets[number])
+            ticket_id = conn.execute(
+                "INSERT INTO call_leases (from_number, admitted_at) VALUES (?, ?)", (number, wall_now)
+            ).lastrowid
+
+        waited = now - waiter["enqueued_at"]
+        if self.caller_ids is not None:
+            self.caller_ids.record_start(number)
+        self._admitted += 1
+        self._recent_waits.append(waited)
+        return CallTicket(self, ticket_id, number, waited), 0.0
+
+    def _remaining(self, deadline: float, now: float, key: str, timeout: float) -> float:
+        remaining = deadline - now
+        if remaining <= 0:
+            self._timeouts += 1
+            in_flight = self._conn().execute("SELECT COUNT(*) FROM call_leases").fetchone()[0]
+            raise CallAdmissionTimeout(
+                f"Call from {key} not admitted after {timeout:.0f}s "
+                f"({len(self._waiters)} queued, {in_flight} in flight)"
+            )
+        return remaining
+
+    def _bucket(self, conn: sqlite3.Connection, key: str) -> TokenBucket:
+        row = conn.execute(
+            "SELECT tokens, updated_at, blocked_until FROM call_buckets WHERE number = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return TokenBucket(self.rate_per_number, self.burst_per_number)
+        return TokenBucket(self.rate_per_number, self.burst_per_number, *row)
+
+    @staticmethod
+    def _save_bucket(conn: sqlite3.Connection, key: str, bucket: TokenBucket) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO call_buckets (number, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)",
+            (key, bucket.tokens, bucket.updated_at, bucket.blocked_until),
+        )
+
+    def _is_next_for_number(self, waiter: Dict[str, Any]) -> bool:
+        # FIFO per from-number; a number waiting on its bucket never blocks another number.
+        for queued in self._waiters:
+            if queued["key"] == waiter["key"]:
+                return queued is waiter
+        return False
+
+    def _bind(self, ticket_id: int, call_ids: List[str]) -> None:
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM call_leases WHERE ticket_id = ?", (ticket_id,)).fetchone() is None:
+                return
+            conn.executemany(
+                "INSERT OR REPLACE INTO call_lease_ids (call_id, ticket_id) VALUES (?, ?)",
+                [(call_id, ticket_id) for call_id in call_ids],
+            )
+
+    def _release(self, ticket_id: int) -> None:
+        with self._transaction() as conn:
+            self._drop_lease(conn, ticket_id)
+        with self._cond:
+            self._cond.notify_all()
+
+    @staticmethod
+    def _drop_lease(conn: sqlite3.Connection, ticket_id: int) -> None:
+        conn.execute("DELETE FROM call_leases WHERE ticket_id = ?", (ticket_id,))
+        conn.execute("DELETE FROM call_lease_ids WHERE ticket_id = ?", (ticket_id,))
+
+    def _expire_leases(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = [
+            row[0] for row in conn.execute(
+                "SELECT ticket_id FROM call_leases WHERE admitted_at < ?", (now - self.conversation_ttl,)
+            ).fetchall()
+        ]
+        for ticket_id in expired:
+            self._drop_lease(conn, ticket_id)
+        self._expired += len(expired)
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit mode with explicit transactions.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    """HTTP status of a Twilio or requests error, if it carries one."""
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Parse a numeric Retry-After header from a requests error, if present."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+# Shared controller used by every outbound call path (state shared by the host's workers).
+call_admission = CallAdmissionController(caller_ids=caller_id_pool)
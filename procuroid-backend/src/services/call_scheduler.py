@@ -0,0 +1,458 @@
+"""
+Business-hours-aware scheduling for supplier call campaigns.
+
+Each supplier's local time zone is resolved from an explicit ``timezone``
+field, their country, or the country code of their phone number. Suppliers
+inside their local calling window are called right away; the rest wait in a
+priority queue keyed by when their next window opens and are released
+just-in-time by a background thread. Releases are throttled to the free
+capacity reported by the call admission controller, so a window opening for
+many suppliers at once does not flood the outbound queue.
+
+The queue is a SQLite file (WAL mode) like the transcript queue, so deferred
+calls survive a restart and gunicorn's workers share one schedule; a release
+is claimed in a write transaction, so each call is dispatched once. What the
+dispatch returns for each supplier is stored on its row (see ``results``)
+and handed to ``on_quote``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, time as dtime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dotenv import load_dotenv
+
+from .call_admission import call_admission
+
+load_dotenv()
+
+# Local calling window, e.g. "09:00-17:00", and weekdays as ISO numbers (1=Mon).
+CALL_WINDOW_HOURS = os.getenv("CALL_WINDOW_HOURS", "09:00-17:00")
+CALL_WINDOW_DAYS = os.getenv("CALL_WINDOW_DAYS", "1,2,3,4,5")
+# Do not start a call this close to the end of the supplier's window.
+CALL_WINDOW_MIN_REMAINING_MINUTES = int(os.getenv("CALL_WINDOW_MIN_REMAINING_MINUTES", "15"))
+# Fallback when a supplier's time zone cannot be determined.
+CALL_DEFAULT_TIMEZONE = os.getenv("CALL_DEFAULT_TIMEZONE", "UTC")
+# Longest the release thread sleeps before re-checking capacity.
+CALL_SCHEDULER_POLL_SECS = float(os.getenv("CALL_SCHEDULER_POLL_SECS", "30"))
+CALL_SCHEDULE_PATH = os.getenv(
+    "CALL_SCHEDULE_PATH", os.path.join(tempfile.gettempdir(), "procuroid-call-schedule.sqlite3")
+)
+# A release whose dispatch has not reported back after this long (crashed
+# worker) is queued again.
+CALL_SCHEDULER_LEASE_SECS = float(os.getenv("CALL_SCHEDULER_LEASE_SECS", "1800"))
+# How long dispatched calls and their results are kept.
+CALL_SCHEDULER_RETENTION_SECS = float(os.getenv("CALL_SCHEDULER_RETENTION_SECS", str(7 * 24 * 3600)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    supplier TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    call_at REAL NOT NULL,
+    window_closes REAL NOT NULL,
+    released_at REAL,
+    finished_at REAL,
+    result TEXT,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS scheduled_calls_due ON scheduled_calls (status, call_at);
+"""
+
+# Country name / ISO code -> representative IANA zone. Multi-zone countries
+# map to their most populous business zone.
+COUNTRY_TIMEZONES = {
+    "usa": "America/New_York", "us": "America/New_York", "united states": "America/New_York",
+    "canada": "America/Toronto", "ca": "America/Toronto",
+    "mexico": "America/Mexico_City", "mx": "America/Mexico_City",
+    "brazil": "America/Sao_Paulo", "br": "America/Sao_Paulo",
+    "uk": "Europe/London", "gb": "Europe/London", "united kingdom": "Europe/London",
+    "ireland": "Europe/Dublin", "ie": "Europe/Dublin",
+    "germany": "Europe/Berlin", "de": "Europe/Berlin",
+    "france": "Europe/Paris", "fr": "Europe/Paris",
+    "spain": "Europe/Madrid", "es": "Europe/Madrid",
+    "italy": "Europe/Rome", "it": "Europe/Rome",
+    "netherlands": "Europe/Amsterdam", "nl": "Europe/Amsterdam",
+    "denmark": "Europe/Copenhagen", "dk": "Europe/Copenhagen",
+    "sweden": "Europe/Stockholm", "se": "Europe/Stockholm",
+    "poland": "Europe/Warsaw", "pl": "Europe/Warsaw",
+    "turkey": "Europe/Istanbul", "tr": "Europe/Istanbul",
+    "uae": "Asia/Dubai", "ae": "Asia/Dubai", "united arab emirates": "Asia/Dubai",
+    "india": "Asia/Kolkata", "in": "Asia/Kolkata",
+    "china": "Asia/Shanghai", "cn": "Asia/Shanghai",
+    "hong kong": "Asia/Hong_Kong", "hk": "Asia/Hong_Kong",
+    "taiwan": "Asia/Taipei", "tw": "Asia/Taipei",
+    "japan": "Asia/Tokyo", "jp": "Asia/Tokyo",
+    "south korea": "Asia/Seoul", "korea": "Asia/Seoul", "kr": "Asia/Seoul",
+    "singapore": "Asia/Singapore", "sg": "Asia/Singapore",
+    "vietnam": "Asia/Ho_Chi_Minh", "vn": "Asia/Ho_Chi_Minh",
+    "australia": "Australia/Sydney", "au": "Australia/Sydney",
+}
+
+# International dialing prefix -> IANA zone, longest prefix wins.
+CALLING_CODE_TIMEZONES = {
+    "1": "America/New_York",
+    "44": "Europe/London", "353": "Europe/Dublin", "49": "Europe/Berlin", "33": "Europe/Paris",
+    "34": "Europe/Madrid", "39": "Europe/Rome", "31": "Europe/Amsterdam", "45": "Europe/Copenhagen",
+    "46": "Europe/Stockholm", "48": "Europe/Warsaw", "90": "Europe/Istanbul", "971": "Asia/Dubai",
+    "91": "Asia/Kolkata", "86": "Asia/Shanghai", "852": "Asia/Hong_Kong", "886": "Asia/Taipei",
+    "81": "Asia/Tokyo", "82": "Asia/Seoul", "65": "Asia/Singapore", "84": "Asia/Ho_Chi_Minh",
+    "61": "Australia/Sydney", "52": "America/Mexico_City", "55": "America/Sao_Paulo",
+}
+
+
+def _parse_window(spec: str) -> Tuple[dtime, dtime]:
+    start, end = (part.strip() for part in spec.split("-", 1))
+    return dtime.fromisoformat(start), dtime.fromisoformat(end)
+
+
+def _zone(name: Optional[str]) -> Optional[ZoneInfo]:
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def supplier_timezone(supplier: dict) -> ZoneInfo:
+    """Best-effort local time zone for a supplier."""
+    zone = _zone(supplier.get("timezone"))
+    if zone:
+        return zone
+
+    country = (supplier.get("country") or "").strip().lower()
+    zone = _zone(COUNTRY_TIMEZONES.get(country))
+    if zone:
+        return zone
+
+    phone = (supplier.get("phone") or supplier.get("phone_number") or "").strip()
+    if phone.startswith("+"):
+        digits = re.sub(r"\D", "", phone)
+        for length in (3, 2, 1):
+            zone = _zone(CALLING_CODE_TIMEZONES.get(digits[:length]))
+            if zone:
+                return zone
+
+    return _zone(CALL_DEFAULT_TIMEZONE) or ZoneInfo("UTC")
+
+
+class BusinessHours:
+    """A weekly local-time calling window."""
+
+    def __init__(
+        self,
+        hours: str = CALL_WINDOW_HOURS,
+        days: str = CALL_WINDOW_DAYS,
+        min_remaining: timedelta = timedelta(minutes=CALL_WINDOW_MIN_REMAINING_MINUTES),
+    ):
+        self.start, self.end = _parse_window(hours)
+        self.days = {int(d) for d in days.split(",") if d.strip()}
+        self.min_remaining = min_remaining
+        if not self.days or self.start >= self.end:
+            raise ValueError(f"Invalid calling window '{hours}' on days '{days}'")
+
+    def next_window(self, zone: ZoneInfo, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+        """
+        The next moment a call may start in ``zone`` and when that window
+        closes, both in UTC. Returns ``now`` as the start when already inside.
+        """
+        now = (now or datetime.now(timezone.utc)).astimezone(zone)
+        for offset in range(8):
+            day = now.date() + timedelta(days=offset)
+            if day.isoweekday() not in self.days:
+                continue
+            opens = datetime.combine(day, self.start, tzinfo=zone)
+            closes = datetime.combine(day, self.end, tzinfo=zone)
+            start = max(opens, now)
+            if closes - start >= self.min_remaining:
+                return start.astimezone(timezone.utc), closes.astimezone(timezone.utc)
+        raise RuntimeError("No calling window within the next week")
+
+
+class CallCampaignScheduler:
+    """
+    Priority queue of supplier calls released when each supplier's local
+    business hours open. Within a release, suppliers whose window closes
+    soonest go first.
+    """
+
+    def __init__(
+        self,
+        dispatch: Callable[[List[dict]], Any],
+        business_hours: Optional[BusinessHours] = None,
+        capacity: Optional[Callable[[], int]] = None,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        on_quote: Optional[Callable[[dict], None]] = None,
+        path: str = CALL_SCHEDULE_PATH,
+        lease_secs: float = CALL_SCHEDULER_LEASE_SECS,
+        retention_secs: float = CALL_SCHEDULER_RETENTION_SECS,
+    ):
+        """
+        Args:
+            dispatch: Called with each batch of suppliers that became callable;
+                returns one result dict (with ``supplier_id``) per supplier
+            business_hours: Local calling window (defaults from the environment)
+            capacity: How many calls may be released right now; defaults to the
+                call admission controller's free conversation slots
+            clock: Current UTC time (overridable for testing)
+            on_quote: Called with each result of a released call
+            path: SQLite file holding the queue (shared by the host's workers)
+        """
+        self.dispatch = dispatch
+        self.business_hours = business_hours or BusinessHours()
+        self.capacity = capacity or _admission_capacity
+        self.clock = clock
+        self.on_quote = on_quote
+        self.path = path
+        self.lease_secs = lease_secs
+        self.retention_secs = retention_secs
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.released = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+        # Calls queued before a restart (or by another worker) still need releasing
+        if self._next_due() is not None:
+            self._ensure_thread()
+
+    def plan(self, supplier: dict) -> Dict[str, Any]:
+        """When and in which time zone ``supplier`` would be called."""
+        zone = supplier_timezone(supplier)
+        call_at, window_closes = self.business_hours.next_window(zone, self.clock())
+        return {
+            "supplier_id": supplier.get("id"),
+            "supplier_name": supplier.get("name"),
+            "timezone": zone.key,
+            "call_at": call_at.isoformat(),
+            "window_closes": window_closes.isoformat(),
+        }
+
+    def split(self, suppliers: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """Partition suppliers into (callable now, must wait for their window)."""
+        now, later = [], []
+        current = self.clock()
+        for supplier in suppliers:
+            call_at, _ = self.business_hours.next_window(supplier_timezone(supplier), current)
+            (now if call_at <= current else later).append(supplier)
+        return now, later
+
+    def schedule(self, suppliers: List[dict]) -> List[Dict[str, Any]]:
+        """Queue suppliers for release at their next window and start the release thread."""
+        plans = []
+        rows = []
+        for supplier in suppliers:
+            plan = self.plan(supplier)
+            plans.append(plan)
+            rows.append((
+                json.dumps(supplier),
+                datetime.fromisoformat(plan["call_at"]).timestamp(),
+                datetime.fromisoformat(plan["window_closes"]).timestamp(),
+            ))
+        if rows:
+            conn = self._conn()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO scheduled_calls (supplier, call_at, window_closes) VALUES (?, ?, ?)", rows
+                )
+            with self._cond:
+                self._cond.notify_all()
+            self._ensure_thread()
+        return plans
+
+    def release_due(self) -> List[Tuple[int, dict]]:
+        """
+        Claim suppliers whose window is open, up to current capacity, as
+        (row id, supplier). Suppliers whose window closed while waiting are
+        re-queued for the next one; releases never reported back are retried.
+        """
+        now = self.clock()
+        current = now.timestamp()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE scheduled_calls SET status = 'pending' WHERE status = 'released' AND released_at < ?",
+                (current - self.lease_secs,),
+            )
+            due = []
+            for row_id, supplier, window_closes in conn.execute(
+                "SELECT id, supplier, window_closes FROM scheduled_calls "
+                "WHERE status = 'pending' AND call_at <= ? ORDER BY window_closes, id",
+                (current,),
+            ).fetchall():
+                supplier = json.loads(supplier)
+                if window_closes - current < self.business_hours.min_remaining.total_seconds():
+                    call_at, closes = self.business_hours.next_window(supplier_timezone(supplier), now)
+                    conn.execute(
+                        "UPDATE scheduled_calls SET call_at = ?, window_closes = ? WHERE id = ?",
+                        (call_at.timestamp(), closes.timestamp(), row_id),
+                    )
+                    continue
+                due.append((row_id, supplier))
+
+            released = due[:max(0, self.capacity())]
+            conn.executemany(
+                "UPDATE scheduled_calls SET status = 'released', released_at = ? WHERE id = ?",
+                [(current, row_id) for row_id, _ in released],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.released += len(released)
+        return released
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Queued calls in release order."""
+        rows = self._conn().execute(
+            "SELECT supplier, call_at, window_closes FROM scheduled_calls "
+            "WHERE status = 'pending' ORDER BY call_at, window_closes, id"
+        ).fetchall()
+        entries = []
+        for supplier, call_at, window_closes in rows:
+            supplier = json.loads(supplier)
+            entries.append({
+                "supplier_id": supplier.get("id"),
+                "supplier_name": supplier.get("name"),
+                "call_at": datetime.fromtimestamp(call_at, timezone.utc).isoformat(),
+                "window_closes": datetime.fromtimestamp(window_closes, timezone.utc).isoformat(),
+            })
+        return entries
+
+    def results(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent dispatched calls with what the dispatch returned for each."""
+        rows = self._conn().execute(
+            "SELECT supplier, status, finished_at, result, last_error FROM scheduled_calls "
+            "WHERE status IN ('done', 'failed') ORDER BY finished_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [
+            {
+                "supplier_id": json.loads(supplier).get("id"),
+                "supplier_name": json.loads(supplier).get("name"),
+                "status": status,
+                "finished_at": datetime.fromtimestamp(finished_at, timezone.utc).isoformat(),
+                "result": json.loads(result) if result else None,
+                "error": last_error,
+            }
+            for supplier, status, finished_at, result, last_error in rows
+        ]
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _ensure_thread(self) -> None:
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="call-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = self.release_due()
+                if batch:
+                    print(f"⏰ Releasing {len(batch)} scheduled supplier call(s)")
+                    self._dispatch(batch)
+                self._prune()
+                next_due = self._next_due()
+            except sqlite3.Error as e:
+                print(f"⚠️ Call schedule error: {e}")
+                next_due = self.clock().timestamp() + CALL_SCHEDULER_POLL_SECS
+
+            with self._cond:
+                if self._stopped or next_due is None:
+                    self._thread = None
+                    return
+                wait = next_due - self.clock().timestamp()
+                self._cond.wait(min(max(wait, 1.0), CALL_SCHEDULER_POLL_SECS))
+
+    def _dispatch(self, batch: List[Tuple[int, dict]]) -> None:
+        """Dispatch a released batch and record each supplier's result on its row."""
+        try:
+            results = self.dispatch([supplier for _, supplier in batch]) or []
+        except Exception as e:
+            print(f"❌ Scheduled call dispatch failed: {e}")
+            self._record([(row_id, "failed", None, str(e)) for row_id, _ in batch])
+            return
+
+        # Results carry supplier_id; match each to the first unanswered row of that supplier
+        rows = list(batch)
+        outcomes = []
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            match = next((row for row in rows if row[1].get("id") == result.get("supplier_id")), None)
+            if match is None:
+                continue
+            rows.remove(match)
+            status = "failed" if result.get("status") == "error" else "done"
+            outcomes.append((match[0], status, result, result.get("error")))
+            if self.on_quote:
+                try:
+                    self.on_quote(result)
+                except Exception as e:
+                    print(f"❌ on_quote callback failed for {result.get('supplier_name')}: {e}")
+        outcomes += [(row_id, "failed", None, "No result returned by dispatch") for row_id, _ in rows]
+        self._record(outcomes)
+
+    def _record(self, outcomes: List[Tuple[int, str, Optional[dict], Optional[str]]]) -> None:
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "UPDATE scheduled_calls SET status = ?, finished_at = ?, result = ?, last_error = ? WHERE id = ?",
+                [
+                    (status, now, json.dumps(result, default=str) if result is not None else None, error, row_id)
+                    for row_id, status, result, error in outcomes
+                ],
+            )
+
+    def _next_due(self) -> Optional[float]:
+        """When the earliest queued call becomes due (or a release lease expires), or None if none are queued."""
+        row = self._conn().execute(
+            "SELECT MIN(CASE WHEN status = 'pending' THEN call_at ELSE released_at + ? END) "
+            "FROM scheduled_calls WHERE status IN ('pending', 'released')",
+            (self.lease_secs,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _prune(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "DELETE FROM scheduled_calls WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - self.retention_secs,),
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit mode with explicit transactions.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+def _admission_capacity() -> int:
+    stats = call_admission.stats()
+    return stats["max_concurrent_conversations"] - stats["in_flight_conversations"] - stats["queue_depth"]
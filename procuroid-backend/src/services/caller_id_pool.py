@@ -0,0 +1,143 @@
+"""
+Pool of Twilio caller IDs used for outbound supplier calls.
+
+Numbers come from TWILIO_FROM_NUMBERS (comma-separated), falling back to the
+single TWILIO_FROM_NUMBER. An entry may carry its ElevenLabs phone number id
+as ``+15551234567=phnum_abc`` so the ElevenLabs outbound API dials from it.
+
+The call admission controller asks the pool to pick among the numbers whose
+rate limit currently allows a call, so throughput grows with the pool size.
+In-flight counts come from the controller's shared lease table, so every
+worker balances against the calls placed by the others.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Mapping, Optional, Sequence
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CALLER_ID_STRATEGY = os.getenv("CALLER_ID_STRATEGY", "least_loaded")
+
+STRATEGIES = {"least_loaded", "round_robin"}
+
+# Window used for the per-number "calls in the last minute" figure.
+_RATE_WINDOW_SECS = 60.0
+
+
+def parse_caller_ids(raw: Optional[str]) -> Dict[str, Optional[str]]:
+    """Parse ``"+1555=phnum_a, +1666"`` into ``{"+1555": "phnum_a", "+1666": None}``."""
+    numbers: Dict[str, Optional[str]] = {}
+    for entry in (raw or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        number, _, phone_number_id = entry.partition("=")
+        numbers[number.strip()] = phone_number_id.strip() or None
+    return numbers
+
+
+class CallerIdPool:
+    """Selects a from-number per call and keeps per-number call accounting."""
+
+    def __init__(self, numbers: Dict[str, Optional[str]], strategy: str = CALLER_ID_STRATEGY):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown caller ID strategy '{strategy}'. Use one of {sorted(STRATEGIES)}")
+
+        self.strategy = strategy
+        self._phone_number_ids = dict(numbers)
+        self._lock = threading.Lock()
+        self._cursor = 0
+        self._placed: Dict[str, int] = {number: 0 for number in numbers}
+        self._recent: Dict[str, Deque[float]] = {number: deque() for number in numbers}
+
+    @classmethod
+    def from_env(cls) -> "CallerIdPool":
+        numbers = parse_caller_ids(os.getenv("TWILIO_FROM_NUMBERS"))
+        if not numbers and os.getenv("TWILIO_FROM_NUMBER"):
+            numbers = parse_caller_ids(os.getenv("TWILIO_FROM_NUMBER"))
+        return cls(numbers)
+
+    @property
+    def numbers(self) -> List[str]:
+        return list(self._phone_number_ids)
+
+    @property
+    def registered_numbers(self) -> List[str]:
+        """Numbers that carry an ElevenLabs phone number id, i.e. that ElevenLabs can dial from."""
+        return [number for number, phone_number_id in self._phone_number_ids.items() if phone_number_id]
+
+    def __contains__(self, number: object) -> bool:
+        return number in self._phone_number_ids
+
+    def phone_number_id(self, number: str) -> Optional[str]:
+        """ElevenLabs phone number id registered for ``number``, if any."""
+        return self._phone_number_ids.get(number)
+
+    def choose(self, candidates: Sequence[str], in_flight: Optional[Mapping[str, int]] = None) -> str:
+        """
+        Pick one of ``candidates`` (numbers whose rate limit allows a call now).
+
+        round_robin cycles through the pool in configured order; least_loaded
+        prefers the fewest in-flight calls (``in_flight``, by number), then the
+        fewest calls in the last minute.
+        """
+        in_flight = in_flight or {}
+        if not candidates:
+            raise ValueError("No candidate caller IDs to choose from")
+
+        with self._lock:
+            if self.strategy == "round_robin":
+                order = self.numbers
+                for offset in range(len(order)):
+                    number = order[(self._cursor + offset) % len(order)]
+                    if number in candidates:
+                        self._cursor = (order.index(number) + 1) % len(order)
+                        return number
+                return candidates[0]
+
+            now = time.monotonic()
+            return min(
+                candidates,
+                key=lambda number: (in_flight.get(number, 0), self._recent_count(number, now)),
+            )
+
+    def record_start(self, number: str) -> None:
+        with self._lock:
+            if number not in self._phone_number_ids:
+                return
+            self._placed[number] += 1
+            self._recent[number].append(time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "strategy": self.strategy,
+                "numbers": {
+                    number: {
+                        "placed_total": self._placed[number],
+                        "calls_last_minute": self._recent_count(number, now),
+                        "elevenlabs_phone_number_id": self._phone_number_ids[number],
+                    }
+                    for number in self._phone_number_ids
+                },
+            }
+
+    def _recent_count(self, number: str, now: float) -> int:
+        recent = self._recent.get(number)
+        if recent is None:
+            return 0
+        while recent and now - recent[0] > _RATE_WINDOW_SECS:
+            recent.popleft()
+        return len(recent)
+
+
+# Shared pool used by every outbound call path in this process.
+caller_id_pool = CallerIdPool.from_env()
@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 from supabase import create_client, Client
 from typing import Optional, Dict, List, Any
 
+from .call_admission import call_admission
+
 # Load environment variables
 load_dotenv()
 
@@ -328,15 +330,26 @@ def call_quotation_agent(procurement_jobs: List[Dict[str, Any]]) -> dict:
                     "webhook_url": webhook_url  # URL where ElevenLabs will POST the output_result
                 }
                 
-                # Call ElevenLabs Quotation Agent API
-                response = requests.post(
-                    quotation_agent_url,
-                    json=agent_payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {os.getenv('ELEVENLABS_API_KEY', '')}"
-                    },
-                    timeout=300  # 5 minute timeout for long-running calls
+                def _dial(_from_number):
+                    response = requests.post(
+                        quotation_agent_url,
+                        json=agent_payload,
+                        headers={
+                            "Content-Type": "application/json",
+                            "Authorization": f"Bearer {os.getenv('ELEVENLABS_API_KEY', '')}"
+                        },
+                        timeout=300  # 5 minute timeout for long-running calls
+                    )
+                    if response.status_code == 429:
+                        response.raise_for_status()
+                    return response
+
+                # Call ElevenLabs Quotation Agent API once admitted; the conversation
+                # slot is released when the agent posts back to /quotation-agent/webhook
+                response = call_admission.place_call(
+                    _dial,
+                    from_number=os.getenv("TWILIO_FROM_NUMBER"),
+                    call_ids=lambda _: (job_id,),
                 )
                 
                 if response.status_code == 200 or response.status_code == 202:
@@ -361,6 +374,7 @@ def call_quotation_agent(procurement_jobs: List[Dict[str, Any]]) -> dict:
                         "message": "Quotation agent processing"
                     })
                 else:
+                    call_admission.complete(job_id)
                     errors.append({
                         "job_id": job_id,
                         "error": f"Agent API returned status {response.status_code}: {response.text}"
@@ -965,6 +979,53 @@ def get_orders(user_id: str, status: Optional[str] = None) -> dict:
         return {"success": False, "error": str(e)}
 
 
+def get_call_turns(
+    call_id: str,
+    after_seq: Optional[int] = None,
+    limit: int = 50,
+    last: Optional[int] = None,
+) -> dict:
+    """
+    Page through the turns of a supplier call without loading its transcript.
+    
+    Args:
+        call_id: The call's conversation id (supplier_calls.call_id)
+        after_seq: Return turns after this seq (keyset pagination)
+        limit: Number of turns per page (default 50, max 500)
+        last: If given, return only the last N turns instead
+        
+    Returns:
+        dict: Response with turns in call order and the cursor for the next page
+    """
+    try:
+        if not supabase_admin:
+            return {"success": False, "error": "Supabase admin client not initialized"}
+        
+        columns = "seq, speaker, text, start_offset, end_offset"
+        query = supabase_admin.table("supplier_call_turns").select(columns).eq("call_id", call_id)
+        
+        if last is not None:
+            # Newest first from the (call_id, seq) index, then back to call order
+            response = query.order("seq", desc=True).limit(min(max(1, last), 500)).execute()
+            turns = list(reversed(response.data or []))
+            return {"success": True, "turns": turns, "next_after_seq": None}
+        
+        limit = min(max(1, limit), 500)
+        if after_seq is not None:
+            query = query.gt("seq", after_seq)
+        response = query.order("seq").limit(limit).execute()
+        turns = response.data or []
+        
+        return {
+            "success": True,
+            "turns": turns,
+            "next_after_seq": turns[-1]["seq"] if len(turns) == limit else None,
+        }
+    except Exception as e:
+        print(f"Get call turns error: {e}")
+        return {"success": False, "error": str(e)}
+
+
 def get_quotations(user_id: str, status: Optional[str] = None) -> dict:
     """
     Get quotations for a user, optionally filtered by status.
@@ -10,12 +10,17 @@ from urllib.parse import urlencode
 from dotenv import load_dotenv
 from twilio.rest import Client
 
+from .call_admission import CallAdmissionTimeout, call_admission
+from .caller_id_pool import caller_id_pool
+from .twilio_client import get_twilio_client
+
 load_dotenv()
 
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_FROM_NUMBER = os.getenv("TWILIO_FROM_NUMBER") or "+13262223398"
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+# Overridable to point calls at a local stand-in (see tests/telephony_standin.py)
+ELEVENLABS_API_BASE_URL = os.getenv("ELEVENLABS_API_BASE_URL", "https://api.elevenlabs.io").rstrip("/")
 ELEVENLABS_TWILIO_ENDPOINT = os.getenv(
     "ELEVENLABS_TWILIO_ENDPOINT",
     "https://api.us.elevenlabs.io/twilio/inbound_call",
@@ -32,7 +37,14 @@ def _build_twilio_client() -> Client:
             "Twilio credentials are not configured. Set TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN."
         )
 
-    return Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    return get_twilio_client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+
+
+def _require_caller_ids() -> None:
+    if not caller_id_pool.numbers:
+        raise ElevenLabsCallError(
+            "No caller IDs configured. Set TWILIO_FROM_NUMBERS or TWILIO_FROM_NUMBER."
+        )
 
 
 def _build_inbound_url(metadata: Optional[Dict[str, Any]]) -> str:
@@ -59,8 +71,7 @@ def initiate_elevenlabs_call(
     if not to:
         raise ElevenLabsCallError("Destination phone number ('to') is required.")
 
-    if not TWILIO_FROM_NUMBER:
-        raise ElevenLabsCallError("TWILIO_FROM_NUMBER environment variable is not set.")
+    _require_caller_ids()
 
     twilio_client = _build_twilio_client()
 
@@ -76,11 +87,16 @@ def initiate_elevenlabs_call(
     target_url = _build_inbound_url(merged_metadata)
 
     try:
-        twilio_call = twilio_client.calls.create(
-            to=to,
-            from_=TWILIO_FROM_NUMBER,
-            url=target_url,
+        twilio_call = call_admission.place_call(
+            lambda from_number: twilio_client.calls.create(
+                to=to,
+                from_=from_number,
+                url=target_url,
+            ),
+            call_ids=lambda call: (call.sid,),
         )
+    except CallAdmissionTimeout:
+        raise
     except Exception as exc:  # noqa: BLE001
         raise ElevenLabsCallError(f"Failed to initiate ElevenLabs call via Twilio: {exc}") from exc
 
@@ -88,7 +104,7 @@ def initiate_elevenlabs_call(
         "sid": twilio_call.sid,
         "status": twilio_call.status,
         "to": twilio_call.to,
-        "from": TWILIO_FROM_NUMBER,
+        "from": twilio_call._from,
         "uri": twilio_call.uri,
     }
 
@@ -119,8 +135,7 @@ def initiate_elevenlabs_call_with_twiml(
     if not agent_id:
         raise ElevenLabsCallError("agent_id is required for ElevenLabs calls.")
 
-    if not TWILIO_FROM_NUMBER:
-        raise ElevenLabsCallError("TWILIO_FROM_NUMBER environment variable is not set.")
+    _require_caller_ids()
 
     twilio_client = _build_twilio_client()
 
@@ -133,11 +148,16 @@ def initiate_elevenlabs_call_with_twiml(
     twiml_url = f"{twiml_endpoint_base}/twiml/elevenlabs?{query}"
 
     try:
-        twilio_call = twilio_client.calls.create(
-            to=to,
-            from_=TWILIO_FROM_NUMBER,
-            url=twiml_url,
+        twilio_call = call_admission.place_call(
+            lambda from_number: twilio_client.calls.create(
+                to=to,
+                from_=from_number,
+                url=twiml_url,
+            ),
+            call_ids=lambda call: (call.sid,),
         )
+    except CallAdmissionTimeout:
+        raise
     except Exception as exc:  # noqa: BLE001
         raise ElevenLabsCallError(f"Failed to initiate call via Twilio: {exc}") from exc
 
@@ -145,7 +165,7 @@ def initiate_elevenlabs_call_with_twiml(
         "sid": twilio_call.sid,
         "status": twilio_call.status,
         "to": twilio_call.to,
-        "from": TWILIO_FROM_NUMBER,
+        "from": twilio_call._from,
         "uri": twilio_call.uri,
         "twiml_url": twiml_url,
     }
@@ -167,7 +187,7 @@ def initiate_elevenlabs_call_via_api(
     Args:
         to: Destination phone number (E.164 format, e.g., +14709299380)
         agent_id: ElevenLabs agent ID (required)
-        from_number: Twilio number connected in ElevenLabs (defaults to TWILIO_FROM_NUMBER)
+        from_number: Twilio number connected in ElevenLabs (defaults to the caller ID pool)
         metadata: Optional metadata to pass to the agent during the call
     
     Returns:
@@ -185,13 +205,12 @@ def initiate_elevenlabs_call_via_api(
     if not agent_id:
         raise ElevenLabsCallError("agent_id is required")
     
-    # Use provided from_number or fall back to TWILIO_FROM_NUMBER
-    from_num = from_number or TWILIO_FROM_NUMBER
-    if not from_num:
-        raise ElevenLabsCallError("from_number or TWILIO_FROM_NUMBER environment variable must be set")
+    # Use provided from_number or let the caller ID pool pick one
+    if not from_number:
+        _require_caller_ids()
     
     # ElevenLabs Conversational AI outbound call endpoint
-    url = "https://api.elevenlabs.io/v1/convai/conversation/outbound_call"
+    url = f"{ELEVENLABS_API_BASE_URL}/v1/convai/conversation/outbound_call"
     
     headers = {
         "xi-api-key": ELEVENLABS_API_KEY,
@@ -207,11 +226,28 @@ def initiate_elevenlabs_call_via_api(
     if metadata:
         payload["metadata"] = metadata
     
-    try:
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+    def _dial(from_num: Optional[str]):
+        body = dict(payload)
+        # Dial from the chosen number when it is registered in ElevenLabs
+        phone_number_id = caller_id_pool.phone_number_id(from_num) if from_num else None
+        if phone_number_id:
+            body["agent_phone_number_id"] = phone_number_id
+
+        response = requests.post(url, headers=headers, json=body, timeout=30)
         response.raise_for_status()
-        
-        result = response.json()
+        return from_num, response.json()
+
+    try:
+        # Queued behind the per-number rate limit and the global conversation cap;
+        # ElevenLabs 429s are re-queued rather than reported as failures.
+        # ElevenLabs can only dial from pool numbers registered with a phone number id;
+        # without any, the call goes out on the agent's own number (the default key).
+        from_num, result = call_admission.place_call(
+            _dial,
+            from_number=from_number,
+            call_ids=lambda r: (r[1].get("conversation_id"), r[1].get("callSid"), r[1].get("call_id")),
+            pool_numbers=caller_id_pool.registered_numbers,
+        )
         
         return {
             "success": True,
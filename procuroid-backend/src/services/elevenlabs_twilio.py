@@ -6,10 +6,14 @@ This module handles making automated calls using Twilio that connect to ElevenLa
 import os
 from typing import Dict, Any, Optional
 from urllib.parse import urlencode
-from twilio.rest import Client
-from twilio.twiml.voice_response import VoiceResponse, Connect
 from dotenv import load_dotenv
 
+from . import twiml
+from .call_admission import call_admission
+from .caller_id_pool import caller_id_pool
+from .signed_url_pool import signed_url_pool
+from .twilio_client import get_twilio_client
+
 load_dotenv()
 
 
@@ -31,7 +35,7 @@ def initiate_call(
         to_number: Phone number to call (E.164 format, e.g. +14155551234)
         agent_id: ElevenLabs agent ID
         metadata: Optional metadata to pass to the agent
-        from_number: Optional Twilio number to use (defaults to env var)
+        from_number: Optional Twilio number to use (defaults to the caller ID pool)
         
     Returns:
         Dict with call information including call SID and status
@@ -42,7 +46,6 @@ def initiate_call(
     # Get Twilio credentials
     account_sid = os.getenv("TWILIO_ACCOUNT_SID")
     auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-    twilio_number = from_number or os.getenv("TWILIO_FROM_NUMBER")
     
     # Get backend webhook URL (where this app is hosted)
     webhook_base_url = os.getenv("WEBHOOK_BASE_URL", "http://localhost:8080")
@@ -50,8 +53,8 @@ def initiate_call(
     # Validate
     if not account_sid or not auth_token:
         raise CallError("Missing Twilio credentials (TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)")
-    if not twilio_number:
-        raise CallError("Missing TWILIO_FROM_NUMBER")
+    if not from_number and not caller_id_pool.numbers:
+        raise CallError("Missing TWILIO_FROM_NUMBERS / TWILIO_FROM_NUMBER")
     if not to_number:
         raise CallError("Destination phone number required")
     if not agent_id:
@@ -69,19 +72,26 @@ def initiate_call(
             if value is not None:
                 webhook_params[f"meta_{key}"] = str(value)
     
-    webhook_url = f"{webhook_base_url}/elevenlabs/twiml?{urlencode(webhook_params)}"
+    webhook_url = f"{webhook_base_url}/twiml/elevenlabs-connect?{urlencode(webhook_params)}"
+    
+    # Make sure a signed URL is waiting for this agent by the time the call is answered
+    signed_url_pool.warm(agent_id)
     
     # Initiate call via Twilio
     try:
-        client = Client(account_sid, auth_token)
-        call = client.calls.create(
-            to=to_number,
-            from_=twilio_number,
-            url=webhook_url,
-            method="POST",
-            status_callback=f"{webhook_base_url}/elevenlabs/call-status",
-            status_callback_event=["initiated", "ringing", "answered", "completed"],
-            status_callback_method="POST"
+        client = get_twilio_client(account_sid, auth_token)
+        call = call_admission.place_call(
+            lambda twilio_number: client.calls.create(
+                to=to_number,
+                from_=twilio_number,
+                url=webhook_url,
+                method="POST",
+                status_callback=f"{webhook_base_url}/elevenlabs/call-status",
+                status_callback_event=["initiated", "ringing", "answered", "completed"],
+                status_callback_method="POST"
+            ),
+            from_number=from_number,
+            call_ids=lambda c: (c.sid,),
         )
         
         return {
@@ -89,7 +99,7 @@ def initiate_call(
             "call_sid": call.sid,
             "status": call.status,
             "to": to_number,
-            "from": twilio_number,
+            "from": call._from,
             "agent_id": agent_id,
             "webhook_url": webhook_url
         }
@@ -109,20 +119,11 @@ def generate_twiml(agent_id: str, metadata: Optional[Dict[str, Any]] = None) ->
     Returns:
         TwiML XML string
     """
-    response = VoiceResponse()
-    
     # Build ElevenLabs endpoint URL with agent_id and metadata
     elevenlabs_params = {"agent_id": agent_id}
     
     if metadata:
         elevenlabs_params.update(metadata)
     
-    # ElevenLabs WebSocket endpoint for Twilio
-    elevenlabs_url = f"wss://api.elevenlabs.io/v1/convai/conversation?{urlencode(elevenlabs_params)}"
-    
-    # Connect to ElevenLabs via Stream
-    connect = Connect()
-    connect.stream(url=elevenlabs_url)
-    response.append(connect)
-    
-    return str(response)
+    # Connect to the ElevenLabs WebSocket endpoint for Twilio via Stream
+    return twiml.connect_stream("wss://api.elevenlabs.io/v1/convai/conversation", query=elevenlabs_params)
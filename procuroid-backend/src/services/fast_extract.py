@@ -0,0 +1,253 @@
+"""
+Rule-based fast path for call conclusion extraction.
+
+Most call summaries state the price, MOQ, payment and delivery terms in
+formulaic language ("quoted $4.20 per unit with an MOQ of 500 units, Net 30,
+FOB Shanghai"). These rules pull such fields out in microseconds and attach a
+confidence to each, so the LLM is only asked about fields the rules could
+not settle. A field is skipped (left to the LLM) rather than guessed whenever
+the summary is ambiguous, e.g. quotes two different prices, a tiered price,
+or says no quote was given.
+
+The outcome fields (call_success, decision_reason, important_notes) need
+judgement a regex cannot give ("declined to share pricing but is willing to
+supply", "can't supply until March") and are always left to the LLM.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Fields extracted with at least this confidence are not sent to the LLM
+FAST_EXTRACT_MIN_CONFIDENCE = float(os.getenv("FAST_EXTRACT_MIN_CONFIDENCE", "0.8"))
+# Set to 0 to always use the LLM for every field
+FAST_EXTRACT_ENABLED = os.getenv("FAST_EXTRACT_ENABLED", "1") not in ("0", "false", "False")
+
+Field = Tuple[Any, float]  # (value, confidence)
+
+_SENTENCE = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9\"'(])|\n+")
+
+_AMOUNT = r"\d{1,3}(?:,\d{3})*(?:\.\d+)?|\d+(?:\.\d+)?"
+_PRICE = re.compile(
+    rf"(?:(?P<sym>[$€£₹¥])\s?(?P<amount>{_AMOUNT})"
+    rf"|(?P<amount2>{_AMOUNT})\s?(?P<code>USD|EUR|GBP|INR|CNY|AUD|CAD|dollars|euros|pounds|rupees)\b)"
+    r"(?P<unit>\s*(?:per|/|a|an|each|for each)\s*(?:unit|piece|pc|pcs|item|kg|kilo|kilogram|lb|pound|ton|tonne|"
+    r"meter|metre|m|litre|liter|box|carton|pack|dozen|set|pair)s?\b|\s+each\b)?",
+    re.IGNORECASE,
+)
+# An amount only counts as the quoted price with one of these words shortly before it ...
+_PRICE_WORD = re.compile(r"\b(?:quot\w*|pric\w*|offer\w*|rate|charg\w*|costs?|at)\b[^.;$€£₹¥\d]{0,25}$", re.IGNORECASE)
+# ... and not when it is for something other than the goods, or only applies to some orders
+_OTHER_COST = re.compile(
+    r"\b(?:shipping|freight|delivery|courier|postage|setup|set-up|tooling|mou?ld|sample|customs|dut(?:y|ies)|"
+    r"tax(?:es)?|deposit|handling|surcharge|fee|insurance)\b[^.;]{0,25}$",
+    re.IGNORECASE,
+)
+_TIER = re.compile(
+    r"^[^.;]{0,40}?\b(?:for (?:orders?|quantities|volumes?)|orders? (?:under|over|above|below|of)|"
+    r"(?:under|over|above|below|up to|more than|less than|at least) \d|if |otherwise|tier|volume|discount)",
+    re.IGNORECASE,
+)
+_NO_QUOTE = re.compile(
+    r"\b(?:(?:did not|didn't|does not|doesn't|would not|wouldn't|could not|couldn't|will not|won't|unable to|"
+    r"not able to|declined to|refused to)\s+(?:provide|give|share|offer|quote|disclose|confirm)\b[^.;]{0,30}?"
+    r"\b(?:quot\w*|pric\w*|rates?|costs?|figures?|numbers?)|\bno (?:quote|price|pricing)\b|"
+    r"\b(?:quote|price|pricing) (?:is|was) (?:not|to be) (?:given|provided|confirmed|shared))",
+    re.IGNORECASE,
+)
+
+_MOQ = re.compile(
+    r"\b(?:MOQ|minimum order(?: quantity)?|minimum (?:purchase|quantity|batch)|minimum of)\b"
+    r"(?:\s+(?:is|was|of|at|would be|will be))*[\s:]*(?:at least\s+)?"
+    r"(?P<qty>\d{1,3}(?:,\d{3})+|\d+)\s*(?P<unit>units?|pieces?|pcs|items?|kg|kilograms?|tons?|tonnes?|"
+    r"boxes|cartons?|packs?|pallets?|sets?|pairs?|meters?|metres?|litres?|liters?)?",
+    re.IGNORECASE,
+)
+
+_NET_TERMS = re.compile(r"\bnet[\s-]?(?P<days>\d{1,3})\b", re.IGNORECASE)
+_SPLIT_TERMS = re.compile(
+    r"\b(?P<pct>\d{1,3})\s?%\s*(?:upfront|up front|advance|in advance|deposit|down payment)"
+    r"(?:[^.;]*?\b(?P<rest>\d{1,3})\s?%\s*(?:on|upon|before|after|at)\s+(?P<when>delivery|shipment|dispatch|receipt))?",
+    re.IGNORECASE,
+)
+_NAMED_TERMS = [
+    (re.compile(r"\b(?:cash on delivery|COD)\b"), "Cash on delivery"),
+    (re.compile(r"\b(?:letter of credit|L/C|LC at sight)\b", re.IGNORECASE), "Letter of credit"),
+    (re.compile(r"\b(?:full payment in advance|100\s?% (?:advance|upfront|in advance)|prepayment|pre-payment)\b",
+                re.IGNORECASE), "100% payment in advance"),
+]
+
+_INCOTERM = re.compile(
+    r"\b(?P<term>EXW|FCA|FAS|FOB|CFR|CIF|CPT|CIP|DAP|DPU|DDP)\b"
+    r"(?:\s+(?P<place>[A-Z][a-zA-Z]+(?:\s[A-Z][a-zA-Z]+)?))?"
+)
+_LEAD_TIME = re.compile(
+    r"\b(?:deliver\w*|ship\w*|dispatch\w*|lead time|turnaround)\b[^.;]{0,40}?"
+    r"\b(?P<prep>within|in|of|takes?)\s+(?P<span>\d+(?:\s*(?:-|to)\s*\d+)?)\s*(?P<kind>business |working )?"
+    r"(?P<unit>days?|weeks?|months?)\b",
+    re.IGNORECASE,
+)
+
+_MEETING_NO = re.compile(
+    r"\b(?:no meeting|(?:did not|didn't|does not|doesn't|not) (?:request|ask for|want|need|require) (?:a |any )?"
+    r"(?:meeting|follow-up call|call back))\b",
+    re.IGNORECASE,
+)
+_MEETING_YES = re.compile(
+    r"\b(?:request(?:ed|s)? (?:a |an )?(?:meeting|follow-up (?:call|meeting)|site visit|visit)|"
+    r"(?:would like|wants?|wanted|asked|keen) to (?:meet|schedule (?:a |an )?(?:meeting|call))|"
+    r"asked for (?:a |an )?(?:meeting|follow-up call)|proposed (?:a |an )?meeting)\b",
+    re.IGNORECASE,
+)
+_MEETING_TIME = re.compile(
+    r"\b(?:(?:next |this )?(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+    r"(?:\s+(?:morning|afternoon|evening))?(?:\s+at\s+\d{1,2}(?::\d{2})?\s*(?:am|pm)?)?|"
+    r"(?:tomorrow|next week|later this week|early next week)(?:\s+(?:morning|afternoon|evening))?|"
+    r"\d{1,2}(?::\d{2})?\s*(?:am|pm))\b",
+    re.IGNORECASE,
+)
+
+def fast_extract(summary: str) -> Dict[str, Field]:
+    """
+    Fields the rules could extract from ``summary``, as (value, confidence).
+    Fields not present were not found or were ambiguous.
+    """
+    if not summary or not FAST_EXTRACT_ENABLED:
+        return {}
+
+    sentences = [s.strip() for s in _SENTENCE.split(summary) if s and s.strip()]
+    fields: Dict[str, Field] = {}
+
+    price = _price(sentences)
+    if price:
+        fields["quoted_price"] = price
+
+    moq = _unique(sentences, _MOQ, _moq_value)
+    if moq:
+        fields["moq"] = (moq[0], 0.9)
+
+    payment = _payment_terms(sentences)
+    if payment:
+        fields["payment_terms"] = payment
+
+    delivery = _delivery_terms(sentences)
+    if delivery:
+        fields["terms_of_delivery"] = delivery
+
+    meeting_no = _hits(sentences, _MEETING_NO)
+    meeting_yes = [i for i in _hits(sentences, _MEETING_YES) if i not in meeting_no]
+    if meeting_no and not meeting_yes:
+        fields["meeting_requested"] = (False, 0.85)
+        fields["meeting_preferred_time"] = (None, 0.85)
+    elif meeting_yes and not meeting_no:
+        fields["meeting_requested"] = (True, 0.85)
+        times = {m.group(0).strip() for i in meeting_yes for m in _MEETING_TIME.finditer(sentences[i])}
+        if len(times) == 1:
+            fields["meeting_preferred_time"] = (next(iter(times)), 0.8)
+    return fields
+
+
+def resolved_fields(extracted: Dict[str, Field], min_confidence: float = FAST_EXTRACT_MIN_CONFIDENCE) -> Dict[str, Any]:
+    """The values of fields extracted with at least ``min_confidence``."""
+    return {name: value for name, (value, confidence) in extracted.items() if confidence >= min_confidence}
+
+
+def _hits(sentences: List[str], pattern: re.Pattern) -> List[int]:
+    return [i for i, sentence in enumerate(sentences) if pattern.search(sentence)]
+
+
+def _unique(sentences: List[str], pattern: re.Pattern, value) -> Optional[Tuple[str, List[int]]]:
+    """The single distinct value ``pattern`` yields across the summary, if exactly one."""
+    values: Dict[str, List[int]] = {}
+    for i, sentence in enumerate(sentences):
+        for match in pattern.finditer(sentence):
+            values.setdefault(value(match), []).append(i)
+    if len(values) != 1:
+        return None
+    (only, hits), = values.items()
+    return only, hits
+
+
+def _moq_value(match: re.Match) -> str:
+    unit = (match.group("unit") or "units").lower()
+    return f"{match.group('qty')} {unit}"
+
+
+def _price(sentences: List[str]) -> Optional[Field]:
+    """
+    The one amount the summary quotes for the goods. Every amount must have a
+    price word just before it; a summary saying no quote was given, an amount
+    for shipping/tooling/etc. or a tiered price leaves the field to the LLM.
+    """
+    if any(_NO_QUOTE.search(sentence) for sentence in sentences):
+        return None
+
+    per_unit: Set[str] = set()
+    other: Set[str] = set()
+    for sentence in sentences:
+        for match in _PRICE.finditer(sentence):
+            before = sentence[:match.start()]
+            if not _PRICE_WORD.search(before) or _OTHER_COST.search(before):
+                continue
+            if _TIER.search(sentence[match.end():]):
+                return None
+            amount = match.group("amount") or match.group("amount2")
+            currency = match.group("sym") or match.group("code")
+            if match.group("unit"):
+                per_unit.add(re.sub(r"\s+", " ", match.group(0)).strip())
+            else:
+                other.add(f"{currency}{amount}")
+
+    if len(per_unit) == 1 and not other:
+        return next(iter(per_unit)), 0.9
+    if not per_unit and len(other) == 1:
+        return next(iter(other)), 0.8
+    return None
+
+
+def _payment_terms(sentences: List[str]) -> Optional[Field]:
+    terms: Dict[str, List[int]] = {}
+    for i, sentence in enumerate(sentences):
+        for match in _NET_TERMS.finditer(sentence):
+            terms.setdefault(f"Net {int(match.group('days'))}", []).append(i)
+        for match in _SPLIT_TERMS.finditer(sentence):
+            if match.group("pct") == "100":
+                continue
+            value = f"{match.group('pct')}% advance"
+            if match.group("rest"):
+                value += f", {match.group('rest')}% on {match.group('when').lower()}"
+            terms.setdefault(value, []).append(i)
+        for pattern, value in _NAMED_TERMS:
+            if pattern.search(sentence):
+                terms.setdefault(value, []).append(i)
+    if len(terms) != 1:
+        return None
+    return next(iter(terms)), 0.9
+
+
+def _delivery_terms(sentences: List[str]) -> Optional[Field]:
+    incoterm = _unique(
+        sentences,
+        _INCOTERM,
+        lambda m: f"{m.group('term')} {m.group('place')}" if m.group("place") else m.group("term"),
+    )
+    lead_time = _unique(
+        sentences,
+        _LEAD_TIME,
+        lambda m: "delivery {} {} {}{}".format(
+            "within" if m.group("prep").lower() in ("within", "in") else "in",
+            re.sub(r"\s*(?:-|to)\s*", "-", m.group("span")),
+            (m.group("kind") or "").lower(),
+            m.group("unit").lower(),
+        ),
+    )
+    parts = [found for found in (incoterm, lead_time) if found]
+    if not parts:
+        return None
+    return "; ".join(value for value, _ in parts), 0.85
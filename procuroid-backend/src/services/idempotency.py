@@ -0,0 +1,90 @@
+"""
+Idempotency store for webhook deliveries.
+
+ElevenLabs retries post-call webhooks it did not see acknowledged in time, and
+each retry would otherwise re-run LLM extraction and rewrite supplier_calls.
+The first response to a delivery is remembered under an idempotency key for
+IDEMPOTENCY_TTL_SECS and replayed for any repeat of that key. Entries live in
+the Supabase ``idempotency_keys`` table (see
+database_migrations/create_idempotency_keys.sql), so a retry is recognised
+whichever instance it lands on.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .database import supabase_admin
+
+load_dotenv()
+
+IDEMPOTENCY_TTL_SECS = float(os.getenv("IDEMPOTENCY_TTL_SECS", str(24 * 3600)))
+
+_TABLE = "idempotency_keys"
+_PRUNE_INTERVAL_SECS = 60.0
+
+
+class IdempotencyStore:
+    """Remembers the first response for each idempotency key until it expires."""
+
+    def __init__(self, client: Any = None, ttl_secs: float = IDEMPOTENCY_TTL_SECS):
+        self.client = client if client is not None else supabase_admin
+        self.ttl_secs = ttl_secs
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """The stored ``(response, status)`` for ``key``, or None if unseen or expired."""
+        rows = self._table().select("response, status").eq("key", key).gt("expires_at", _now()).limit(1).execute().data
+        with self._lock:
+            if not rows:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return rows[0]["response"], rows[0]["status"]
+
+    def put(self, key: str, response: Dict[str, Any], status: int = 200) -> bool:
+        """
+        Remember ``response`` for ``key``. The first writer wins: returns False
+        if a live entry for ``key`` already exists.
+        """
+        self._table()  # fails early without a client
+        stored = self.client.rpc(
+            "put_idempotency_key",
+            {"p_key": key, "p_response": response, "p_status": status, "p_ttl_secs": self.ttl_secs},
+        ).execute()
+        self._maybe_prune(time.time())
+        return bool(stored.data)
+
+    def stats(self) -> Dict[str, Any]:
+        live = self._table().select("key", count="exact", head=True).gt("expires_at", _now()).execute().count or 0
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": live, "ttl_secs": self.ttl_secs}
+
+    def _maybe_prune(self, now: float) -> None:
+        with self._lock:
+            if now - self._last_prune < _PRUNE_INTERVAL_SECS:
+                return
+            self._last_prune = now
+        self._table().delete().lte("expires_at", _now()).execute()
+
+    def _table(self):
+        if self.client is None:
+            raise RuntimeError("Supabase admin client not configured; cannot use the idempotency store")
+        return self.client.table(_TABLE)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# Shared by the webhook endpoints; keys are namespaced per webhook by the caller.
+webhook_idempotency = IdempotencyStore()
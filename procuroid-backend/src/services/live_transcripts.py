@@ -0,0 +1,372 @@
+"""
+In-call transcript ingestion with rolling conclusion extraction.
+
+Turns posted while a call is in progress are appended to a SQLite store
+(shared by the gunicorn workers on the host), and a background extraction
+folds each batch of new turns into the conclusion extracted so far, so the
+LLM only ever sees turns it has not seen before. When the post-call webhook
+arrives, ``conclude`` returns that running conclusion after extracting any
+remaining turns, instead of running extraction over the whole call. Live and
+post-call turns are matched on their text, not their position, and a call
+whose transcripts disagree falls back to full extraction.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .llm import extract_incremental_conclusion
+
+load_dotenv()
+
+LIVE_TRANSCRIPT_PATH = os.getenv(
+    "LIVE_TRANSCRIPT_PATH", os.path.join(tempfile.gettempdir(), "procuroid-live-transcripts.sqlite3")
+)
+# Run a rolling extraction once this many unextracted turns have arrived.
+LIVE_EXTRACTION_MIN_TURNS = int(os.getenv("LIVE_EXTRACTION_MIN_TURNS", "4"))
+LIVE_EXTRACTION_WORKERS = int(os.getenv("LIVE_EXTRACTION_WORKERS", "2"))
+# Seconds a process may hold a call's extraction before another may take over.
+LIVE_EXTRACTION_LEASE_SECS = float(os.getenv("LIVE_EXTRACTION_LEASE_SECS", "120"))
+# Calls not updated for this long are dropped (post-call webhook never came).
+LIVE_TRANSCRIPT_RETENTION_SECS = float(os.getenv("LIVE_TRANSCRIPT_RETENTION_SECS", str(6 * 3600)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS live_calls (
+    conversation_id TEXT PRIMARY KEY,
+    conclusion TEXT,
+    extracted_turns INTEGER NOT NULL DEFAULT 0,
+    leased_until REAL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS live_turns (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    speaker TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+);
+"""
+
+_SPEAKERS = {"agent": "Agent", "user": "User"}
+
+
+class LiveTranscripts:
+    """Store of in-progress call transcripts and their running conclusions."""
+
+    def __init__(
+        self,
+        path: str = LIVE_TRANSCRIPT_PATH,
+        min_turns: int = LIVE_EXTRACTION_MIN_TURNS,
+        workers: int = LIVE_EXTRACTION_WORKERS,
+        lease_secs: float = LIVE_EXTRACTION_LEASE_SECS,
+        retention_secs: float = LIVE_TRANSCRIPT_RETENTION_SECS,
+    ):
+        self.path = path
+        self.min_turns = min_turns
+        self.lease_secs = lease_secs
+        self.retention_secs = retention_secs
+        self._local = threading.local()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="live-extraction"
+        )
+        self._lock = threading.Lock()
+        self._pending: set = set()
+        self._last_prune = 0.0
+        self.extractions = 0
+        self.turns_extracted = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    # ------------------------------------------------------------------ #
+    # During the call
+    # ------------------------------------------------------------------ #
+
+    def append(self, conversation_id: str, turns: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Append agent/user turns to a call. A turn with a ``seq`` is stored at
+        that position (so re-sent events are ignored); others are appended
+        after the last stored turn. Schedules a rolling extraction once enough
+        new turns have accumulated.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO live_calls (conversation_id, updated_at) VALUES (?, ?) "
+                "ON CONFLICT (conversation_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (conversation_id, now),
+            )
+            next_seq = conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM live_turns WHERE conversation_id = ?",
+                (conversation_id,),
+            ).fetchone()[0]
+            added = 0
+            for turn in turns:
+                speaker = _SPEAKERS.get(turn.get("role"))
+                text = turn.get("message") or turn.get("text")
+                if not speaker or not text:
+                    continue
+                seq = turn.get("seq")
+                if not isinstance(seq, int):
+                    seq = next_seq
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO live_turns (conversation_id, seq, speaker, text) VALUES (?, ?, ?, ?)",
+                    (conversation_id, seq, speaker, str(text)),
+                )
+                added += cursor.rowcount
+                next_seq = max(next_seq, seq + 1)
+            total, extracted = conn.execute(
+                "SELECT (SELECT COUNT(*) FROM live_turns WHERE conversation_id = ?), extracted_turns "
+                "FROM live_calls WHERE conversation_id = ?",
+                (conversation_id, conversation_id),
+            ).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if total - extracted >= self.min_turns:
+            self._schedule(conversation_id)
+        self._maybe_prune(now)
+        return {"added": added, "turns": total, "extracted_turns": extracted}
+
+    def snapshot(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Running conclusion of a call and how many of its turns it covers."""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT conclusion, extracted_turns FROM live_calls WHERE conversation_id = ?",
+            (conversation_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        total = conn.execute(
+            "SELECT COUNT(*) FROM live_turns WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()[0]
+        return {
+            "conversation_id": conversation_id,
+            "conclusion": json.loads(row[0]) if row[0] else None,
+            "extracted_turns": row[1],
+            "turns": total,
+        }
+
+    # ------------------------------------------------------------------ #
+    # After the call
+    # ------------------------------------------------------------------ #
+
+    def conclude(self, conversation_id: Optional[str], turns: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """
+        Final conclusion for a finished call, given its full transcript turns
+        (``{"speaker", "text"}``, in call order). Only the turns beyond those
+        already folded into the running conclusion are extracted. Returns None
+        when the call was not followed live or the live turns do not match the
+        transcript (the caller then extracts it in full), and forgets the call
+        otherwise.
+        """
+        if not conversation_id:
+            return None
+        row = self._conn().execute(
+            "SELECT conclusion, extracted_turns FROM live_calls WHERE conversation_id = ?",
+            (conversation_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        if row[0] is None:
+            # Too short to have been extracted live; use the regular path
+            self.forget(conversation_id)
+            return None
+
+        prior, extracted = json.loads(row[0]), row[1]
+        live_turns = [
+            {"speaker": speaker, "text": text}
+            for speaker, text in self._conn().execute(
+                "SELECT speaker, text FROM live_turns WHERE conversation_id = ? ORDER BY seq LIMIT ?",
+                (conversation_id, extracted),
+            )
+        ]
+        remaining = _remaining_turns(live_turns, turns)
+        if remaining is None:
+            print(f"⚠️ Live turns for call {conversation_id} do not match the post-call transcript; extracting it in full")
+            self.forget(conversation_id)
+            return None
+        conclusion = extract_incremental_conclusion(prior, _format(remaining)) if remaining else prior
+        with self._lock:
+            self.turns_extracted += len(remaining)
+        print(f"⚡ Live conclusion for call {conversation_id}: {extracted} turns pre-extracted, {len(remaining)} remaining")
+        self.forget(conversation_id)
+        return conclusion
+
+    def forget(self, conversation_id: str) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM live_turns WHERE conversation_id = ?", (conversation_id,))
+            conn.execute("DELETE FROM live_calls WHERE conversation_id = ?", (conversation_id,))
+
+    # ------------------------------------------------------------------ #
+    # Rolling extraction
+    # ------------------------------------------------------------------ #
+
+    def _schedule(self, conversation_id: str) -> None:
+        with self._lock:
+            if conversation_id in self._pending:
+                return
+            self._pending.add(conversation_id)
+        self._executor.submit(self._extract, conversation_id)
+
+    def _extract(self, conversation_id: str) -> None:
+        try:
+            claimed = self._claim(conversation_id)
+            if claimed is None:
+                return
+            prior, extracted, new_turns = claimed
+            try:
+                conclusion = extract_incremental_conclusion(prior, _format(new_turns))
+            except Exception:
+                self._release(conversation_id)
+                raise
+            with self._conn() as conn:
+                conn.execute(
+                    "UPDATE live_calls SET conclusion = ?, extracted_turns = ?, leased_until = NULL "
+                    "WHERE conversation_id = ?",
+                    (json.dumps(conclusion), extracted + len(new_turns), conversation_id),
+                )
+            with self._lock:
+                self.extractions += 1
+                self.turns_extracted += len(new_turns)
+        except Exception as e:
+            print(f"⚠️ Live extraction failed for call {conversation_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(conversation_id)
+
+        # Turns that arrived while extracting
+        snapshot = self.snapshot(conversation_id)
+        if snapshot and snapshot["turns"] - snapshot["extracted_turns"] >= self.min_turns:
+            self._schedule(conversation_id)
+
+    def _claim(self, conversation_id: str) -> Optional[Tuple[Optional[Dict[str, Any]], int, List[Dict[str, str]]]]:
+        # Lease the call so only one process extracts it at a time
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT conclusion, extracted_turns FROM live_calls "
+                "WHERE conversation_id = ? AND (leased_until IS NULL OR leased_until < ?)",
+                (conversation_id, now),
+            ).fetchone()
+            new_turns = []
+            if row is not None:
+                new_turns = [
+                    {"speaker": speaker, "text": text}
+                    for speaker, text in conn.execute(
+                        "SELECT speaker, text FROM live_turns WHERE conversation_id = ? ORDER BY seq LIMIT -1 OFFSET ?",
+                        (conversation_id, row[1]),
+                    )
+                ]
+                if new_turns:
+                    conn.execute(
+                        "UPDATE live_calls SET leased_until = ? WHERE conversation_id = ?",
+                        (now + self.lease_secs, conversation_id),
+                    )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None or not new_turns:
+            return None
+        return (json.loads(row[0]) if row[0] else None), row[1], new_turns
+
+    def _release(self, conversation_id: str) -> None:
+        with self._conn() as conn:
+            conn.execute("UPDATE live_calls SET leased_until = NULL WHERE conversation_id = ?", (conversation_id,))
+
+    def _maybe_prune(self, now: float) -> None:
+        with self._lock:
+            if now - self._last_prune < 60:
+                return
+            self._last_prune = now
+        cutoff = now - self.retention_secs
+        with self._conn() as conn:
+            conn.execute(
+                "DELETE FROM live_turns WHERE conversation_id IN "
+                "(SELECT conversation_id FROM live_calls WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            conn.execute("DELETE FROM live_calls WHERE updated_at < ?", (cutoff,))
+
+    def stats(self) -> Dict[str, Any]:
+        active = self._conn().execute("SELECT COUNT(*) FROM live_calls").fetchone()[0]
+        with self._lock:
+            return {
+                "active_calls": active,
+                "extractions": self.extractions,
+                "turns_extracted": self.turns_extracted,
+                "pending": len(self._pending),
+            }
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit mode with explicit transactions.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+def _merged(turns: List[Dict[str, str]]) -> List[Tuple[str, str]]:
+    # Post-call turns split a message into one turn per content block, while the
+    # live feed sends whole messages: join consecutive turns of a speaker and
+    # collapse whitespace so both sides compare equal.
+    merged: List[Tuple[str, str]] = []
+    for turn in turns:
+        text = re.sub(r"\s+", " ", str(turn["text"])).strip()
+        if merged and merged[-1][0] == turn["speaker"]:
+            merged[-1] = (turn["speaker"], f"{merged[-1][1]} {text}".strip())
+        else:
+            merged.append((turn["speaker"], text))
+    return merged
+
+
+def _remaining_turns(
+    extracted: List[Dict[str, str]], turns: List[Dict[str, str]]
+) -> Optional[List[Dict[str, str]]]:
+    """
+    The part of ``turns`` (the post-call transcript) not covered by the
+    ``extracted`` live turns, or None when the live turns are not a prefix of it.
+    """
+    done, full = _merged(extracted), _merged(turns)
+    if not done:
+        return list(turns)
+    last = len(done) - 1
+    if len(full) <= last or full[:last] != done[:last]:
+        return None
+    # The last extracted message may continue in the transcript (its speaker
+    # kept talking after the live extraction ran)
+    speaker, text = full[last]
+    if speaker != done[last][0] or not text.startswith(done[last][1]):
+        return None
+    rest = text[len(done[last][1]):].strip()
+    return ([{"speaker": speaker, "text": rest}] if rest else []) + [
+        {"speaker": speaker, "text": text} for speaker, text in full[last + 1:]
+    ]
+
+
+def _format(turns: List[Dict[str, str]]) -> str:
+    return "\n".join(f"{turn['speaker']}: {turn['text']}" for turn in turns)
+
+
+# Shared by the in-call transcript endpoint and the post-call transcript workers.
+live_transcripts = LiveTranscripts()
@@ -2,151 +2,515 @@
 
 from __future__ import annotations
 
+import concurrent.futures
+import hashlib
 import json
 import os
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
-import requests
+from .fast_extract import fast_extract, resolved_fields
+from .llm_cache import llm_cache_key, llm_result_cache
+from .llm_client import extraction_client
 
 
-LLM_EXTRACTION_ENDPOINT = os.getenv("LLM_EXTRACTION_ENDPOINT")
-LLM_EXTRACTION_API_KEY = os.getenv("LLM_EXTRACTION_API_KEY")
-LLM_EXTRACTION_MODEL = os.getenv("LLM_EXTRACTION_MODEL", "gpt-4o-mini")
+# Batched extraction: approximate input tokens of summaries per request, items per
+# request, and how long the worker path waits to fill a batch
+LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "6000"))
+LLM_BATCH_MAX_ITEMS = int(os.getenv("LLM_BATCH_MAX_ITEMS", "16"))
+LLM_BATCH_WINDOW_MS = int(os.getenv("LLM_BATCH_WINDOW_MS", "200"))
 
 
-def _call_llm(summary: str) -> Optional[Dict[str, Any]]:
-    """Call the configured LLM endpoint to extract structured conclusions."""
+CONCLUSION_FIELDS = (
+    "quoted_price",
+    "moq",
+    "terms_of_delivery",
+    "payment_terms",
+    "meeting_requested",
+    "meeting_preferred_time",
+    "call_success",
+    "decision_reason",
+    "important_notes",
+)
 
-    if not LLM_EXTRACTION_ENDPOINT or not summary:
-        return None
+_SYSTEM_PROMPT = (
+    "You are an assistant that extracts procurement call outcomes. "
+    "Return valid JSON with fields quoted_price, moq, terms_of_delivery, payment_terms, "
+    "meeting_requested, meeting_preferred_time, call_success, decision_reason, important_notes."
+)
 
-    try:
-        payload = {
-            "model": LLM_EXTRACTION_MODEL,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an assistant that extracts procurement call outcomes. "
-                        "Return valid JSON with fields quoted_price, moq, terms_of_delivery, payment_terms, "
-                        "meeting_requested, meeting_preferred_time, call_success, decision_reason, important_notes."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        "Extract the quoted price, minimum order quantity (moq), terms of delivery, "
-                        "payment terms, whether the supplier requested a meeting (and any preferred time), "
-                        "whether the supplier indicated they want to move forward with the deal, "
-                        "their reason for accepting or declining, and any other important notes not already covered. "
-                        "Respond with JSON in the format {\"quoted_price\": ..., \"moq\": ..., \"terms_of_delivery\": ..., \"payment_terms\": ..., \"meeting_requested\": ..., \"meeting_preferred_time\": ..., \"call_success\": ..., \"decision_reason\": ..., \"important_notes\": ...}.\n\n"
-                        f"Call Summary:\n{summary}"
-                    ),
-                },
-            ],
-            "response_format": {
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "CallConclusion",
-                    "schema": {
-                        "type": "object",
-                        "properties": {
-                            "quoted_price": {"type": ["string", "null"]},
-                            "moq": {"type": ["string", "null"]},
-                            "terms_of_delivery": {"type": ["string", "null"]},
-                            "payment_terms": {"type": ["string", "null"]},
-                            "meeting_requested": {"type": ["boolean", "null"]},
-                            "meeting_preferred_time": {"type": ["string", "null"]},
-                            "call_success": {"type": ["boolean", "null"]},
-                            "decision_reason": {"type": ["string", "null"]},
-                            "important_notes": {"type": ["string", "null"]},
-                        },
-                        "required": [
-                            "quoted_price",
-                            "moq",
-                            "terms_of_delivery",
-                            "payment_terms",
-                            "meeting_requested",
-                            "meeting_preferred_time",
-                            "call_success",
-                            "decision_reason",
-                            "important_notes",
-                        ],
-                        "additionalProperties": False,
-                    },
-                },
+_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "CallConclusion",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "quoted_price": {"type": ["string", "null"]},
+                "moq": {"type": ["string", "null"]},
+                "terms_of_delivery": {"type": ["string", "null"]},
+                "payment_terms": {"type": ["string", "null"]},
+                "meeting_requested": {"type": ["boolean", "null"]},
+                "meeting_preferred_time": {"type": ["string", "null"]},
+                "call_success": {"type": ["boolean", "null"]},
+                "decision_reason": {"type": ["string", "null"]},
+                "important_notes": {"type": ["string", "null"]},
             },
-        }
+            "required": list(CONCLUSION_FIELDS),
+            "additionalProperties": False,
+        },
+    },
+}
 
-        headers = {"Content-Type": "application/json"}
-        if LLM_EXTRACTION_API_KEY:
-            headers["Authorization"] = f"Bearer {LLM_EXTRACTION_API_KEY}"
 
-        response = requests.post(
-            LLM_EXTRACTION_ENDPOINT,
-            json=payload,
-            headers=headers,
-            timeout=30,
-        )
-        response.raise_for_status()
-
-        json_response = response.json()
-
-        # Try to locate structured content regardless of provider format
-        if isinstance(json_response, dict):
-            if "output" in json_response and isinstance(json_response["output"], dict):
-                return json_response["output"]
-            if "choices" in json_response and json_response["choices"]:
-                choice = json_response["choices"][0]
-                message = choice.get("message") if isinstance(choice, dict) else None
-                if isinstance(message, dict):
-                    content = message.get("content")
-                    if isinstance(content, str):
-                        try:
-                            return json.loads(content)
-                        except Exception:  # noqa: BLE001
-                            pass
-                    elif isinstance(content, list):
-                        for item in content:
-                            if isinstance(item, dict) and item.get("type") == "json_schema":
-                                return item.get("json")
-
-        return json_response if isinstance(json_response, dict) else None
-    except Exception as exc:  # noqa: BLE001
-        print(f"LLM extraction failed: {exc}")
+
+def _fields_schema(fields: Tuple[str, ...]) -> Dict[str, Any]:
+    properties = _RESPONSE_FORMAT["json_schema"]["schema"]["properties"]
+    return {
+        "type": "object",
+        "properties": {field: properties[field] for field in fields},
+        "required": list(fields),
+        "additionalProperties": False,
+    }
+
+
+def _batch_request(fields: Tuple[str, ...]) -> Tuple[str, Dict[str, Any]]:
+    """System prompt and schema for a batched request covering ``fields``."""
+    names = ", ".join(fields)
+    item = _fields_schema(fields)
+    item = {**item, "properties": {"index": {"type": "integer"}, **item["properties"]}, "required": ["index", *fields]}
+    system_prompt = (
+        "You are an assistant that extracts procurement call outcomes from several independent calls at once. "
+        "Return valid JSON {\"conclusions\": [...]} with one entry per call summary, each carrying the summary's "
+        f"index and fields {names}."
+    )
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "CallConclusionBatch",
+            "schema": {
+                "type": "object",
+                "properties": {"conclusions": {"type": "array", "items": item}},
+                "required": ["conclusions"],
+                "additionalProperties": False,
+            },
+        },
+    }
+    return system_prompt, response_format
+
+
+# Rough token accounting for splitting batches (about 4 characters per token)
+_CHARS_PER_TOKEN = 4
+_ITEM_OVERHEAD_TOKENS = 16
+
+# How many fields the rule-based fast path settles
+_fast_path_lock = threading.Lock()
+_fast_path_counts = {"summaries": 0, "fields_resolved": 0}
+
+
+def _prompt_version(system_prompt: str, response_format: Dict[str, Any]) -> str:
+    # Part of every cache key, so a different system prompt or schema never shares cached results
+    return hashlib.sha256(
+        json.dumps([system_prompt, response_format], sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def _cached(
+    user_prompt: str,
+    system_prompt: str = _SYSTEM_PROMPT,
+    response_format: Dict[str, Any] = _RESPONSE_FORMAT,
+) -> Optional[Dict[str, Any]]:
+    """A cached answer to this exact request from any provider in the extraction chain, in chain order."""
+    version = _prompt_version(system_prompt, response_format)
+    for answerer in extraction_client.answerers:
+        cached = llm_result_cache.get(llm_cache_key(user_prompt, answerer, version))
+        if cached is not None:
+            return cached
+    return None
+
+
+def _cache_put(
+    user_prompt: str,
+    answerer: Optional[str],
+    result: Any,
+    system_prompt: str = _SYSTEM_PROMPT,
+    response_format: Dict[str, Any] = _RESPONSE_FORMAT,
+) -> None:
+    # Keyed by the provider and model that actually answered, which may be a fallback
+    if isinstance(result, dict) and answerer:
+        key = llm_cache_key(user_prompt, answerer, _prompt_version(system_prompt, response_format))
+        llm_result_cache.put(key, result)
+
+
+def _call_llm(summary: str, fields: Tuple[str, ...] = CONCLUSION_FIELDS) -> Optional[Dict[str, Any]]:
+    """Call the configured LLM endpoint to extract structured conclusions (only ``fields``)."""
+
+    if not summary or not fields:
         return None
 
+    user_prompt, system_prompt, response_format = _fields_request(summary, fields)
+    return _request_extraction(
+        user_prompt,
+        system_prompt=system_prompt,
+        response_format=response_format,
+        site="conclusion" if fields == CONCLUSION_FIELDS else "conclusion_fields",
+    )
+
+
+def _fields_request(summary: str, fields: Tuple[str, ...]) -> Tuple[str, str, Dict[str, Any]]:
+    """User prompt, system prompt and schema asking for ``fields`` of one summary (also its cache key)."""
+
+    if fields == CONCLUSION_FIELDS:
+        return _summary_prompt(summary), _SYSTEM_PROMPT, _RESPONSE_FORMAT
+
+    names = ", ".join(fields)
+    return (
+        "Extract only the following fields from the procurement call summary below: "
+        f"{names}. Use null for anything the summary does not state. "
+        f"Respond with JSON containing exactly these fields.\n\nCall Summary:\n{summary}",
+        f"You are an assistant that extracts procurement call outcomes. Return valid JSON with fields {names}.",
+        {"type": "json_schema", "json_schema": {"name": "CallConclusionFields", "schema": _fields_schema(fields)}},
+    )
+
+
+def _summary_prompt(summary: str) -> str:
+    return (
+        "Extract the quoted price, minimum order quantity (moq), terms of delivery, "
+        "payment terms, whether the supplier requested a meeting (and any preferred time), "
+        "whether the supplier indicated they want to move forward with the deal, "
+        "their reason for accepting or declining, and any other important notes not already covered. "
+        "Respond with JSON in the format {\"quoted_price\": ..., \"moq\": ..., \"terms_of_delivery\": ..., \"payment_terms\": ..., \"meeting_requested\": ..., \"meeting_preferred_time\": ..., \"call_success\": ..., \"decision_reason\": ..., \"important_notes\": ...}.\n\n"
+        f"Call Summary:\n{summary}"
+    )
+
+
+def _request_extraction(
+    user_prompt: str,
+    system_prompt: str = _SYSTEM_PROMPT,
+    response_format: Dict[str, Any] = _RESPONSE_FORMAT,
+    site: str = "conclusion",
+) -> Optional[Dict[str, Any]]:
+    """
+    Result of one extraction prompt, from the cache when the same prompt,
+    system prompt and schema were already answered by a provider in the chain.
+    """
+
+    if not extraction_client.available:
+        return None
+
+    cached = _cached(user_prompt, system_prompt, response_format)
+    if cached is not None:
+        return cached
+
+    result, answerer = _post_extraction(user_prompt, system_prompt=system_prompt, response_format=response_format, site=site)
+    _cache_put(user_prompt, answerer, result, system_prompt, response_format)
+    return result
+
+
+def _post_extraction(
+    user_prompt: str,
+    system_prompt: str = _SYSTEM_PROMPT,
+    response_format: Dict[str, Any] = _RESPONSE_FORMAT,
+    site: str = "conclusion",
+    retry: bool = False,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Send one extraction prompt through the extraction provider chain and
+    return the parsed JSON object and the ``provider:model`` that answered.
+    ``retry`` marks a repeat of a request that went unanswered.
+    """
+
+    return extraction_client.complete_json_from(
+        user_prompt,
+        system_prompt=system_prompt,
+        response_format=response_format,
+        site=site,
+        retry=retry,
+    )
+
 
 def extract_call_conclusion(summary: str) -> Dict[str, Optional[Any]]:
-    """Use an LLM (with graceful fallback) to extract call conclusion data."""
-
-    llm_result = _call_llm(summary)
-
-    if isinstance(llm_result, dict):
-        quoted_price = llm_result.get("quoted_price")
-        moq = llm_result.get("moq")
-        terms_of_delivery = llm_result.get("terms_of_delivery")
-        payment_terms = llm_result.get("payment_terms")
-        meeting_requested = llm_result.get("meeting_requested")
-        meeting_preferred_time = llm_result.get("meeting_preferred_time")
-        call_success = llm_result.get("call_success")
-        decision_reason = llm_result.get("decision_reason")
-        important_notes = llm_result.get("important_notes")
-    else:
-        quoted_price = moq = terms_of_delivery = payment_terms = None
-        meeting_requested = meeting_preferred_time = call_success = None
-        decision_reason = important_notes = None
+    """
+    Extract call conclusion data: fields the rule-based fast path resolves
+    confidently are taken as-is, and the LLM (with graceful fallback) is
+    asked only for the rest.
+    """
 
-    return {
-        "quoted_price": quoted_price,
-        "moq": moq,
-        "terms_of_delivery": terms_of_delivery,
-        "payment_terms": payment_terms,
-        "meeting_requested": meeting_requested,
-        "meeting_preferred_time": meeting_preferred_time,
-        "call_success": call_success,
-        "decision_reason": decision_reason,
-        "important_notes": important_notes,
-    }
+    fast = _fast_path(summary)
+    return _merge(fast, _call_llm(summary, _unresolved(fast)))
+
+
+def _fast_path(summary: str) -> Dict[str, Any]:
+    """Fields of ``summary`` the rules resolve confidently; counted in ``fast_path_stats``."""
+
+    if not summary:
+        return {}
+    fast = resolved_fields(fast_extract(summary))
+    with _fast_path_lock:
+        _fast_path_counts["summaries"] += 1
+        _fast_path_counts["fields_resolved"] += len(fast)
+    return fast
+
+
+def _unresolved(fast: Dict[str, Any]) -> Tuple[str, ...]:
+    """The fields the LLM still has to be asked for."""
+    return tuple(field for field in CONCLUSION_FIELDS if field not in fast)
+
+
+def _merge(fast: Dict[str, Any], llm_result: Optional[Dict[str, Any]]) -> Dict[str, Optional[Any]]:
+    # The LLM is only asked for the fields the rules left unresolved
+    llm = _conclusion(llm_result)
+    return {field: fast[field] if field in fast else llm[field] for field in CONCLUSION_FIELDS}
+
+
+def fast_path_stats() -> Dict[str, Any]:
+    with _fast_path_lock:
+        counts = dict(_fast_path_counts)
+    summaries = counts["summaries"]
+    counts["avg_fields_resolved"] = round(counts["fields_resolved"] / summaries, 2) if summaries else None
+    return counts
+
+
+def extract_call_conclusions(summaries: List[str]) -> List[Dict[str, Optional[Any]]]:
+    """
+    Extract conclusions for many call summaries (backfills, queued webhooks),
+    packing several summaries into each LLM request so the fixed system
+    prompt and schema are paid once per batch rather than once per call.
+
+    Only the fields the fast path left unresolved are requested for each
+    summary, and a summary it resolves completely skips the LLM. Cached
+    summaries are answered from the cache; the rest are split into batches
+    that fit LLM_BATCH_TOKEN_BUDGET / LLM_BATCH_MAX_ITEMS. Items a batch
+    response does not answer properly are retried one by one. Results are
+    in the order of ``summaries``.
+    """
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(summaries)
+    fast = [_fast_path(summary) for summary in summaries]
+    misses: List[Tuple[int, str, Tuple[str, ...]]] = []  # (position, summary, fields to request)
+    for position, summary in enumerate(summaries):
+        fields = _unresolved(fast[position])
+        if not summary or not fields or not extraction_client.available:
+            continue
+        cached = _cached(*_fields_request(summary, fields))
+        if cached is not None:
+            results[position] = cached
+        else:
+            misses.append((position, summary, fields))
+
+    for position, result in _extract_uncached(misses):
+        results[position] = result
+
+    return [_merge(fields, result) for fields, result in zip(fast, results)]
+
+
+def _extract_uncached(
+    items: List[Tuple[int, str, Tuple[str, ...]]]
+) -> List[Tuple[int, Optional[Dict[str, Any]]]]:
+    """
+    Extract (position, summary, fields) items in batches and cache the
+    results. A batched answer is cached under the item's single-summary
+    request, so both paths share cache entries.
+    """
+
+    extracted = []
+    for batch in _split_batches(items):
+        answered, batch_answerer = (
+            _post_batch([(summary, fields) for _, summary, fields in batch]) if len(batch) > 1 else ({}, None)
+        )
+        for index, (position, summary, fields) in enumerate(batch):
+            user_prompt, system_prompt, response_format = _fields_request(summary, fields)
+            result, answerer = answered.get(index), batch_answerer
+            if result is None:
+                result, answerer = _post_extraction(
+                    user_prompt,
+                    system_prompt,
+                    response_format,
+                    site="conclusion" if fields == CONCLUSION_FIELDS else "conclusion_fields",
+                    retry=len(batch) > 1,
+                )
+            _cache_put(user_prompt, answerer, result, system_prompt, response_format)
+            extracted.append((position, result))
+    return extracted
+
+
+def _split_batches(
+    items: List[Tuple[int, str, Tuple[str, ...]]]
+) -> List[List[Tuple[int, str, Tuple[str, ...]]]]:
+    batches: List[List[Tuple[int, str, Tuple[str, ...]]]] = []
+    batch: List[Tuple[int, str, Tuple[str, ...]]] = []
+    tokens = 0
+    for item in items:
+        item_tokens = len(item[1]) // _CHARS_PER_TOKEN + _ITEM_OVERHEAD_TOKENS
+        if batch and (tokens + item_tokens > LLM_BATCH_TOKEN_BUDGET or len(batch) >= LLM_BATCH_MAX_ITEMS):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(item)
+        tokens += item_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _post_batch(items: List[Tuple[str, Tuple[str, ...]]]) -> Tuple[Dict[int, Dict[str, Any]], Optional[str]]:
+    """
+    One request for several (summary, fields) items; maps item index to its
+    extracted fields, along with the ``provider:model`` that answered. The
+    schema covers the union of the items' fields; each summary lists the
+    fields it needs and the rest come back null.
+    """
+
+    fields = tuple(field for field in CONCLUSION_FIELDS if any(field in wanted for _, wanted in items))
+    system_prompt, response_format = _batch_request(fields)
+    numbered = "\n\n".join(
+        f"[{index}] (fields: {', '.join(wanted)})\n{summary}" for index, (summary, wanted) in enumerate(items)
+    )
+    response, answerer = _post_extraction(
+        "For each numbered call summary below, extract the fields listed after its number, using null for "
+        "the other fields and for anything the summary does not state. Fields: quoted_price, moq (minimum "
+        "order quantity), terms_of_delivery, payment_terms, meeting_requested and meeting_preferred_time, "
+        "call_success (whether the supplier wants to move forward with the deal), decision_reason (their "
+        "reason for accepting or declining) and important_notes (anything else important not already "
+        "covered). The calls are unrelated; do not carry information between them. Respond with JSON "
+        "{\"conclusions\": [{\"index\": <summary number>, ...fields}, ...]} with exactly one entry per summary.\n\n"
+        f"Call Summaries:\n{numbered}",
+        system_prompt=system_prompt,
+        response_format=response_format,
+        site="conclusion_batch",
+    )
+
+    entries = response.get("conclusions") if isinstance(response, dict) else None
+    if not isinstance(entries, list):
+        print(f"Batched LLM extraction returned no conclusions; falling back to {len(items)} single requests")
+        return {}, None
+
+    answered: Dict[int, Dict[str, Any]] = {}
+    for entry in entries:
+        index = entry.get("index") if isinstance(entry, dict) else None
+        if isinstance(index, int) and 0 <= index < len(items) and index not in answered:
+            answered[index] = {field: entry.get(field) for field in items[index][1]}
+    if len(answered) < len(items):
+        print(f"Batched LLM extraction answered {len(answered)}/{len(items)} summaries; retrying the rest singly")
+    return answered, answerer
+
+
+class ConclusionBatcher:
+    """
+    Collects summaries submitted concurrently (e.g. by the transcript queue's
+    worker threads) for up to LLM_BATCH_WINDOW_MS and extracts them with one
+    batched request. Each caller blocks until its own conclusion is ready.
+    """
+
+    def __init__(self, window_ms: int = LLM_BATCH_WINDOW_MS, max_items: int = LLM_BATCH_MAX_ITEMS):
+        self.window_secs = window_ms / 1000.0
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, Tuple[str, ...], concurrent.futures.Future]] = []
+        self._timer: Optional[threading.Timer] = None
+        self.batches = 0
+        self.items = 0
+
+    def extract(self, summary: str) -> Dict[str, Optional[Any]]:
+        if not summary or not extraction_client.available:
+            return extract_call_conclusion(summary)
+
+        # Summaries the fast path resolves, and cache hits, don't need to wait for a batch
+        fast = _fast_path(summary)
+        fields = _unresolved(fast)
+        if not fields:
+            return _merge(fast, None)
+        cached = _cached(*_fields_request(summary, fields))
+        if cached is not None:
+            return _merge(fast, cached)
+
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            self._pending.append((summary, fields, future))
+            if len(self._pending) >= self.max_items:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window_secs, self._flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            self._run(batch)
+        return _merge(fast, future.result())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else None,
+            }
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._run(batch)
+
+    def _take(self) -> List[Tuple[str, Tuple[str, ...], concurrent.futures.Future]]:
+        # Caller holds self._lock
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _run(self, batch: List[Tuple[str, Tuple[str, ...], concurrent.futures.Future]]) -> None:
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
+        try:
+            extracted = _extract_uncached(
+                [(position, summary, fields) for position, (summary, fields, _) in enumerate(batch)]
+            )
+        except Exception as exc:  # noqa: BLE001
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+        for position, result in extracted:
+            batch[position][2].set_result(result)
+
+
+def extract_incremental_conclusion(
+    prior: Optional[Dict[str, Any]],
+    new_transcript: str,
+) -> Dict[str, Optional[Any]]:
+    """
+    Update a conclusion extracted from the earlier part of a call with the
+    next stretch of its transcript. Only ``new_transcript`` is sent, alongside
+    the fields known so far; fields the new turns say nothing about keep
+    their prior values.
+    """
+
+    prior = _conclusion(prior)
+    if not new_transcript:
+        return prior
+
+    llm_result = _request_extraction(
+        "You are following a supplier phone call as it happens. Below are the call outcome fields "
+        "extracted from the conversation so far, and the newest turns of the transcript. "
+        "Update the fields using the new turns: replace a value only if the new turns change or "
+        "add to it, and keep the existing value otherwise. Respond with JSON containing all fields "
+        "(quoted_price, moq, terms_of_delivery, payment_terms, meeting_requested, meeting_preferred_time, "
+        "call_success, decision_reason, important_notes).\n\n"
+        f"Fields so far:\n{json.dumps(prior)}\n\n"
+        f"New transcript turns:\n{new_transcript}",
+        site="live_conclusion",
+    )
+    update = _conclusion(llm_result)
+    return {field: prior[field] if update[field] is None else update[field] for field in CONCLUSION_FIELDS}
+
+
+def _conclusion(llm_result: Optional[Dict[str, Any]]) -> Dict[str, Optional[Any]]:
+    if not isinstance(llm_result, dict):
+        return {field: None for field in CONCLUSION_FIELDS}
+    return {field: llm_result.get(field) for field in CONCLUSION_FIELDS}
 
 
+# Used by the transcript queue's workers to batch concurrent extractions.
+conclusion_batcher = ConclusionBatcher()
@@ -0,0 +1,153 @@
+"""
+Persistent cache for LLM extraction results.
+
+Identical extraction prompts come back constantly: webhook retries,
+re-analysis runs and test replays all send the same summary again. Results
+are keyed by a hash of (prompt, model, prompt/schema version) and kept in a
+SQLite file (WAL mode) shared by the gunicorn workers on the host, for
+LLM_CACHE_TTL_SECS. Past LLM_CACHE_MAX_ENTRIES the least recently used
+entries are evicted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(tempfile.gettempdir(), "procuroid-llm-cache.sqlite3"))
+LLM_CACHE_TTL_SECS = float(os.getenv("LLM_CACHE_TTL_SECS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+# Set to 0 to bypass the cache (e.g. when evaluating prompt changes)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") not in ("0", "false", "False")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used_at);
+"""
+
+_EVICT_INTERVAL_SECS = 60.0
+
+
+def llm_cache_key(prompt: str, model: str, version: str) -> str:
+    """Stable content hash identifying one extraction request."""
+    material = json.dumps([prompt, model, version], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMResultCache:
+    """TTL- and size-bounded cache of JSON extraction results."""
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl_secs: float = LLM_CACHE_TTL_SECS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        enabled: bool = LLM_CACHE_ENABLED,
+    ):
+        self.path = path
+        self.ttl_secs = ttl_secs
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._last_evict = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn().executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT result FROM llm_cache WHERE key = ? AND created_at > ?",
+            (key, now - self.ttl_secs),
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        conn.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO llm_cache (key, result, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(result), now, now),
+        )
+        self._maybe_evict(now)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._conn().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] if self.enabled else 0
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "entries": entries,
+                "max_entries": self.max_entries,
+            }
+
+    def _maybe_evict(self, now: float) -> None:
+        with self._lock:
+            if now - self._last_evict < _EVICT_INTERVAL_SECS:
+                return
+            self._last_evict = now
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = conn.execute("DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl_secs,)).rowcount
+            overflow = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                removed += conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_used_at LIMIT ?)",
+                    (overflow,),
+                ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self.evictions += removed
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit mode with explicit transactions.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+# Shared by every extraction in this process.
+llm_result_cache = LLMResultCache()
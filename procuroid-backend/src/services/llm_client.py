@@ -0,0 +1,375 @@
+"""
+Provider-agnostic LLM client for structured (JSON) extraction.
+
+A client tries an ordered chain of providers (``LLM_EXTRACTION_PROVIDERS``,
+``LLM_ANALYSIS_PROVIDERS``), moving to the next one when a provider is
+throttled, times out, errors or returns output that is not a JSON object.
+Responses from every provider go through one parser (``parse_structured``).
+
+Each provider has an AIMD concurrency limit shared by every client in the
+process: the number of requests in flight grows by about one per round of
+successful requests and is halved when the provider answers 429 or times
+out, so extraction throughput settles just below the provider's rate limit
+instead of being fixed by configuration.
+
+Providers:
+    extraction  OpenAI-compatible chat completions endpoint
+                (LLM_EXTRACTION_ENDPOINT / _API_KEY / _MODEL)
+    fallback    A second OpenAI-compatible endpoint
+                (LLM_FALLBACK_ENDPOINT / _API_KEY / _MODEL)
+    gemini      Google Gemini (GOOGLE_API_KEY, LLM_GEMINI_MODEL)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import requests
+from dotenv import load_dotenv
+
+from .llm_metrics import llm_metrics
+
+load_dotenv()
+
+LLM_EXTRACTION_PROVIDERS = os.getenv("LLM_EXTRACTION_PROVIDERS", "extraction")
+LLM_ANALYSIS_PROVIDERS = os.getenv("LLM_ANALYSIS_PROVIDERS", "gemini")
+LLM_REQUEST_TIMEOUT_SECS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECS", "30"))
+LLM_GEMINI_MODEL = os.getenv("LLM_GEMINI_MODEL", "gemini-2.0-flash-exp")
+# AIMD concurrency limit per provider
+LLM_CONCURRENCY_INITIAL = int(os.getenv("LLM_CONCURRENCY_INITIAL", "4"))
+LLM_CONCURRENCY_MIN = int(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+LLM_CONCURRENCY_MAX = int(os.getenv("LLM_CONCURRENCY_MAX", "32"))
+# How long a request waits for a concurrency slot before trying the next provider
+LLM_ACQUIRE_TIMEOUT_SECS = float(os.getenv("LLM_ACQUIRE_TIMEOUT_SECS", "60"))
+
+Usage = Tuple[Optional[int], Optional[int]]  # (prompt tokens, completion tokens)
+
+
+class LLMProviderError(RuntimeError):
+    """Raised by a provider when a request fails. ``throttled`` marks 429s and timeouts."""
+
+    def __init__(self, message: str, throttled: bool = False):
+        super().__init__(message)
+        self.throttled = throttled
+
+
+class LLMParseError(ValueError):
+    """Raised when a provider response holds no JSON object."""
+
+
+def parse_structured(content: Any) -> Dict[str, Any]:
+    """
+    The JSON object in a provider response: an OpenAI-style body (``output``
+    or ``choices[0].message.content`` as a string or content blocks), a bare
+    object, or model text with or without a ```json fence.
+    """
+    if isinstance(content, dict):
+        if isinstance(content.get("output"), dict):
+            return content["output"]
+        choices = content.get("choices")
+        if isinstance(choices, list) and choices:
+            message = choices[0].get("message") if isinstance(choices[0], dict) else None
+            if isinstance(message, dict):
+                inner = message.get("content")
+                if isinstance(inner, list):
+                    for item in inner:
+                        if isinstance(item, dict) and item.get("type") == "json_schema" and isinstance(item.get("json"), dict):
+                            return item["json"]
+                    inner = "".join(item.get("text", "") for item in inner if isinstance(item, dict))
+                return parse_structured(inner)
+        return content
+
+    if not isinstance(content, str):
+        raise LLMParseError(f"Unexpected response type {type(content).__name__}")
+    text = content.strip()
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0].strip()
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise LLMParseError(f"Response is not valid JSON: {exc}") from exc
+    if not isinstance(parsed, dict):
+        raise LLMParseError("Response JSON is not an object")
+    return parsed
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit with additive increase / multiplicative decrease.
+    Each success raises the limit by 1/limit (about +1 per full round of
+    requests); a throttle multiplies it by ``decrease``, at most once per
+    ``cooldown_secs`` so one burst of 429s only counts once.
+    """
+
+    def __init__(
+        self,
+        initial: int = LLM_CONCURRENCY_INITIAL,
+        minimum: int = LLM_CONCURRENCY_MIN,
+        maximum: int = LLM_CONCURRENCY_MAX,
+        decrease: float = 0.5,
+        cooldown_secs: float = 1.0,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease = decrease
+        self.cooldown_secs = cooldown_secs
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._last_decrease = 0.0
+        self.successes = 0
+        self.throttles = 0
+
+    def acquire(self, timeout: float = LLM_ACQUIRE_TIMEOUT_SECS) -> bool:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < int(self.limit), timeout=timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, throttled: bool = False, success: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.throttles += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown_secs:
+                    self._last_decrease = now
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+            elif success:
+                self.successes += 1
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "successes": self.successes,
+                "throttles": self.throttles,
+            }
+
+
+class OpenAICompatibleProvider:
+    """Chat completions endpoint taking ``response_format`` (OpenAI, Azure, vLLM, ...)."""
+
+    def __init__(self, name: str, endpoint: Optional[str], api_key: Optional[str], model: str):
+        self.name = name
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.model = model
+        self.limiter = AIMDLimiter()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.endpoint)
+
+    def generate(
+        self, system_prompt: Optional[str], user_prompt: str, response_format: Optional[Dict[str, Any]]
+    ) -> Tuple[Any, Usage]:
+        messages = [{"role": "user", "content": user_prompt}]
+        if system_prompt:
+            messages.insert(0, {"role": "system", "content": system_prompt})
+        payload: Dict[str, Any] = {"model": self.model, "messages": messages}
+        if response_format:
+            payload["response_format"] = response_format
+
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        try:
+            response = requests.post(self.endpoint, json=payload, headers=headers, timeout=LLM_REQUEST_TIMEOUT_SECS)
+        except requests.Timeout as exc:
+            raise LLMProviderError(f"{self.name} timed out", throttled=True) from exc
+        except requests.RequestException as exc:
+            raise LLMProviderError(f"{self.name} request failed: {exc}") from exc
+        if response.status_code == 429:
+            raise LLMProviderError(f"{self.name} rate limited (429)", throttled=True)
+        if response.status_code >= 400:
+            raise LLMProviderError(f"{self.name} returned {response.status_code}", throttled=response.status_code == 503)
+
+        body = response.json()
+        usage = body.get("usage") if isinstance(body, dict) else None
+        if isinstance(usage, dict):
+            return body, (
+                usage.get("prompt_tokens", usage.get("input_tokens")),
+                usage.get("completion_tokens", usage.get("output_tokens")),
+            )
+        return body, (None, None)
+
+
+class GeminiProvider:
+    """Google Gemini through the google-genai SDK."""
+
+    def __init__(self, api_key: Optional[str], model: str = LLM_GEMINI_MODEL):
+        self.name = "gemini"
+        self.api_key = api_key
+        self.model = model
+        self.limiter = AIMDLimiter()
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def generate(
+        self, system_prompt: Optional[str], user_prompt: str, response_format: Optional[Dict[str, Any]]
+    ) -> Tuple[Any, Usage]:
+        from google.genai import errors, types
+
+        config = types.GenerateContentConfig(
+            system_instruction=system_prompt or None,
+            # Gemini's schema dialect differs from JSON Schema; ask for JSON and let the prompt define the fields
+            response_mime_type="application/json" if response_format else None,
+        )
+        try:
+            response = self._genai().models.generate_content(model=self.model, contents=user_prompt, config=config)
+        except errors.APIError as exc:
+            raise LLMProviderError(f"gemini returned {exc.code}: {exc}", throttled=exc.code in (429, 503, 504)) from exc
+        # The SDK sends requests with requests in some releases and httpx in others
+        except (requests.Timeout, httpx.TimeoutException) as exc:
+            raise LLMProviderError(f"gemini timed out after {LLM_REQUEST_TIMEOUT_SECS:.0f}s", throttled=True) from exc
+        except (requests.RequestException, httpx.HTTPError) as exc:
+            raise LLMProviderError(f"gemini request failed: {exc}") from exc
+
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return response.text, (None, None)
+        return response.text, (usage.prompt_token_count, usage.candidates_token_count)
+
+    def _genai(self):
+        with self._client_lock:
+            if self._client is None:
+                from google import genai
+                from google.genai import types
+
+                # HttpOptions.timeout is in milliseconds; without it a stalled request never returns
+                self._client = genai.Client(
+                    api_key=self.api_key,
+                    http_options=types.HttpOptions(timeout=int(LLM_REQUEST_TIMEOUT_SECS * 1000)),
+                )
+            return self._client
+
+
+# One instance per provider, so every client shares its concurrency limit
+PROVIDERS = {
+    "extraction": OpenAICompatibleProvider(
+        "extraction",
+        os.getenv("LLM_EXTRACTION_ENDPOINT"),
+        os.getenv("LLM_EXTRACTION_API_KEY"),
+        os.getenv("LLM_EXTRACTION_MODEL", "gpt-4o-mini"),
+    ),
+    "fallback": OpenAICompatibleProvider(
+        "fallback",
+        os.getenv("LLM_FALLBACK_ENDPOINT"),
+        os.getenv("LLM_FALLBACK_API_KEY"),
+        os.getenv("LLM_FALLBACK_MODEL", "gpt-4o-mini"),
+    ),
+    "gemini": GeminiProvider(os.getenv("GOOGLE_API_KEY")),
+}
+
+
+class LLMClient:
+    """Structured extraction over an ordered provider fallback chain."""
+
+    def __init__(self, chain: str):
+        names = [name.strip() for name in chain.split(",") if name.strip()]
+        unknown = [name for name in names if name not in PROVIDERS]
+        if unknown:
+            raise ValueError(f"Unknown LLM providers {unknown}; expected some of {sorted(PROVIDERS)}")
+        self.providers = [PROVIDERS[name] for name in names]
+
+    @property
+    def available(self) -> bool:
+        return any(provider.configured for provider in self.providers)
+
+    @property
+    def model(self) -> Optional[str]:
+        """Model of the first configured provider."""
+        return next((provider.model for provider in self.providers if provider.configured), None)
+
+    @property
+    def answerers(self) -> List[str]:
+        """``provider:model`` of each configured provider, in chain order (see ``complete_json_from``)."""
+        return [f"{provider.name}:{provider.model}" for provider in self.providers if provider.configured]
+
+    def complete_json(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        site: str = "llm",
+        retry: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        The JSON object answering ``user_prompt`` from the first provider in
+        the chain that returns one, or None if every provider failed.
+        Each attempt is recorded in ``llm_metrics`` under ``site``; attempts
+        after the first (or all, with ``retry``) count as retries.
+        """
+        return self.complete_json_from(user_prompt, system_prompt, response_format, site, retry)[0]
+
+    def complete_json_from(
+        self,
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        site: str = "llm",
+        retry: bool = False,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """``complete_json`` plus the ``provider:model`` that answered (None if none did)."""
+        attempts = 0
+        for provider in self.providers:
+            if not provider.configured:
+                continue
+            if not provider.limiter.acquire():
+                print(f"⚠️ No {provider.name} LLM concurrency slot within {LLM_ACQUIRE_TIMEOUT_SECS:.0f}s")
+                continue
+            throttled = succeeded = False
+            try:
+                with llm_metrics.call(site, provider.model) as call:
+                    if retry or attempts:
+                        call.retry()
+                    attempts += 1
+                    try:
+                        content, usage = provider.generate(system_prompt, user_prompt, response_format)
+                        call.usage(*usage)
+                        result = parse_structured(content)
+                        succeeded = True
+                        return result, f"{provider.name}:{provider.model}"
+                    except LLMParseError as exc:
+                        call.parse_failure()
+                        call.failure()
+                        print(f"LLM extraction via {provider.name} returned unparseable output: {exc}")
+                    except LLMProviderError as exc:
+                        throttled = exc.throttled
+                        call.failure()
+                        print(f"LLM extraction via {provider.name} failed: {exc}")
+                    except Exception as exc:  # noqa: BLE001
+                        call.failure()
+                        print(f"LLM extraction via {provider.name} failed: {exc}")
+            finally:
+                provider.limiter.release(throttled=throttled, success=succeeded)
+        return None, None
+
+
+def provider_stats() -> Dict[str, Any]:
+    return {
+        name: {"configured": provider.configured, "model": provider.model, **provider.limiter.stats()}
+        for name, provider in PROVIDERS.items()
+    }
+
+
+# Conclusion extraction (services/llm.py) and quotation analysis (conversation_analysis_agent.py)
+extraction_client = LLMClient(LLM_EXTRACTION_PROVIDERS)
+analysis_client = LLMClient(LLM_ANALYSIS_PROVIDERS)
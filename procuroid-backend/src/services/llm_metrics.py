@@ -0,0 +1,198 @@
+"""
+Instrumentation for LLM calls.
+
+Every call to an LLM provider goes through ``llm_metrics.call(site, model)``,
+which records wall time, prompt/completion tokens, estimated cost, retries,
+parse failures and errors, labeled by call site and model. Aggregates are
+served by ``GET /metrics/llm``.
+
+Calls are also added to the summary of the enclosing ``llm_metrics.scope()``
+(an HTTP request, a transcript job), which is logged when the scope ends so
+the cost of a single request is visible. Scopes follow contextvars, so calls
+made via ``asyncio.to_thread`` count towards the caller's scope; calls made
+by the conclusion batcher's flush thread are shared between callers and only
+show up in the aggregates.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# USD per million (prompt, completion) tokens, by model name prefix. Override or
+# extend with LLM_PRICING='{"gpt-4o-mini": [0.15, 0.6]}'
+_DEFAULT_PRICING = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+}
+LLM_PRICING: Dict[str, Tuple[float, float]] = {
+    **_DEFAULT_PRICING,
+    **{model: tuple(price) for model, price in json.loads(os.getenv("LLM_PRICING") or "{}").items()},
+}
+
+# Upper bounds (seconds) of the latency histogram buckets
+_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, float("inf"))
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Estimated USD cost of one call, or None for a model without pricing."""
+    matches = [prefix for prefix in LLM_PRICING if model.startswith(prefix)]
+    if not matches:
+        return None
+    prompt_price, completion_price = LLM_PRICING[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class LLMCall:
+    """Handle for one in-flight call; report what the provider returned on it."""
+
+    __slots__ = ("prompt_tokens", "completion_tokens", "retries", "parse_failed", "failed")
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.retries = 0
+        self.parse_failed = False
+        self.failed = False
+
+    def usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        self.prompt_tokens += prompt_tokens or 0
+        self.completion_tokens += completion_tokens or 0
+
+    def retry(self) -> None:
+        self.retries += 1
+
+    def parse_failure(self) -> None:
+        self.parse_failed = True
+
+    def failure(self) -> None:
+        """Mark the call failed when the error is handled rather than raised."""
+        self.failed = True
+
+
+class _Totals:
+    __slots__ = (
+        "calls", "failures", "parse_failures", "retries",
+        "prompt_tokens", "completion_tokens", "cost_usd", "latency_secs", "max_latency_secs", "buckets",
+    )
+
+    def __init__(self):
+        self.calls = self.failures = self.parse_failures = self.retries = 0
+        self.prompt_tokens = self.completion_tokens = 0
+        self.cost_usd = self.latency_secs = self.max_latency_secs = 0.0
+        self.buckets = [0] * len(_LATENCY_BUCKETS)
+
+    def add(self, call: LLMCall, elapsed: float, cost: Optional[float]) -> None:
+        self.calls += 1
+        self.failures += call.failed
+        self.parse_failures += call.parse_failed
+        self.retries += call.retries
+        self.prompt_tokens += call.prompt_tokens
+        self.completion_tokens += call.completion_tokens
+        self.cost_usd += cost or 0.0
+        self.latency_secs += elapsed
+        self.max_latency_secs = max(self.max_latency_secs, elapsed)
+        self.buckets[next(i for i, bound in enumerate(_LATENCY_BUCKETS) if elapsed <= bound)] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "parse_failures": self.parse_failures,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "avg_latency_secs": round(self.latency_secs / self.calls, 3) if self.calls else None,
+            "max_latency_secs": round(self.max_latency_secs, 3),
+            "latency_histogram": {
+                ("+Inf" if bound == float("inf") else f"le_{bound:g}"): count
+                for bound, count in zip(_LATENCY_BUCKETS, self.buckets)
+            },
+        }
+
+
+class LLMMetrics:
+    """Process-wide LLM call aggregates keyed by (call site, model)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str], _Totals] = {}
+        self._scope: contextvars.ContextVar[Optional[_Totals]] = contextvars.ContextVar("llm_scope", default=None)
+
+    @contextlib.contextmanager
+    def call(self, site: str, model: str) -> Iterator[LLMCall]:
+        """Time one provider call. An exception escaping the block counts as a failure."""
+        call = LLMCall()
+        started = time.perf_counter()
+        try:
+            yield call
+        except BaseException:
+            call.failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            cost = estimate_cost(model, call.prompt_tokens, call.completion_tokens)
+            scope = self._scope.get()
+            with self._lock:
+                self._totals.setdefault((site, model), _Totals()).add(call, elapsed, cost)
+                if scope is not None:
+                    scope.add(call, elapsed, cost)
+
+    @contextlib.contextmanager
+    def scope(self, label: str) -> Iterator[_Totals]:
+        """Collect the LLM calls made within the block and log a one-line summary if there were any."""
+        token = self.start_scope()
+        try:
+            yield self._scope.get()
+        finally:
+            self.end_scope(token, label)
+
+    def start_scope(self) -> contextvars.Token:
+        """Begin collecting calls made in the current context (for request hooks); pair with ``end_scope``."""
+        return self._scope.set(_Totals())
+
+    def end_scope(self, token: contextvars.Token, label: str) -> None:
+        totals = self._scope.get()
+        self._scope.reset(token)
+        if totals is not None and totals.calls:
+            print(
+                f"🧮 LLM usage for {label}: {totals.calls} calls, {totals.latency_secs:.2f}s, "
+                f"{totals.prompt_tokens}+{totals.completion_tokens} tokens, ~${totals.cost_usd:.4f}"
+                + (f", {totals.failures} failed" if totals.failures else "")
+            )
+
+    def current_scope(self) -> Optional[_Totals]:
+        return self._scope.get()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            by_site = [
+                {"site": site, "model": model, **totals.as_dict()}
+                for (site, model), totals in sorted(self._totals.items())
+            ]
+            overall = _Totals()
+            for totals in self._totals.values():
+                for field in ("calls", "failures", "parse_failures", "retries", "prompt_tokens", "completion_tokens"):
+                    setattr(overall, field, getattr(overall, field) + getattr(totals, field))
+                overall.cost_usd += totals.cost_usd
+                overall.latency_secs += totals.latency_secs
+                overall.max_latency_secs = max(overall.max_latency_secs, totals.max_latency_secs)
+                overall.buckets = [a + b for a, b in zip(overall.buckets, totals.buckets)]
+        return {"total": overall.as_dict(), "by_site": by_site}
+
+
+# Shared by every LLM call site in this process.
+llm_metrics = LLMMetrics()
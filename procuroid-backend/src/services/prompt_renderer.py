@@ -0,0 +1,120 @@
+"""
+Segment-stitched text-to-speech for templated call prompts.
+
+A template such as ``"Hello {supplier_name}. We are requesting ..."`` is split
+into static segments (synthesized once and kept in the TTS cache) and
+variable segments (synthesized per call, concurrently). The audio of all
+segments is then stitched together, so rendering a prompt for a new supplier
+costs roughly one short variable-segment synthesis instead of the full text.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import string
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+PROMPT_RENDER_WORKERS = int(os.getenv("PROMPT_RENDER_WORKERS", "8"))
+
+# (is_variable, text_or_field_name)
+Segment = Tuple[bool, str]
+
+
+def split_template(template: str) -> List[Segment]:
+    """Split a ``str.format`` template into static text and named fields."""
+    segments: List[Segment] = []
+    for literal, field_name, _, _ in string.Formatter().parse(template):
+        if literal:
+            segments.append((False, literal))
+        if field_name:
+            segments.append((True, field_name))
+    return segments
+
+
+def _strip_mp3_tags(audio: bytes) -> bytes:
+    """Drop ID3v2 headers and ID3v1 trailers so MP3 frames can be concatenated."""
+    if audio[:3] == b"ID3" and len(audio) >= 10:
+        size = (audio[6] << 21) | (audio[7] << 14) | (audio[8] << 7) | audio[9]
+        footer = 10 if audio[5] & 0x10 else 0
+        audio = audio[10 + size + footer:]
+    if len(audio) >= 128 and audio[-128:-125] == b"TAG":
+        audio = audio[:-128]
+    return audio
+
+
+def stitch_audio(chunks: List[bytes], output_format: str) -> bytes:
+    """
+    Join independently synthesized clips of the same ``output_format``.
+
+    PCM and μ-law are headerless sample streams and simply concatenate;
+    MP3 clips are concatenated frame-wise after removing their ID3 tags.
+    """
+    if output_format.startswith("mp3"):
+        return b"".join(_strip_mp3_tags(chunk) for chunk in chunks)
+    if output_format.startswith(("pcm", "ulaw")):
+        return b"".join(chunks)
+    raise ValueError(f"Cannot stitch audio in format '{output_format}'")
+
+
+class SegmentedPromptRenderer:
+    """Renders a prompt template to audio, reusing pre-synthesized static segments."""
+
+    def __init__(
+        self,
+        template: str,
+        synthesize: Callable[[str], bytes],
+        output_format: str,
+        executor: Optional[concurrent.futures.Executor] = None,
+    ):
+        """
+        Args:
+            template: ``str.format`` style template with named fields
+            synthesize: Text-to-speech function (expected to be cache-backed)
+            output_format: Audio format ``synthesize`` produces, used for stitching
+            executor: Pool for concurrent segment synthesis (one is created if omitted)
+        """
+        self.template = template
+        self.segments = split_template(template)
+        self.synthesize = synthesize
+        self.output_format = output_format
+        self.executor = executor or concurrent.futures.ThreadPoolExecutor(
+            max_workers=PROMPT_RENDER_WORKERS,
+            thread_name_prefix="prompt-tts",
+        )
+
+    @property
+    def fields(self) -> List[str]:
+        return [text for is_variable, text in self.segments if is_variable]
+
+    def render_text(self, values: Dict[str, str]) -> str:
+        return self.template.format(**values)
+
+    def prewarm(self) -> None:
+        """Synthesize every static segment now so later renders only pay for variables."""
+        for is_variable, text in self.segments:
+            if not is_variable and text.strip():
+                self.synthesize(text.strip())
+
+    def stream(self, values: Dict[str, str]) -> Iterator[bytes]:
+        """
+        Yield each segment's audio in order. All segments are submitted at
+        once, so the first clip is available as soon as its own synthesis
+        (a cache hit for static text) completes.
+        """
+        futures = []
+        for is_variable, text in self.segments:
+            spoken = (str(values[text]) if is_variable else text).strip()
+            if spoken:
+                futures.append(self.executor.submit(self.synthesize, spoken))
+
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def render(self, values: Dict[str, str]) -> bytes:
+        """Full prompt audio with static and variable segments stitched together."""
+        return stitch_audio(list(self.stream(values)), self.output_format)
@@ -0,0 +1,188 @@
+"""
+Pre-fetched ElevenLabs signed conversation URLs.
+
+Connecting an answered call to an agent needs a signed WebSocket URL from
+ElevenLabs. Fetching it when Twilio hits the answer webhook puts an extra
+HTTPS round trip between the supplier picking up and hearing the agent, so
+this module keeps a small pool of signed URLs per agent_id, refilled in the
+background. URLs are single-use and expire, so each is handed out once and
+discarded when it gets within SIGNED_URL_REFRESH_MARGIN_SECS of expiry.
+"""
+
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import os
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+from .elevenlabs import ELEVENLABS_API_BASE_URL
+
+load_dotenv()
+
+SIGNED_URL_POOL_SIZE = int(os.getenv("SIGNED_URL_POOL_SIZE", "4"))
+# ElevenLabs signed URLs are valid for 15 minutes.
+SIGNED_URL_TTL_SECS = float(os.getenv("SIGNED_URL_TTL_SECS", "900"))
+SIGNED_URL_REFRESH_MARGIN_SECS = float(os.getenv("SIGNED_URL_REFRESH_MARGIN_SECS", "120"))
+# Agents to keep warm from startup (comma-separated); others are added on first use.
+# When set, signed URLs are only handed out for these agents.
+SIGNED_URL_AGENT_IDS = os.getenv("SIGNED_URL_AGENT_IDS", "")
+
+
+class SignedUrlError(RuntimeError):
+    """Raised when a signed conversation URL cannot be obtained."""
+
+
+def fetch_signed_url(agent_id: str) -> str:
+    """Request a fresh signed conversation URL for ``agent_id`` from ElevenLabs."""
+    api_key = os.getenv("ELEVENLABS_API_KEY")
+    if not api_key:
+        raise SignedUrlError("Missing ELEVENLABS_API_KEY environment variable")
+
+    try:
+        response = requests.get(
+            f"{ELEVENLABS_API_BASE_URL}/v1/convai/conversation/get_signed_url",
+            params={"agent_id": agent_id},
+            headers={"xi-api-key": api_key},
+            timeout=10,
+        )
+        response.raise_for_status()
+        return response.json()["signed_url"]
+    except (requests.exceptions.RequestException, KeyError, ValueError) as exc:
+        raise SignedUrlError(f"Failed to fetch signed URL for agent {agent_id}: {exc}") from exc
+
+
+class SignedUrlPool:
+    """Per-agent pools of signed URLs, topped up asynchronously."""
+
+    def __init__(
+        self,
+        size: int = SIGNED_URL_POOL_SIZE,
+        ttl: float = SIGNED_URL_TTL_SECS,
+        refresh_margin: float = SIGNED_URL_REFRESH_MARGIN_SECS,
+        fetch: Callable[[str], str] = fetch_signed_url,
+        allowed_agent_ids: Optional[Set[str]] = None,
+    ):
+        self.size = size
+        self.allowed_agent_ids = allowed_agent_ids
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.fetch = fetch
+        self._lock = threading.Lock()
+        self._pools: Dict[str, Deque[Tuple[str, float]]] = {}
+        self._refilling: Set[str] = set()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="signed-url")
+        self._refresher: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.fetch_errors = 0
+
+    def take(self, agent_id: str) -> str:
+        """
+        A signed URL for ``agent_id``: pre-fetched when one is available,
+        otherwise fetched inline. Either way the pool is refilled afterwards.
+
+        Raises:
+            SignedUrlError: If ``agent_id`` is not an allowed agent, or the fetch fails
+        """
+        if self.allowed_agent_ids and agent_id not in self.allowed_agent_ids:
+            raise SignedUrlError(f"Agent {agent_id} is not configured for signed URLs")
+        url = self._pop_fresh(agent_id)
+        self.warm(agent_id)
+        if url is not None:
+            return url
+        return self.fetch(agent_id)
+
+    def warm(self, agent_id: str) -> None:
+        """
+        Start filling the pool for ``agent_id`` in the background. The agent is
+        kept refreshed once a fetch for it has succeeded.
+        """
+        if self.allowed_agent_ids and agent_id not in self.allowed_agent_ids:
+            return
+        with self._lock:
+            if agent_id in self._refilling:
+                return
+            self._refilling.add(agent_id)
+        self._executor.submit(self._refill, agent_id)
+        self._ensure_refresher()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "fetch_errors": self.fetch_errors,
+                "agents": {
+                    agent_id: {
+                        "available": len(pool),
+                        "oldest_expires_in_secs": round(pool[0][1] - now, 1) if pool else None,
+                    }
+                    for agent_id, pool in self._pools.items()
+                },
+            }
+
+    def _pop_fresh(self, agent_id: str) -> Optional[str]:
+        deadline = time.monotonic() + self.refresh_margin
+        with self._lock:
+            pool = self._pools.get(agent_id, collections.deque())
+            while pool:
+                url, expires_at = pool.popleft()
+                if expires_at > deadline:
+                    self.hits += 1
+                    return url
+            self.misses += 1
+            return None
+
+    def _refill(self, agent_id: str) -> None:
+        try:
+            while True:
+                with self._lock:
+                    pool = self._pools.get(agent_id, collections.deque())
+                    deadline = time.monotonic() + self.refresh_margin
+                    while pool and pool[0][1] <= deadline:
+                        pool.popleft()
+                    if len(pool) >= self.size:
+                        return
+                try:
+                    url = self.fetch(agent_id)
+                except Exception as e:
+                    with self._lock:
+                        self.fetch_errors += 1
+                    print(f"⚠️ Signed URL prefetch failed for agent {agent_id}: {e}")
+                    return
+                with self._lock:
+                    self._pools.setdefault(agent_id, collections.deque()).append((url, time.monotonic() + self.ttl))
+        finally:
+            with self._lock:
+                self._refilling.discard(agent_id)
+
+    def _ensure_refresher(self) -> None:
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, name="signed-url-refresh", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        # Replace URLs before they expire even when no calls are being taken
+        interval = max(5.0, self.refresh_margin / 2)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                agent_ids = list(self._pools)
+            for agent_id in agent_ids:
+                self.warm(agent_id)
+
+
+# Shared pool used by the TwiML answer webhook and call initiation.
+_configured_agent_ids = set(filter(None, (a.strip() for a in SIGNED_URL_AGENT_IDS.split(","))))
+signed_url_pool = SignedUrlPool(allowed_agent_ids=_configured_agent_ids or None)
+for _agent_id in _configured_agent_ids:
+    signed_url_pool.warm(_agent_id)
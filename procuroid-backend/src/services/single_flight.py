@@ -0,0 +1,312 @@
+"""
+Single-flight de-duplication for outbound quote requests.
+
+Concurrent identical requests (a resubmitted form, or two users asking the
+same supplier about the same product) share one in-flight call: the first
+caller runs it, everyone else blocks on its outcome and receives the same
+result. Successful results stay shared for SINGLE_FLIGHT_WINDOW_SECS after
+completion so a quick resubmission does not place a second call; failures
+are never retained.
+
+Within a process callers wait on the leader directly. Across gunicorn
+workers the key is claimed in a SQLite file (WAL mode), and the finished
+result is stored there as JSON; a caller in another worker polls for it, and
+takes over if the leader failed or its worker died (its lease, refreshed
+while it runs, lapses). Waits are capped below the worker timeout.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SINGLE_FLIGHT_WINDOW_SECS = float(os.getenv("SINGLE_FLIGHT_WINDOW_SECS", "120"))
+# How long a follower waits for the leader before giving up. Must stay below
+# gunicorn's --timeout (120s), or the worker is killed while waiting.
+SINGLE_FLIGHT_WAIT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT", "90"))
+# How long a running claim survives without a refresh from its leader. Longer than the
+# call admission wait plus the provider request, so a slow leader is never taken over.
+SINGLE_FLIGHT_LEASE_SECS = float(os.getenv("SINGLE_FLIGHT_LEASE_SECS", "180"))
+SINGLE_FLIGHT_PATH = os.getenv(
+    "SINGLE_FLIGHT_PATH", os.path.join(tempfile.gettempdir(), "procuroid-single-flight.sqlite3")
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS single_flights (
+    key TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    result TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+"""
+
+# How often a caller waiting on another worker's flight checks for its result
+_SHARED_POLL_SECS = 0.2
+# How often a leader refreshes its running claim
+_HEARTBEAT_SECS = 10.0
+
+
+class SingleFlightTimeout(RuntimeError):
+    """Raised when a coalesced caller gives up waiting for the in-flight call."""
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip().lower()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items() if v not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    """Digits of a phone number, keeping a leading '+'."""
+    phone = (phone or "").strip()
+    digits = re.sub(r"\D", "", phone)
+    return f"+{digits}" if phone.startswith("+") else digits
+
+
+def quote_request_key(phone: Optional[str], product_spec: Any) -> str:
+    """
+    Key identifying "the same quote request": the supplier's phone number and
+    the product specification with case, whitespace and empty fields ignored.
+    """
+    material = json.dumps([normalize_phone(phone), _normalize(product_spec)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error", "followers", "finished_at")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self.finished_at: Optional[float] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto a single execution."""
+
+    def __init__(
+        self,
+        window: float = SINGLE_FLIGHT_WINDOW_SECS,
+        wait_timeout: float = SINGLE_FLIGHT_WAIT_TIMEOUT,
+        lease_secs: float = SINGLE_FLIGHT_LEASE_SECS,
+        path: str = SINGLE_FLIGHT_PATH,
+    ):
+        self.window = window
+        self.wait_timeout = wait_timeout
+        self.lease_secs = lease_secs
+        self.path = path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._flights: Dict[str, _Flight] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` unless an identical request is in flight or finished within
+        the window. Returns ``(result, shared)`` where ``shared`` is True when
+        the result came from another caller's execution. Exceptions raised by
+        a leader in this process are re-raised in every waiting caller.
+        ``fn`` must return something JSON-serializable to be shared across workers.
+        """
+        wait = self.wait_timeout if timeout is None else timeout
+        with self._lock:
+            self._expire(time.monotonic())
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+
+        if not leader:
+            if not flight.done.wait(wait):
+                raise SingleFlightTimeout(f"Timed out after {wait:.0f}s waiting for an identical in-flight request")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result, shared = self._run_shared(key, fn, wait)
+        except BaseException as exc:
+            flight.error = exc
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            raise
+        finally:
+            flight.finished_at = time.monotonic()
+            flight.done.set()
+        return flight.result, shared
+
+    def forget(self, key: str) -> None:
+        """Drop a retained result so the next identical request runs again."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.done.is_set():
+                del self._flights[key]
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM single_flights WHERE key = ? AND status = 'done'", (key,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "in_flight": sum(1 for f in self._flights.values() if not f.done.is_set()),
+                "retained": sum(1 for f in self._flights.values() if f.done.is_set()),
+                "executions_total": self.executions,
+                "coalesced_total": self.coalesced,
+                "window_secs": self.window,
+                "wait_timeout_secs": self.wait_timeout,
+                "lease_secs": self.lease_secs,
+            }
+
+    def _run_shared(self, key: str, fn: Callable[[], Any], wait: float) -> Tuple[Any, bool]:
+        """Run ``fn`` as the host-wide leader for ``key``, or take the result of another worker's run."""
+        deadline = time.monotonic() + wait
+        while True:
+            claimed, result = self._claim(key)
+            if claimed is not None:
+                break
+            if result is not None:
+                with self._lock:
+                    self.coalesced += 1
+                return json.loads(result), True
+            if time.monotonic() >= deadline:
+                raise SingleFlightTimeout(f"Timed out after {wait:.0f}s waiting for an identical in-flight request")
+            time.sleep(_SHARED_POLL_SECS)
+
+        with self._lock:
+            self.executions += 1
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(key, claimed, stop), daemon=True)
+        heartbeat.start()
+        try:
+            value = fn()
+        except BaseException:
+            self._release(key)
+            raise
+        finally:
+            stop.set()
+            heartbeat.join()
+        self._store(key, value)
+        return value, False
+
+    def _heartbeat(self, key: str, started_at: float, stop: threading.Event) -> None:
+        """Keep this leader's running claim fresh until ``stop`` is set."""
+        try:
+            while not stop.wait(_HEARTBEAT_SECS):
+                now = time.time()
+                conn = self._conn()
+                with conn:
+                    refreshed = conn.execute(
+                        "UPDATE single_flights SET started_at = ? WHERE key = ? AND status = 'running' AND started_at = ?",
+                        (now, key, started_at),
+                    ).rowcount
+                if not refreshed:
+                    return
+                started_at = now
+        except sqlite3.Error as e:
+            print(f"⚠️ Single-flight heartbeat failed for {key[:12]}: {e}")
+
+    def _claim(self, key: str) -> Tuple[Optional[float], Optional[str]]:
+        """
+        (claim time, None) if this caller now leads ``key``; (None, result JSON)
+        if a retained result exists; (None, None) while another worker is running it.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT status, result, started_at, finished_at FROM single_flights WHERE key = ?", (key,)
+            ).fetchone()
+            # A finished result past the window, or a run whose worker died, no longer counts
+            if row is not None and (
+                (row[0] == "done" and now - row[3] >= self.window)
+                or (row[0] == "running" and now - row[2] >= self.lease_secs)
+            ):
+                row = None
+            if row is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO single_flights (key, status, result, started_at, finished_at) "
+                    "VALUES (?, 'running', NULL, ?, NULL)",
+                    (key, now),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return now, None
+        return None, row[1] if row[0] == "done" else None
+
+    def _store(self, key: str, value: Any) -> None:
+        try:
+            result = json.dumps(value)
+        except (TypeError, ValueError):
+            # Not shareable across workers; only this process's followers get it
+            self._release(key)
+            return
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "UPDATE single_flights SET status = 'done', result = ?, finished_at = ? WHERE key = ?",
+                (result, now, key),
+            )
+            conn.execute(
+                "DELETE FROM single_flights WHERE status = 'done' AND finished_at < ?", (now - self.window,)
+            )
+
+    def _release(self, key: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM single_flights WHERE key = ? AND status = 'running'", (key,))
+
+    def _expire(self, now: float) -> None:
+        # Caller holds self._lock
+        stale = [
+            key for key, flight in self._flights.items()
+            if flight.finished_at is not None and now - flight.finished_at >= self.window
+        ]
+        for key in stale:
+            del self._flights[key]
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit mode with explicit transactions.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+# Shared across the quote request and outbound call endpoints.
+quote_request_flights = SingleFlight()
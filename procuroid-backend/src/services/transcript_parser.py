@@ -0,0 +1,181 @@
+"""
+Streaming parser for ElevenLabs post-call webhook bodies.
+
+Post-call payloads for long calls carry the full transcript plus tool calls,
+tool results, per-turn metrics and metadata, most of which we never read.
+Rather than loading the whole document with ``request.get_json()``, the body
+is read in one pass with ijson and only the fields used downstream are kept:
+agent/user turns, the analysis summary and success flag, and the call
+identifiers and timing from metadata. The result has the same shape as the
+original payload (``{"type", "event_timestamp", "data": {...}}``), so it can
+be queued and handed to ``process_transcript`` unchanged.
+"""
+
+from __future__ import annotations
+
+from typing import IO, Any, Dict, List, Optional
+
+import ijson
+
+# Scalar fields kept, by their full prefix in the body
+_DATA_FIELDS = {
+    f"data.{field}": field
+    for field in (
+        "conversation_id",
+        "agent_id",
+        "user_id",
+        "id",
+        "status",
+        "call_connected",
+        "event_timestamp",
+        "transcript_summary",
+    )
+}
+_ANALYSIS_FIELDS = {
+    f"data.analysis.{field}": field for field in ("transcript_summary", "summary", "call_successful")
+}
+_NESTED_SUMMARY_FIELDS = {
+    f"data.analysis.transcript_summary.{field}": field for field in ("text", "summary")
+}
+_PHONE_CALL_FIELDS = {
+    f"data.metadata.phone_call.{field}": field
+    for field in ("call_sid", "direction", "external_number", "agent_number")
+}
+_METADATA = "data.metadata."
+_TOP_FIELDS = {"type", "event_timestamp"}
+_SPEAKERS = {"agent", "user"}
+_SCALARS = {"string", "number", "boolean", "null"}
+
+# Arrays of turns: item prefix -> whether they are conversation messages
+# (preferred) or transcript entries
+_TURN_ITEMS = {
+    "data.conversation.messages.item": True,
+    "data.conversation.item": True,
+    "data.transcript.item": False,
+}
+
+
+class TranscriptPayloadError(ValueError):
+    """Raised when a webhook body is not a JSON object."""
+
+
+class _Turn:
+    __slots__ = ("role", "texts", "direct")
+
+    def __init__(self):
+        self.role: Optional[str] = None
+        self.texts: List[str] = []  # content block texts
+        self.direct: Optional[str] = None  # "message" / "text" field
+
+
+class _BodyReader:
+    """
+    File-like view of a request body. ijson probes the stream with ``read(0)``,
+    which werkzeug's input stream reports as a client disconnect.
+    """
+
+    __slots__ = ("_stream",)
+
+    def __init__(self, stream: IO[bytes]):
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        return self._stream.read(size) if size else b""
+
+
+def parse_transcript_stream(stream: IO[bytes]) -> Dict[str, Any]:
+    """
+    Read a post-call webhook body from ``stream`` in a single pass and return
+    the compact payload. Turns are taken from ``conversation`` messages when
+    present, otherwise from ``transcript``, matching ``process_transcript``.
+
+    Raises:
+        TranscriptPayloadError: If the body is not a JSON object
+    """
+    top: Dict[str, Any] = {}
+    data: Dict[str, Any] = {}
+    analysis: Dict[str, Any] = {}
+    metadata: Dict[str, Any] = {}
+    phone_call: Dict[str, Any] = {}
+    message_turns: List[Dict[str, str]] = []
+    transcript_turns: List[Dict[str, str]] = []
+    seen_root = False
+
+    # State of the turn being read; most events fall inside a turn, so these
+    # prefixes are compared directly instead of being split per event
+    turn: Optional[_Turn] = None
+    turn_item = turn_role = turn_message = turn_text = turn_block_text = ""
+    turn_is_message = False
+
+    try:
+        for prefix, event, value in ijson.parse(_BodyReader(stream), use_float=True):
+            if turn is not None:
+                if prefix == turn_item:
+                    if event == "end_map":
+                        _append_turn(message_turns if turn_is_message else transcript_turns, turn)
+                        turn = None
+                elif event == "string" and value:
+                    if prefix == turn_role:
+                        turn.role = value
+                    elif prefix == turn_block_text:
+                        turn.texts.append(value)
+                    elif (prefix == turn_message or prefix == turn_text) and turn.direct is None:
+                        turn.direct = value
+                continue
+
+            if event not in _SCALARS:
+                if event == "start_map":
+                    if not seen_root:
+                        seen_root = True
+                    elif prefix in _TURN_ITEMS:
+                        turn = _Turn()
+                        turn_is_message = _TURN_ITEMS[prefix]
+                        turn_item = prefix
+                        turn_role = f"{prefix}.role"
+                        turn_message = f"{prefix}.message"
+                        turn_text = f"{prefix}.text"
+                        turn_block_text = f"{prefix}.content.item.text"
+                elif not seen_root:
+                    break
+                continue
+            if not seen_root:
+                break
+
+            if prefix in _DATA_FIELDS:
+                data[_DATA_FIELDS[prefix]] = value
+            elif prefix in _TOP_FIELDS:
+                top[prefix] = value
+            elif prefix in _ANALYSIS_FIELDS:
+                analysis[_ANALYSIS_FIELDS[prefix]] = value
+            elif prefix in _NESTED_SUMMARY_FIELDS:
+                nested = analysis.get("transcript_summary")
+                if not isinstance(nested, dict):
+                    nested = analysis["transcript_summary"] = {}
+                nested.setdefault(_NESTED_SUMMARY_FIELDS[prefix], value)
+            elif prefix in _PHONE_CALL_FIELDS:
+                phone_call[_PHONE_CALL_FIELDS[prefix]] = value
+            elif prefix.startswith(_METADATA) and "." not in prefix[len(_METADATA):]:
+                metadata[prefix[len(_METADATA):]] = value
+    except ijson.JSONError as exc:
+        raise TranscriptPayloadError("Webhook body is not valid JSON") from exc
+
+    if not seen_root:
+        raise TranscriptPayloadError("Webhook body must be a JSON object")
+
+    if phone_call:
+        metadata["phone_call"] = phone_call
+    if analysis:
+        data["analysis"] = analysis
+    if metadata:
+        data["metadata"] = metadata
+    data["transcript"] = message_turns or transcript_turns
+    return {**top, "data": data}
+
+
+def _append_turn(target: List[Dict[str, str]], turn: _Turn) -> None:
+    if turn.role not in _SPEAKERS:
+        return
+    for text in turn.texts:
+        target.append({"role": turn.role, "message": text})
+    if turn.direct:
+        target.append({"role": turn.role, "message": turn.direct})
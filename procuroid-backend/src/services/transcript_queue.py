@@ -0,0 +1,268 @@
+"""
+Durable work queue for post-call transcript webhooks.
+
+The webhook only validates the payload, inserts it into the Supabase
+``transcript_jobs`` table (committed before the 200 is returned) and
+acknowledges; the jobs are then processed either by this process's worker
+threads or by ``POST /quotation-agent/transcript/queue/drain``, which runs
+them inside a request for deployments that only get CPU while serving one
+(Cloud Run's default). Jobs are leased with ``FOR UPDATE SKIP LOCKED`` (see
+database_migrations/create_transcript_jobs.sql), so any number of instances
+can share the queue and a job held by a crashed worker is picked up again
+once its lease expires. Failed jobs are retried with backoff up to
+TRANSCRIPT_QUEUE_MAX_ATTEMPTS. Payloads are de-duplicated by the caller's
+dedupe key, so ElevenLabs webhook retries do not re-run extraction.
+"""
+
+from __future__ import annotations
+
+import collections
+import os
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .database import supabase_admin
+from .llm_metrics import llm_metrics
+
+load_dotenv()
+
+# Worker threads per process. Set to 0 where the instance gets no CPU outside
+# requests and drain the queue through the drain endpoint instead.
+TRANSCRIPT_WORKERS = int(os.getenv("TRANSCRIPT_WORKERS", "4"))
+TRANSCRIPT_QUEUE_MAX_ATTEMPTS = int(os.getenv("TRANSCRIPT_QUEUE_MAX_ATTEMPTS", "5"))
+# Seconds a worker may hold a job before another worker may take it over.
+TRANSCRIPT_QUEUE_LEASE_SECS = float(os.getenv("TRANSCRIPT_QUEUE_LEASE_SECS", "300"))
+# How long finished jobs are kept (for de-duplication and inspection).
+TRANSCRIPT_QUEUE_RETENTION_SECS = float(os.getenv("TRANSCRIPT_QUEUE_RETENTION_SECS", str(24 * 3600)))
+# Seconds one drain request keeps claiming new jobs; keep it well under the request timeout.
+TRANSCRIPT_QUEUE_DRAIN_SECS = float(os.getenv("TRANSCRIPT_QUEUE_DRAIN_SECS", "60"))
+# Bearer token the drain endpoint requires (Cloud Scheduler / Cloud Tasks); unset disables the endpoint.
+TRANSCRIPT_QUEUE_DRAIN_TOKEN = os.getenv("TRANSCRIPT_QUEUE_DRAIN_TOKEN", "")
+
+_TABLE = "transcript_jobs"
+_STATUSES = ("pending", "processing", "done", "failed")
+
+_LATENCY_WINDOW = 512
+
+
+class TranscriptQueue:
+    """Supabase-backed job queue with a worker pool that runs ``handler`` per payload."""
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Any],
+        client: Any = None,
+        workers: int = TRANSCRIPT_WORKERS,
+        max_attempts: int = TRANSCRIPT_QUEUE_MAX_ATTEMPTS,
+        lease_secs: float = TRANSCRIPT_QUEUE_LEASE_SECS,
+        retention_secs: float = TRANSCRIPT_QUEUE_RETENTION_SECS,
+    ):
+        self.handler = handler
+        self.client = client if client is not None else supabase_admin
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_secs = lease_secs
+        self.retention_secs = retention_secs
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._queue_waits: Deque[float] = collections.deque(maxlen=_LATENCY_WINDOW)
+        self._processing_times: Deque[float] = collections.deque(maxlen=_LATENCY_WINDOW)
+        self.processed = 0
+        self.failures = 0
+        self.duplicates = 0
+
+    # ------------------------------------------------------------------ #
+    # Producer side
+    # ------------------------------------------------------------------ #
+
+    def enqueue(self, payload: Dict[str, Any], dedupe_key: Optional[str] = None) -> Tuple[Optional[int], bool]:
+        """
+        Durably store ``payload`` for processing. Returns ``(job_id, duplicate)``;
+        a payload whose ``dedupe_key`` was already queued is not stored again.
+        """
+        table = self._table()
+        inserted = table.upsert(
+            {"dedupe_key": dedupe_key, "payload": payload},
+            on_conflict="dedupe_key",
+            ignore_duplicates=True,
+        ).execute()
+        if not inserted.data:
+            with self._lock:
+                self.duplicates += 1
+            existing = table.select("id").eq("dedupe_key", dedupe_key).limit(1).execute()
+            return (existing.data[0]["id"] if existing.data else None), True
+
+        self.start()
+        self._wakeup.set()
+        return inserted.data[0]["id"], False
+
+    # ------------------------------------------------------------------ #
+    # Workers
+    # ------------------------------------------------------------------ #
+
+    def start(self) -> None:
+        """Start the worker pool (idempotent). Also drains jobs left by a previous run."""
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return
+            if self.client is None:
+                print("⚠️ Supabase admin client not configured; transcript workers not started")
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"transcript-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def drain(self, max_secs: float = TRANSCRIPT_QUEUE_DRAIN_SECS) -> int:
+        """
+        Process ready jobs in the calling thread until none is left or
+        ``max_secs`` have passed (a job already started runs to completion).
+        Returns the number of jobs run.
+        """
+        deadline = time.monotonic() + max_secs
+        ran = 0
+        while time.monotonic() < deadline and self.run_once():
+            ran += 1
+        if ran:
+            self._prune()
+        return ran
+
+    def run_once(self) -> bool:
+        """Claim and process one ready job. Returns False when nothing was ready."""
+        job = self._claim()
+        if job is None:
+            return False
+
+        job_id, payload, enqueued_at, attempts = job
+        started = time.time()
+        with self._lock:
+            self._queue_waits.append(started - enqueued_at)
+        try:
+            with llm_metrics.scope(f"transcript job {job_id}"):
+                self.handler(payload)
+        except Exception as e:
+            print(f"❌ Transcript job {job_id} failed (attempt {attempts}): {e}")
+            traceback.print_exc()
+            self._fail(job_id, attempts, str(e))
+            return True
+
+        with self._lock:
+            self._processing_times.append(time.time() - started)
+            self.processed += 1
+        self._finish(job_id, attempts)
+        return True
+
+    def _work(self) -> None:
+        last_prune = 0.0
+        while True:
+            try:
+                if self.run_once():
+                    continue
+                if time.time() - last_prune > 60:
+                    self._prune()
+                    last_prune = time.time()
+            except Exception as e:
+                print(f"⚠️ Transcript queue error: {e}")
+            # Nothing ready: wait for an enqueue in this process, or poll for
+            # jobs enqueued by other instances / retries becoming due.
+            self._wakeup.wait(1.0)
+            self._wakeup.clear()
+
+    def _claim(self) -> Optional[Tuple[int, Dict[str, Any], float, int]]:
+        claimed = self._rpc("claim_transcript_job", {"lease_secs": self.lease_secs})
+        if not claimed.data:
+            return None
+        row = claimed.data[0]
+        return row["id"], row["payload"], datetime.fromisoformat(row["enqueued_at"]).timestamp(), row["attempts"]
+
+    def _finish(self, job_id: int, attempts: int) -> None:
+        # Matching on attempts keeps a worker whose lease was taken over from
+        # overwriting the newer attempt's state
+        self._table().update({
+            "status": "done",
+            "finished_at": _timestamp(),
+            "leased_until": None,
+            "payload": {},
+        }).eq("id", job_id).eq("attempts", attempts).execute()
+
+    def _fail(self, job_id: int, attempts: int, error: str) -> None:
+        with self._lock:
+            self.failures += 1
+        if attempts >= self.max_attempts:
+            updates = {"status": "failed", "finished_at": _timestamp(), "leased_until": None, "last_error": error}
+        else:
+            backoff = min(300.0, 5.0 * 2 ** (attempts - 1))
+            updates = {
+                "status": "pending",
+                "available_at": _timestamp(backoff),
+                "leased_until": None,
+                "last_error": error,
+            }
+        self._table().update(updates).eq("id", job_id).eq("attempts", attempts).execute()
+
+    def _prune(self) -> None:
+        self._table().delete().eq("status", "done").lt("finished_at", _timestamp(-self.retention_secs)).execute()
+
+    # ------------------------------------------------------------------ #
+    # Metrics
+    # ------------------------------------------------------------------ #
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth by status, age of the oldest waiting job and latency percentiles."""
+        counts = {
+            status: self._table().select("id", count="exact", head=True).eq("status", status).execute().count or 0
+            for status in _STATUSES
+        }
+        oldest = self._table().select("enqueued_at").in_("status", ["pending", "processing"])\
+            .order("enqueued_at").limit(1).execute().data
+        with self._lock:
+            waits = sorted(self._queue_waits)
+            times = sorted(self._processing_times)
+            totals = {
+                "processed_total": self.processed,
+                "failures_total": self.failures,
+                "duplicates_total": self.duplicates,
+            }
+        return {
+            "depth": counts["pending"],
+            "processing": counts["processing"],
+            "failed": counts["failed"],
+            "done_retained": counts["done"],
+            "oldest_waiting_secs": (
+                round(time.time() - datetime.fromisoformat(oldest[0]["enqueued_at"]).timestamp(), 3) if oldest else None
+            ),
+            "queue_wait_secs": _percentiles(waits),
+            "processing_secs": _percentiles(times),
+            "workers": len(self._threads),
+            **totals,
+        }
+
+    def _table(self):
+        if self.client is None:
+            raise RuntimeError("Supabase admin client not configured; cannot use the transcript queue")
+        return self.client.table(_TABLE)
+
+    def _rpc(self, name: str, params: Dict[str, Any]):
+        if self.client is None:
+            raise RuntimeError("Supabase admin client not configured; cannot use the transcript queue")
+        return self.client.rpc(name, params).execute()
+
+
+def _timestamp(offset_secs: float = 0.0) -> str:
+    return (datetime.now(timezone.utc) + timedelta(seconds=offset_secs)).isoformat()
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    return {
+        "p50": round(values[len(values) // 2], 3),
+        "p95": round(values[int(0.95 * (len(values) - 1))], 3),
+        "max": round(values[-1], 3),
+    }
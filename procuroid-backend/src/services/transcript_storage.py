@@ -0,0 +1,133 @@
+"""
+Cold storage for long call transcripts and summaries.
+
+supplier_calls is scanned constantly (polling listener, analysis agent), so
+large text columns are kept out of the row: text of at least
+TRANSCRIPT_OFFLOAD_THRESHOLD_BYTES is zstd-compressed into the
+TRANSCRIPT_STORAGE_BUCKET Supabase storage bucket and the row keeps only the
+object path and the SHA-256 of the text. Readers go through
+``load_cold_text``, which returns inline text as-is and downloads offloaded
+text on first use, verifying the hash. Objects are content-addressed, so
+downloads are cached without invalidation.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import zstandard
+from dotenv import load_dotenv
+
+from .database import supabase_admin
+
+load_dotenv()
+
+TRANSCRIPT_STORAGE_BUCKET = os.getenv("TRANSCRIPT_STORAGE_BUCKET", "call-transcripts")
+TRANSCRIPT_OFFLOAD_THRESHOLD_BYTES = int(os.getenv("TRANSCRIPT_OFFLOAD_THRESHOLD_BYTES", "8192"))
+TRANSCRIPT_ZSTD_LEVEL = int(os.getenv("TRANSCRIPT_ZSTD_LEVEL", "10"))
+TRANSCRIPT_CACHE_SIZE = int(os.getenv("TRANSCRIPT_CACHE_SIZE", "256"))
+
+# supplier_calls columns needed to read the transcript and summary
+TRANSCRIPT_COLUMNS = (
+    "transcript, transcript_path, transcript_sha256, "
+    "summary, summary_path, summary_sha256"
+)
+
+
+class TranscriptStorageError(RuntimeError):
+    """Raised when offloaded text cannot be stored or read back intact."""
+
+
+def cold_columns(call_id: str, field: str, text: Optional[str]) -> Dict[str, Any]:
+    """
+    supplier_calls columns for storing ``text`` in ``field``: the text itself
+    when it is small, otherwise a pointer to a compressed copy uploaded now.
+    """
+    data = (text or "").encode("utf-8")
+    if len(data) < TRANSCRIPT_OFFLOAD_THRESHOLD_BYTES:
+        return {field: text, f"{field}_path": None, f"{field}_sha256": None}
+
+    if not supabase_admin:
+        raise TranscriptStorageError("Supabase admin client not initialized")
+
+    digest = hashlib.sha256(data).hexdigest()
+    path = f"{call_id}/{field}-{digest[:16]}.txt.zst"
+    compressed = zstandard.ZstdCompressor(level=TRANSCRIPT_ZSTD_LEVEL).compress(data)
+    try:
+        supabase_admin.storage.from_(TRANSCRIPT_STORAGE_BUCKET).upload(
+            path,
+            compressed,
+            file_options={"content-type": "application/zstd", "upsert": "true"},
+        )
+    except Exception as e:
+        raise TranscriptStorageError(f"Failed to upload {field} for call {call_id}: {e}") from e
+
+    print(f"🧊 Offloaded {field} for call {call_id}: {len(data)} -> {len(compressed)} bytes")
+    return {field: None, f"{field}_path": path, f"{field}_sha256": digest}
+
+
+def load_cold_text(row: Dict[str, Any], field: str) -> Optional[str]:
+    """The text of ``field`` in a supplier_calls row, fetching it from storage if offloaded."""
+    if row.get(field) is not None:
+        return row[field]
+    path = row.get(f"{field}_path")
+    if not path:
+        return None
+    return _download(path, row.get(f"{field}_sha256") or "")
+
+
+def get_call_transcript(call_id: str) -> dict:
+    """
+    Get the full transcript and summary of a supplier call.
+
+    Args:
+        call_id: The call's conversation id (supplier_calls.call_id)
+
+    Returns:
+        dict: Response with transcript and summary or error message
+    """
+    try:
+        if not supabase_admin:
+            return {"success": False, "error": "Supabase admin client not initialized"}
+
+        response = supabase_admin.table("supplier_calls")\
+            .select(f"call_id, {TRANSCRIPT_COLUMNS}")\
+            .eq("call_id", call_id)\
+            .limit(1)\
+            .execute()
+
+        if not response.data:
+            return {"success": False, "error": "Call not found"}
+
+        row = response.data[0]
+        return {
+            "success": True,
+            "call_id": call_id,
+            "transcript": load_cold_text(row, "transcript"),
+            "summary": load_cold_text(row, "summary"),
+        }
+    except Exception as e:
+        print(f"Get call transcript error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+def cache_stats() -> Dict[str, int]:
+    return _download.cache_info()._asdict()
+
+
+@lru_cache(maxsize=TRANSCRIPT_CACHE_SIZE)
+def _download(path: str, sha256: str) -> str:
+    if not supabase_admin:
+        raise TranscriptStorageError("Supabase admin client not initialized")
+    try:
+        compressed = supabase_admin.storage.from_(TRANSCRIPT_STORAGE_BUCKET).download(path)
+        data = zstandard.ZstdDecompressor().decompress(compressed)
+    except Exception as e:
+        raise TranscriptStorageError(f"Failed to read {path}: {e}") from e
+
+    if sha256 and hashlib.sha256(data).hexdigest() != sha256:
+        raise TranscriptStorageError(f"Hash mismatch for {path}")
+    return data.decode("utf-8")
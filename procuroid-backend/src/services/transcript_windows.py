@@ -0,0 +1,80 @@
+"""
+Splitting call transcripts into token-bounded windows for map-reduce extraction.
+
+Transcripts are stored as one "Speaker: text" line per turn (see
+``transcripts.transcript_rows``). Windows break only between turns, and
+each window after the first repeats the last ``overlap_turns`` turns of the
+previous one so an answer is not separated from the question it answers.
+A single turn longer than the budget is split on whitespace.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List
+
+# Rough token accounting, as in services/llm.py (about 4 characters per token)
+CHARS_PER_TOKEN = 4
+
+_TURN_START = re.compile(r"^(?:Agent|User|Supplier|Buyer|Assistant)\s*:", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def transcript_turns(transcript: str) -> List[str]:
+    """The turns of a transcript; lines not starting with a speaker continue the previous turn."""
+    turns: List[str] = []
+    for line in transcript.splitlines():
+        if not line.strip():
+            continue
+        if turns and not _TURN_START.match(line):
+            turns[-1] += "\n" + line
+        else:
+            turns.append(line)
+    return turns
+
+
+def split_transcript(transcript: str, max_tokens: int, overlap_turns: int = 1) -> List[str]:
+    """
+    ``transcript`` as consecutive windows of whole turns, each at most about
+    ``max_tokens`` tokens. A transcript within the budget is one window.
+    """
+    if estimate_tokens(transcript) <= max_tokens:
+        return [transcript]
+
+    turns = [piece for turn in transcript_turns(transcript) for piece in _split_turn(turn, max_tokens)]
+    windows: List[List[str]] = []
+    window: List[str] = []
+    tokens = 0
+    for turn in turns:
+        turn_tokens = estimate_tokens(turn)
+        if window and tokens + turn_tokens > max_tokens:
+            windows.append(window)
+            # Carry context over, as long as it leaves room for the new turn
+            window = window[-overlap_turns:] if overlap_turns else []
+            while window and sum(map(estimate_tokens, window)) + turn_tokens > max_tokens:
+                window = window[1:]
+            tokens = sum(map(estimate_tokens, window))
+        window.append(turn)
+        tokens += turn_tokens
+    if window:
+        windows.append(window)
+    return ["\n".join(window) for window in windows]
+
+
+def _split_turn(turn: str, max_tokens: int) -> List[str]:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(turn) <= max_chars:
+        return [turn]
+    pieces = []
+    while len(turn) > max_chars:
+        cut = turn.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(turn[:cut])
+        turn = turn[cut:].lstrip()
+    if turn:
+        pieces.append(turn)
+    return pieces
@@ -0,0 +1,296 @@
+"""
+Processing of ElevenLabs post-call transcript webhooks.
+
+Turns the webhook payload into a call report (dialogue, summary, connection
+status and the LLM-extracted conclusion) and stores it on the matching
+supplier_calls row (long text in cold storage, see transcript_storage), with
+one supplier_call_turns row per turn. Runs on the transcript queue's workers,
+off the webhook's request path.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from postgrest.types import ReturnMethod
+
+from .database import supabase_admin
+from .live_transcripts import live_transcripts
+from .llm import conclusion_batcher
+from .transcript_queue import TranscriptQueue
+from .transcript_storage import cold_columns
+
+load_dotenv()
+
+# Rows per request when writing supplier_call_turns
+TRANSCRIPT_TURNS_BATCH_SIZE = int(os.getenv("TRANSCRIPT_TURNS_BATCH_SIZE", "500"))
+
+
+class TranscriptProcessingError(RuntimeError):
+    """Raised when a transcript cannot be stored (the queue will retry it)."""
+
+
+def call_identifiers(payload: Any) -> Tuple[Optional[str], Optional[str]]:
+    """(conversation_id, Twilio call SID) of a webhook payload, without parsing the transcript."""
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if not isinstance(data, dict):
+        data = payload if isinstance(payload, dict) else {}
+    metadata = data.get("metadata") if isinstance(data.get("metadata"), dict) else {}
+    phone_call = metadata.get("phone_call") if isinstance(metadata.get("phone_call"), dict) else {}
+    return data.get("conversation_id") or data.get("id"), phone_call.get("call_sid")
+
+
+def _turn(role: str, text: str) -> Dict[str, str]:
+    return {"speaker": "Agent" if role == "agent" else "User", "text": text}
+
+
+def transcript_rows(call_id: str, turns: List[Dict[str, str]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    The newline-joined transcript text and its supplier_call_turns rows, where
+    each row's offsets delimit the turn's line within that text.
+    """
+    lines = []
+    rows = []
+    offset = 0
+    for seq, turn in enumerate(turns):
+        line = f"{turn['speaker']}: {turn['text']}"
+        lines.append(line)
+        rows.append({
+            "call_id": call_id,
+            "seq": seq,
+            "speaker": turn["speaker"],
+            "text": turn["text"],
+            "start_offset": offset,
+            "end_offset": offset + len(line),
+        })
+        offset += len(line) + 1
+    return "\n".join(lines), rows
+
+
+def store_turns(call_id: str, rows: List[Dict[str, Any]]) -> None:
+    """
+    Write a call's turns in batches of TRANSCRIPT_TURNS_BATCH_SIZE. Upserting on
+    (call_id, seq) keeps retries idempotent; turns past the end of ``rows``
+    (left by an earlier, longer transcript) are removed.
+    """
+    for start in range(0, len(rows), TRANSCRIPT_TURNS_BATCH_SIZE):
+        supabase_admin.table("supplier_call_turns")\
+            .upsert(rows[start:start + TRANSCRIPT_TURNS_BATCH_SIZE], on_conflict="call_id,seq", returning=ReturnMethod.minimal)\
+            .execute()
+    supabase_admin.table("supplier_call_turns")\
+        .delete(returning=ReturnMethod.minimal)\
+        .eq("call_id", call_id)\
+        .gte("seq", len(rows))\
+        .execute()
+
+
+def delivery_key(payload: Any) -> Optional[str]:
+    """
+    Idempotency key of a webhook delivery: the conversation id plus the event
+    timestamp, which ElevenLabs keeps the same when it retries a delivery.
+    """
+    conversation_id, _ = call_identifiers(payload)
+    if not conversation_id:
+        return None
+    event_timestamp = payload.get("event_timestamp")
+    if event_timestamp is None and isinstance(payload.get("data"), dict):
+        event_timestamp = payload["data"].get("event_timestamp")
+    return f"{conversation_id}:{event_timestamp}" if event_timestamp is not None else conversation_id
+
+
+def process_transcript(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the call report for a transcript webhook payload and persist it.
+
+    Returns:
+        The call report
+        
+    Raises:
+        TranscriptProcessingError / database errors, so the job is retried
+    """
+    # ElevenLabs wraps the call payload in {"type", "event_timestamp", "data"}
+    event_type = payload.get("type") if isinstance(payload, dict) else None
+    event_timestamp = payload.get("event_timestamp") if isinstance(payload, dict) else None
+    data = payload.get("data") if isinstance(payload, dict) else payload
+    if not isinstance(data, dict):
+        data = {}
+
+    # Fallback for legacy format where event fields are at the top level
+    event_timestamp = event_timestamp or data.get("event_timestamp")
+    user_id = data.get("user_id")
+    conversation_id = data.get("conversation_id")
+    agent_id = data.get("agent_id")
+
+    # Extract conversation messages that belong to the agent or user roles
+    conversation = data.get("conversation")
+    if isinstance(conversation, dict):
+        messages = conversation.get("messages", [])
+    elif isinstance(conversation, list):
+        messages = conversation
+    else:
+        messages = []
+
+    # Build the report's turns directly; payloads from parse_transcript_stream
+    # only carry the chosen turns, as "transcript"
+    transcript_turns = []
+    for message in messages:
+        role = message.get("role")
+        if role not in {"agent", "user"}:
+            continue
+
+        content_blocks = message.get("content", [])
+        if isinstance(content_blocks, list) and content_blocks:
+            for block in content_blocks:
+                text = block.get("text") if isinstance(block, dict) else None
+                if text:
+                    transcript_turns.append(_turn(role, text))
+
+        # Some payloads provide a direct message field
+        direct_text = message.get("message") or message.get("text")
+        if direct_text:
+            transcript_turns.append(_turn(role, direct_text))
+
+    if not transcript_turns:
+        transcript_entries = data.get("transcript", [])
+        if isinstance(transcript_entries, list):
+            for entry in transcript_entries:
+                if not isinstance(entry, dict):
+                    continue
+                role = entry.get("role")
+                if role not in {"agent", "user"}:
+                    continue
+                text = entry.get("message") or entry.get("text")
+                if text:
+                    transcript_turns.append(_turn(role, text))
+
+    # Retrieve transcript summary from the analysis section following the webhook spec
+    analysis = data.get("analysis")
+    summary = None
+    if isinstance(analysis, dict):
+        summary = analysis.get("transcript_summary") or analysis.get("summary")
+
+        # Some responses may nest the summary
+        summary_obj = analysis.get("transcript_summary") if isinstance(analysis.get("transcript_summary"), dict) else None
+        if isinstance(summary_obj, dict):
+            summary = summary_obj.get("text") or summary_obj.get("summary")
+
+    summary = summary or data.get("transcript_summary")
+
+    # Determine call connection status
+    call_success_raw = None
+    if isinstance(analysis, dict):
+        call_success_raw = analysis.get("call_successful")
+    call_success_raw = call_success_raw or data.get("status") or data.get("call_connected")
+
+    call_connected = None
+    if isinstance(call_success_raw, bool):
+        call_connected = call_success_raw
+    elif isinstance(call_success_raw, str):
+        call_connected = call_success_raw.lower() in {
+            "success",
+            "successful",
+            "connected",
+            "completed",
+            "done",
+            "true",
+            "yes",
+        }
+
+    # Compute call timestamp / datetime
+    metadata = data.get("metadata") if isinstance(data.get("metadata"), dict) else {}
+
+    call_timestamp = event_timestamp or metadata.get("start_time_unix_secs")
+    call_datetime_iso = None
+    if call_timestamp is not None:
+        try:
+            call_datetime_iso = datetime.fromtimestamp(float(call_timestamp)).isoformat()
+        except Exception:
+            call_datetime_iso = str(call_timestamp)
+
+    # Calls followed live already have most of their conclusion extracted
+    conclusion = live_transcripts.conclude(conversation_id, transcript_turns) or conclusion_batcher.extract(summary or "")
+
+    call_report = {
+        "call_id": conversation_id or data.get("id"),
+        "call_connected": call_connected,
+        "call_datetime_iso": call_datetime_iso,
+        "transcript": transcript_turns,
+        "summary": summary,
+        "conclusion": {
+            "quoted_price": conclusion.get("quoted_price"),
+            "moq": conclusion.get("moq"),
+            "terms_of_delivery": conclusion.get("terms_of_delivery"),
+            "payment_terms": conclusion.get("payment_terms"),
+            "meeting_requested": conclusion.get("meeting_requested"),
+            "meeting_preferred_time": conclusion.get("meeting_preferred_time"),
+            "call_success": conclusion.get("call_success"),
+            "decision_reason": conclusion.get("decision_reason"),
+            "important_notes": conclusion.get("important_notes"),
+        },
+    }
+
+    print("📝 QUOTATION AGENT CALL REPORT")
+    print(json.dumps(call_report))
+
+    # Upsert the supplier_calls record with transcript and summary
+    call_id = call_report["call_id"]
+    print(f"💾 Saving supplier_calls record for call_id: {call_id}")
+
+    if call_id:
+        try:
+            # Format transcript as text, with each turn's offsets into it
+            transcript_text, turn_rows = transcript_rows(call_id, transcript_turns)
+
+            # Determine status based on call success
+            status = "completed" if call_connected else "failed"
+
+            print(f"📊 Call Status: {status}")
+            print(f"📝 Transcript length: {len(transcript_text)} characters")
+            print(f"📄 Summary length: {len(summary or '')} characters")
+
+            # Check if supabase_admin is available
+            if not supabase_admin:
+                print(f"❌ Supabase admin client not initialized")
+                raise TranscriptProcessingError("Database client not available")
+
+            # Long transcripts/summaries go to cold storage, leaving a pointer
+            row = {
+                "call_id": call_id,
+                "status": status,
+                **cold_columns(call_id, "transcript", transcript_text),
+                **cold_columns(call_id, "summary", summary or ""),
+            }
+            # Only set the supplier when the call metadata names one, so a
+            # name recorded when the call was placed is never overwritten
+            supplier_name = metadata.get("seller_company_name")
+            if supplier_name:
+                row["supplier_name"] = supplier_name
+
+            # One write per webhook: insert, or update the existing row for this
+            # call_id (relies on the supplier_calls_call_id_key unique constraint)
+            upsert_result = supabase_admin.table("supplier_calls")\
+                .upsert(row, on_conflict="call_id")\
+                .execute()
+
+            if upsert_result.data:
+                print(f"✅ Upserted supplier_calls for call_id: {call_id}")
+                print(f"   Supplier: {upsert_result.data[0].get('supplier_name', 'Unknown')}")
+            else:
+                print(f"❌ Upsert of supplier_calls returned no rows for call_id: {call_id}")
+
+            store_turns(call_id, turn_rows)
+            print(f"✅ Stored {len(turn_rows)} supplier_call_turns for call_id: {call_id}")
+
+        except Exception as update_error:
+            print(f"❌ Failed to upsert supplier_calls: {update_error}")
+            raise
+
+    return call_report
+
+
+# Webhook payloads are acknowledged once queued here and processed by its workers.
+transcript_queue = TranscriptQueue(process_transcript)
@@ -0,0 +1,212 @@
+"""
+Content-addressed on-disk cache for ElevenLabs text-to-speech audio.
+
+Audio is keyed by a hash of (text, voice_id, model_id, output_format), so the
+same script read to many suppliers is synthesized once. Entries are plain
+files written atomically, which lets several gunicorn workers share one
+cache directory. When the directory grows past TTS_CACHE_MAX_BYTES the
+least recently used files are evicted.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Union
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "procuroid-tts-cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+AudioSource = Union[bytes, Iterable[bytes]]
+
+
+def tts_cache_key(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+    """Stable content hash identifying one synthesized utterance."""
+    material = json.dumps([text, voice_id, model_id, output_format], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class _KeyLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0  # threads holding or waiting for ``lock``
+
+
+class TTSAudioCache:
+    """Size-bounded LRU of synthesized audio stored as files under ``directory``."""
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, _KeyLock] = {}
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, key: str, output_format: str = "") -> str:
+        extension = output_format.split("_", 1)[0] or "bin"
+        return os.path.join(self.directory, key[:2], f"{key}.{extension}")
+
+    def get(self, key: str, output_format: str = "") -> Optional[bytes]:
+        path = self.path_for(key, output_format)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            pass
+        return audio
+
+    def put(self, key: str, audio: bytes, output_format: str = "") -> str:
+        path = self.path_for(key, output_format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio)
+        try:
+            replaced = os.path.getsize(path)  # overwriting an entry only adds the difference
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is not None:
+                self._size += len(audio) - replaced
+            over_budget = self._current_size() > self.max_bytes
+        if over_budget:
+            self.evict()
+        return path
+
+    def get_or_synthesize(
+        self,
+        text: str,
+        voice_id: str,
+        model_id: str,
+        output_format: str,
+        synthesize: Callable[[], AudioSource],
+    ) -> bytes:
+        """
+        Return cached audio for the utterance, calling ``synthesize`` only on a miss.
+        Concurrent misses for the same key in this process synthesize once.
+        """
+        key = tts_cache_key(text, voice_id, model_id, output_format)
+        audio = self.get(key, output_format)
+        if audio is not None:
+            self._count(hit=True)
+            return audio
+
+        with self._key_lock(key):
+            audio = self.get(key, output_format)
+            if audio is not None:
+                self._count(hit=True)
+                return audio
+
+            self._count(hit=False)
+            produced = synthesize()
+            audio = produced if isinstance(produced, bytes) else b"".join(produced)
+            self.put(key, audio, output_format)
+            return audio
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits ``max_bytes``."""
+        with self._lock:
+            entries = []
+            total = 0
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".tmp"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+
+            self._size = total
+            self.evictions += removed
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "bytes": self._current_size(),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+    def _current_size(self) -> int:
+        # Caller holds self._lock. Computed lazily once, then tracked incrementally.
+        if self._size is None:
+            total = 0
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".tmp"):
+                        continue
+                    try:
+                        total += os.path.getsize(os.path.join(root, name))
+                    except OSError:
+                        continue  # removed by another worker
+            self._size = total
+        return self._size
+
+    @contextlib.contextmanager
+    def _key_lock(self, key: str) -> Iterator[None]:
+        # Entries live only while some thread holds or waits for them, so the
+        # map stays small and a lock is never dropped between lookup and acquire
+        with self._lock:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = _KeyLock()
+            entry.users += 1
+        try:
+            with entry.lock:
+                yield
+        finally:
+            with self._lock:
+                entry.users -= 1
+                if entry.users == 0:
+                    del self._key_locks[key]
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+# Shared cache used by the quotation agent and prompt rendering.
+tts_cache = TTSAudioCache()
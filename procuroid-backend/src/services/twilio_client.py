@@ -0,0 +1,105 @@
+"""Process-wide Twilio REST client shared by every outbound call path."""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+from twilio.request_validator import RequestValidator
+from twilio.rest import Client
+
+load_dotenv()
+
+TWILIO_HTTP_POOL_SIZE = int(os.getenv("TWILIO_HTTP_POOL_SIZE", "32"))
+TWILIO_HTTP_TIMEOUT = float(os.getenv("TWILIO_HTTP_TIMEOUT", "15"))
+TWILIO_HTTP_MAX_RETRIES = int(os.getenv("TWILIO_HTTP_MAX_RETRIES", "2"))
+# Overridable to point calls at a local stand-in (see tests/telephony_standin.py)
+TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com").rstrip("/")
+
+_clients: Dict[Tuple[str, str], Client] = {}
+_clients_lock = threading.Lock()
+
+
+class TwilioConfigError(RuntimeError):
+    """Raised when Twilio credentials are not configured."""
+
+
+def build_pooled_http_client() -> TwilioHttpClient:
+    """
+    Build a Twilio HTTP client backed by a single keep-alive connection pool.
+
+    Connection-level failures are retried by urllib3; requests that reached
+    Twilio are never replayed, so a retry cannot place a duplicate call.
+    """
+    http_client = TwilioHttpClient(pool_connections=True, timeout=TWILIO_HTTP_TIMEOUT)
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=TWILIO_HTTP_POOL_SIZE,
+        max_retries=TWILIO_HTTP_MAX_RETRIES,
+    )
+    http_client.session.mount("https://", adapter)
+    http_client.session.mount("http://", adapter)
+    return http_client
+
+
+def get_twilio_client(
+    account_sid: Optional[str] = None,
+    auth_token: Optional[str] = None,
+) -> Client:
+    """
+    Return the shared Twilio client for the given credentials.
+
+    Credentials default to TWILIO_ACCOUNT_SID / TWILIO_AUTH_TOKEN. One client
+    (and one HTTP connection pool) is created per credential pair for the
+    lifetime of the process; it is safe to use from multiple threads.
+    """
+    account_sid = account_sid or os.getenv("TWILIO_ACCOUNT_SID")
+    auth_token = auth_token or os.getenv("TWILIO_AUTH_TOKEN")
+
+    if not account_sid or not auth_token:
+        raise TwilioConfigError(
+            "Twilio credentials are not configured. Set TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN."
+        )
+
+    key = (account_sid, auth_token)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = Client(account_sid, auth_token, http_client=build_pooled_http_client())
+            client.api.base_url = TWILIO_API_BASE_URL
+            _clients[key] = client
+        return client
+
+
+def reset_twilio_clients() -> None:
+    """Drop cached clients (e.g. after rotating credentials) and close their pools."""
+
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+
+    for client in clients:
+        session = getattr(client.http_client, "session", None)
+        if session is not None:
+            session.close()
+
+
+def is_valid_twilio_request(url: str, params: Dict[str, str], signature: Optional[str]) -> bool:
+    """
+    Check the X-Twilio-Signature of a webhook request against TWILIO_AUTH_TOKEN.
+
+    ``url`` must be the exact URL Twilio requested (including the query string)
+    and ``params`` the POST form fields. Without an auth token nothing validates.
+    """
+    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+    if not auth_token or not signature:
+        return False
+    return RequestValidator(auth_token).validate(url, params, signature)
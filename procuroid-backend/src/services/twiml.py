@@ -0,0 +1,116 @@
+"""
+TwiML rendering for Twilio voice webhooks.
+
+Responses are built from precompiled templates with every interpolated value
+XML-escaped, and memoized in an LRU keyed by the normalized parameters.
+Twilio's answer webhook is latency-critical and sees the same handful of
+agent/job combinations over and over, so repeat hits skip rendering entirely.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+from xml.sax.saxutils import escape, quoteattr
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TWIML_CACHE_SIZE = int(os.getenv("TWIML_CACHE_SIZE", "4096"))
+
+TWIML_MIMETYPE = "text/xml"
+
+_DOCUMENT = '<?xml version="1.0" encoding="UTF-8"?><Response>{body}</Response>'
+_SAY = "<Say>{text}</Say>"
+_PLAY = "<Play>{url}</Play>"
+_REDIRECT = "<Redirect method={method}>{url}</Redirect>"
+_STREAM = "<Connect><Stream url={url}>{parameters}</Stream></Connect>"
+_PARAMETER = "<Parameter name={name} value={value} />"
+_HANGUP = "<Hangup/>"
+
+Params = Tuple[Tuple[str, str], ...]
+
+
+def _text(value: Any) -> str:
+    return re.sub(r"\s+", " ", str(value)).strip()
+
+
+def _params(values: Optional[Dict[str, Any]]) -> Params:
+    """Hashable, order-independent form of a parameter dict (None values dropped)."""
+    return tuple(sorted((str(k), str(v)) for k, v in (values or {}).items() if v is not None))
+
+
+def _document(*elements: str) -> str:
+    return _DOCUMENT.format(body="".join(elements))
+
+
+@lru_cache(maxsize=TWIML_CACHE_SIZE)
+def _say(text: str, hangup: bool) -> str:
+    return _document(_SAY.format(text=escape(text)), _HANGUP if hangup else "")
+
+
+@lru_cache(maxsize=TWIML_CACHE_SIZE)
+def _play(url: str) -> str:
+    return _document(_PLAY.format(url=escape(url)))
+
+
+@lru_cache(maxsize=TWIML_CACHE_SIZE)
+def _redirect(url: str, query: Params, method: str) -> str:
+    if query:
+        url = f"{url}{'&' if '?' in url else '?'}{urlencode(query)}"
+    return _document(_REDIRECT.format(method=quoteattr(method), url=escape(url)))
+
+
+@lru_cache(maxsize=TWIML_CACHE_SIZE)
+def _stream(url: str, query: Params, parameters: Params) -> str:
+    if query:
+        url = f"{url}{'&' if '?' in url else '?'}{urlencode(query)}"
+    rendered = "".join(_PARAMETER.format(name=quoteattr(k), value=quoteattr(v)) for k, v in parameters)
+    return _document(_STREAM.format(url=quoteattr(url), parameters=rendered))
+
+
+def say(text: Any, hangup: bool = False) -> str:
+    """Speak ``text`` (optionally hanging up afterwards)."""
+    return _say(_text(text), hangup)
+
+
+def play(url: str) -> str:
+    """Play the audio file at ``url``."""
+    return _play(url.strip())
+
+
+def redirect(url: str, query: Optional[Dict[str, Any]] = None, method: str = "POST") -> str:
+    """Hand the call to another TwiML URL, appending ``query`` parameters."""
+    return _redirect(url.strip(), _params(query), method.upper())
+
+
+def connect_stream(
+    url: str,
+    query: Optional[Dict[str, Any]] = None,
+    parameters: Optional[Dict[str, Any]] = None,
+    cache: bool = True,
+) -> str:
+    """
+    Bridge the call to a media stream WebSocket, with optional custom <Parameter>s.
+    Pass ``cache=False`` for single-use URLs (e.g. signed URLs) that would only
+    evict useful entries.
+    """
+    render = _stream if cache else _stream.__wrapped__
+    return render(url.strip(), _params(query), _params(parameters))
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters of each template's render cache."""
+    return {
+        fn.__name__.lstrip("_"): fn.cache_info()._asdict()
+        for fn in (_say, _play, _redirect, _stream)
+    }
+
+
+def clear_cache() -> None:
+    for fn in (_say, _play, _redirect, _stream):
+        fn.cache_clear()
@@ -0,0 +1,85 @@
+"""
+Microbenchmark: per-call overhead of building a Twilio client per call
+versus reusing the pooled client from services.twilio_client.
+
+Runs against a local HTTP stub so no real calls are placed:
+
+    python src/tests/bench_twilio_client.py [iterations]
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from twilio.rest import Client
+
+from services.twilio_client import get_twilio_client, reset_twilio_clients
+
+ACCOUNT_SID = "AC" + "0" * 32
+AUTH_TOKEN = "benchmark-token"
+
+
+class _StubTwilioHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = json.dumps({
+            "sid": "CA" + "0" * 32,
+            "status": "queued",
+            "to": "+15555550100",
+            "from": "+15555550199",
+            "uri": f"/2010-04-01/Accounts/{ACCOUNT_SID}/Calls/CA{'0' * 32}.json",
+        }).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _place_call(client: Client, base_url: str) -> None:
+    client.api.base_url = base_url
+    client.calls.create(
+        to="+15555550100",
+        from_="+15555550199",
+        url="https://example.com/twiml",
+    )
+
+
+def _run(label: str, make_client, base_url: str, iterations: int) -> float:
+    _place_call(make_client(), base_url)  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        _place_call(make_client(), base_url)
+    per_call_ms = (time.perf_counter() - start) * 1000 / iterations
+
+    print(f"{label:<28} {per_call_ms:8.3f} ms/call")
+    return per_call_ms
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubTwilioHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        print(f"=== Twilio client overhead ({iterations} calls) ===")
+        before = _run("new Client per call", lambda: Client(ACCOUNT_SID, AUTH_TOKEN), base_url, iterations)
+        after = _run("shared pooled client", lambda: get_twilio_client(ACCOUNT_SID, AUTH_TOKEN), base_url, iterations)
+        print(f"Speedup: {before / after:.2f}x")
+    finally:
+        reset_twilio_clients()
+        server.shutdown()
@@ -0,0 +1,165 @@
+"""
+End-to-end outbound call load test against the local telephony stand-in.
+
+Starts tests/telephony_standin.py and the Flask backend in this process,
+points every ElevenLabs/Twilio client at the stand-in and drives simulated
+calls through the real call paths. The stand-in's status callbacks and
+transcript webhooks hit the backend, so conversation slots are freed just
+as they would be in production. No real calls are placed and no real
+credentials are used.
+
+    python src/tests/load_test_calls.py --calls 2000 --concurrency 200 --mode elevenlabs \\
+        --latency-ms 150 --error-rate 0.01 --rate-limit-rate 0.02 --call-duration 5
+
+Modes:
+    elevenlabs  services.elevenlabs.initiate_elevenlabs_call_via_api
+    twilio      services.elevenlabs_twilio.initiate_call
+    quotation   QuotationAgent via the asyncio dispatcher
+"""
+import argparse
+import concurrent.futures
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+STANDIN_PORT = 8765
+BACKEND_PORT = 8766
+
+
+def _configure_env(args) -> None:
+    # Must run before any service module is imported; they read env at import time.
+    standin = f"http://127.0.0.1:{args.standin_port}"
+    os.environ.update({
+        "ELEVENLABS_API_BASE_URL": standin,
+        "TWILIO_API_BASE_URL": standin,
+        "ELEVENLABS_API_KEY": "standin-key",
+        "TWILIO_ACCOUNT_SID": "AC" + "0" * 32,
+        "TWILIO_AUTH_TOKEN": "standin-token",
+        "TWILIO_FROM_NUMBERS": ",".join(f"+1555000{i:04d}" for i in range(args.caller_ids)),
+        "TWILIO_FROM_NUMBER": "+15550000000",
+        "TWILIO_PHONE_NUMBER": "+15550000000",
+        "WEBHOOK_BASE_URL": f"http://127.0.0.1:{args.backend_port}",
+        "QUOTATION_SYNTHESIZE_AUDIO": "false",
+        # Fresh admission state, so slots left over from an earlier run do not count
+        "CALL_ADMISSION_PATH": os.path.join(tempfile.mkdtemp(prefix="procuroid-load-"), "call-admission.sqlite3"),
+    })
+
+
+def _serve(app, port: int) -> None:
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[int(pct * (len(values) - 1))], 3)
+
+
+def _run_threaded(args, place_call):
+    latencies, errors = [], []
+
+    def one(i):
+        started = time.monotonic()
+        try:
+            place_call(i)
+            latencies.append(time.monotonic() - started)
+        except Exception as e:
+            errors.append(str(e))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.calls)))
+    return latencies, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--mode", choices=["elevenlabs", "twilio", "quotation"], default="elevenlabs")
+    parser.add_argument("--caller-ids", type=int, default=10, help="Size of the simulated caller ID pool")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=30.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--no-answer-rate", type=float, default=0.0)
+    parser.add_argument("--call-duration", type=float, default=3.0)
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="Max seconds to wait for webhooks")
+    parser.add_argument("--standin-port", type=int, default=STANDIN_PORT)
+    parser.add_argument("--backend-port", type=int, default=BACKEND_PORT)
+    args = parser.parse_args()
+
+    _configure_env(args)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+    sys.path.append(os.path.dirname(__file__))
+
+    from telephony_standin import StandinConfig, create_app
+
+    standin_config = StandinConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        no_answer_rate=args.no_answer_rate,
+        call_duration=args.call_duration,
+        webhook_base=os.environ["WEBHOOK_BASE_URL"],
+    )
+    standin_app = create_app(standin_config)
+    _serve(standin_app, args.standin_port)
+
+    from main import app
+    from services.call_admission import call_admission
+
+    _serve(app, args.backend_port)
+    print(f"🚀 {args.calls} {args.mode} calls, concurrency {args.concurrency}")
+
+    started = time.monotonic()
+    if args.mode == "elevenlabs":
+        from services.elevenlabs import initiate_elevenlabs_call_via_api
+
+        latencies, errors = _run_threaded(args, lambda i: initiate_elevenlabs_call_via_api(
+            to=f"+1444{i:07d}", agent_id="agent_loadtest", metadata={"jobId": f"load-{i}"},
+        ))
+    elif args.mode == "twilio":
+        from services.elevenlabs_twilio import initiate_call
+
+        latencies, errors = _run_threaded(args, lambda i: initiate_call(
+            to_number=f"+1444{i:07d}", agent_id="agent_loadtest", metadata={"jobId": f"load-{i}"},
+        ))
+    else:
+        from agents.quotation.async_dispatcher import AsyncQuoteDispatcher
+
+        suppliers = [{"id": i, "name": f"Supplier {i}", "phone": f"+1444{i:07d}"} for i in range(args.calls)]
+        quotes = AsyncQuoteDispatcher(max_in_flight=args.concurrency).run(suppliers, "500 USB-C hubs")
+        latencies = [q["timing"]["call_secs"] for q in quotes if q["status"] == "success"]
+        errors = [q["error"] for q in quotes if q["status"] != "success"]
+    dispatched_in = time.monotonic() - started
+
+    # Wait for the simulated calls to end and their webhooks to release slots
+    deadline = time.monotonic() + args.drain_timeout
+    while time.monotonic() < deadline and call_admission.stats()["in_flight_conversations"]:
+        time.sleep(0.5)
+
+    standin_stats = standin_app.test_client().get("/_standin/stats").get_json()
+    admission = call_admission.stats()
+    print("\n📊 Load test results")
+    print(f"  placed:        {len(latencies)} ok, {len(errors)} failed in {dispatched_in:.1f}s "
+          f"({len(latencies) / dispatched_in:.1f} calls/s)")
+    print(f"  call setup s:  p50={_percentile(latencies, 0.5)} p95={_percentile(latencies, 0.95)} "
+          f"max={_percentile(latencies, 1.0)}")
+    print(f"  admission:     admitted={admission['admitted_total']} timeouts={admission['timeouts_total']} "
+          f"in_flight={admission['in_flight_conversations']} wait={admission['wait_secs']}")
+    print(f"  stand-in:      {standin_stats}")
+    for error in sorted(set(errors))[:5]:
+        print(f"  ❌ {error}")
+
+
+if __name__ == "__main__":
+    main()
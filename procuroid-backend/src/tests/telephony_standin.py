@@ -0,0 +1,352 @@
+"""
+Local stand-in for the ElevenLabs and Twilio APIs, for call load tests.
+
+Mimics the endpoints the backend talks to, without placing real calls:
+
+- ElevenLabs outbound calls:  POST /v1/convai/conversation/outbound_call
+- ElevenLabs signed URLs:     GET  /v1/convai/conversation/get_signed_url
+- ElevenLabs text-to-speech:  POST /v1/text-to-speech/<voice_id>
+- Twilio calls.create:        POST /2010-04-01/Accounts/<sid>/Calls.json
+
+Every accepted call "rings" for a configurable duration, after which the
+stand-in posts Twilio status callbacks (to the call's StatusCallback, or
+<webhook-base>/elevenlabs/call-status) and, for ElevenLabs calls, the
+post-call transcript webhook to <webhook-base>/quotation-agent/transcript
+using a transcript fixture.
+
+Point the backend at it with:
+
+    ELEVENLABS_API_BASE_URL=http://127.0.0.1:8765
+    TWILIO_API_BASE_URL=http://127.0.0.1:8765
+
+and run:
+
+    python src/tests/telephony_standin.py --port 8765 --webhook-base http://127.0.0.1:8080 \\
+        --latency-ms 150 --jitter-ms 50 --error-rate 0.01 --rate-limit-rate 0.02 \\
+        --call-duration 5 --no-answer-rate 0.1 --fixtures transcripts.json
+
+Settings can be changed while running with POST /_standin/config and
+counters are available at GET /_standin/stats.
+"""
+import argparse
+import concurrent.futures
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+from flask import Flask, Response, jsonify, request
+
+DEFAULT_FIXTURES = [
+    {
+        "call_successful": "success",
+        "summary": "The supplier quoted $4.20 per unit with a minimum order of 500 units, "
+                   "FOB Shenzhen, 30% deposit and balance before shipment. Delivery in 21 days.",
+        "transcript": [
+            {"role": "agent", "message": "Hello, I'm calling to request a quotation for USB-C hubs."},
+            {"role": "user", "message": "Sure, our price is $4.20 per unit for 500 units or more."},
+            {"role": "agent", "message": "What are your delivery and payment terms?"},
+            {"role": "user", "message": "FOB Shenzhen, 21 days. 30% deposit, balance before shipment."},
+        ],
+    },
+    {
+        "call_successful": "failure",
+        "summary": "The supplier was not interested in quoting at this time.",
+        "transcript": [
+            {"role": "agent", "message": "Hello, I'm calling to request a quotation."},
+            {"role": "user", "message": "Sorry, we are not taking new orders right now."},
+        ],
+    },
+]
+
+# ID3-less MPEG frame header followed by silence; enough for clients that sniff the format.
+FAKE_MP3 = b"\xff\xf3\x44\xc4" + b"\x00" * 140
+
+
+class StandinConfig:
+    def __init__(self, **values):
+        self.latency_ms = 100.0
+        self.jitter_ms = 30.0
+        self.error_rate = 0.0
+        self.rate_limit_rate = 0.0
+        self.no_answer_rate = 0.0
+        self.call_duration = 3.0
+        self.webhook_base = "http://127.0.0.1:8080"
+        self.fixtures: List[dict] = list(DEFAULT_FIXTURES)
+        self.update(values)
+
+    def update(self, values: Dict[str, Any]) -> None:
+        for key, value in values.items():
+            if value is None or not hasattr(self, key):
+                continue
+            setattr(self, key, value if key in ("webhook_base", "fixtures") else float(value))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+            "rate_limit_rate": self.rate_limit_rate,
+            "no_answer_rate": self.no_answer_rate,
+            "call_duration": self.call_duration,
+            "webhook_base": self.webhook_base,
+            "fixtures": len(self.fixtures),
+        }
+
+
+class CallbackScheduler:
+    """Delivers delayed webhooks from one timer thread and a small sender pool."""
+
+    def __init__(self, workers: int = 32):
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="standin-cb")
+        self._session = requests.Session()
+        self._session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+        self.delivered = 0
+        self.failed = 0
+        threading.Thread(target=self._run, name="standin-timer", daemon=True).start()
+
+    def at(self, delay: float, fn: Callable[[], None]) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), fn))
+            self._cond.notify()
+
+    def post(self, url: str, **kwargs) -> None:
+        try:
+            response = self._session.post(url, timeout=30, **kwargs)
+            ok = response.status_code < 500
+        except requests.RequestException:
+            ok = False
+        with self._cond:
+            if ok:
+                self.delivered += 1
+            else:
+                self.failed += 1
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                _, _, fn = heapq.heappop(self._heap)
+            self._pool.submit(fn)
+
+
+def create_app(config: StandinConfig) -> Flask:
+    app = Flask(__name__)
+    callbacks = CallbackScheduler()
+    counters: Dict[str, int] = {}
+    counters_lock = threading.Lock()
+
+    def count(name: str) -> None:
+        with counters_lock:
+            counters[name] = counters.get(name, 0) + 1
+
+    def simulate_network() -> Optional[Response]:
+        """Apply latency and injected failures. Returns an error response to send, if any."""
+        delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000
+        time.sleep(delay)
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            count("rate_limited")
+            response = jsonify({"detail": {"status": "rate_limited", "message": "Too many concurrent requests"}})
+            response.status_code = 429
+            response.headers["Retry-After"] = "1"
+            return response
+        if roll < config.rate_limit_rate + config.error_rate:
+            count("errors")
+            response = jsonify({"detail": {"status": "internal_error", "message": "Injected failure"}})
+            response.status_code = 500
+            return response
+        return None
+
+    def schedule_call(call_sid: str, to: str, from_: str, status_callback: Optional[str], on_end=None) -> None:
+        answered = random.random() >= config.no_answer_rate
+        duration = max(0.1, random.gauss(config.call_duration, config.call_duration * 0.2))
+        url = status_callback or f"{config.webhook_base.rstrip('/')}/elevenlabs/call-status"
+        base = {"CallSid": call_sid, "To": to, "From": from_, "AccountSid": "AC" + "0" * 32}
+
+        def status(call_status: str, **extra):
+            return lambda: callbacks.post(url, data=dict(base, CallStatus=call_status, **extra))
+
+        callbacks.at(0.2, status("ringing"))
+        if not answered:
+            callbacks.at(2.0, status("no-answer"))
+            count("no_answer")
+            return
+        callbacks.at(1.0, status("in-progress"))
+        callbacks.at(1.0 + duration, status("completed", CallDuration=str(int(duration))))
+        if on_end:
+            callbacks.at(1.5 + duration, lambda: on_end(duration))
+
+    @app.route("/v1/convai/conversation/outbound_call", methods=["POST"])
+    def elevenlabs_outbound_call():
+        count("elevenlabs_calls_requested")
+        error = simulate_network()
+        if error is not None:
+            return error
+
+        body = request.get_json(silent=True) or {}
+        if not body.get("agent_id") or not body.get("phone_number"):
+            return jsonify({"detail": "agent_id and phone_number are required"}), 422
+
+        conversation_id = f"conv_{uuid.uuid4().hex}"
+        call_sid = f"CA{uuid.uuid4().hex}"
+        started = time.time()
+        metadata = body.get("metadata") or {}
+
+        def post_transcript(duration: float) -> None:
+            fixture = random.choice(config.fixtures)
+            payload = {
+                "type": "post_call_transcription",
+                "event_timestamp": int(time.time()),
+                "data": {
+                    "agent_id": body["agent_id"],
+                    "conversation_id": conversation_id,
+                    "status": "done",
+                    "user_id": metadata.get("userId"),
+                    "transcript": fixture.get("transcript", []),
+                    "metadata": {
+                        "start_time_unix_secs": int(started),
+                        "call_duration_secs": int(duration),
+                        "phone_call": {
+                            "type": "twilio",
+                            "call_sid": call_sid,
+                            "external_number": body["phone_number"],
+                        },
+                    },
+                    "analysis": {
+                        "call_successful": fixture.get("call_successful", "success"),
+                        "transcript_summary": fixture.get("summary", ""),
+                    },
+                    "conversation_initiation_client_data": {"dynamic_variables": metadata},
+                },
+            }
+            callbacks.post(f"{config.webhook_base.rstrip('/')}/quotation-agent/transcript", json=payload)
+            count("transcripts_sent")
+
+        schedule_call(call_sid, body["phone_number"], "", None, on_end=post_transcript)
+        count("elevenlabs_calls_accepted")
+        return jsonify({
+            "success": True,
+            "message": "Success",
+            "conversation_id": conversation_id,
+            "callSid": call_sid,
+        }), 200
+
+    @app.route("/v1/convai/conversation/get_signed_url", methods=["GET"])
+    def elevenlabs_signed_url():
+        count("signed_urls_requested")
+        error = simulate_network()
+        if error is not None:
+            return error
+        agent_id = request.args.get("agent_id")
+        if not agent_id:
+            return jsonify({"detail": "agent_id is required"}), 422
+        signature = uuid.uuid4().hex
+        return jsonify({
+            "signed_url": f"wss://{request.host}/v1/convai/conversation?agent_id={agent_id}&conversation_signature={signature}",
+        })
+
+    @app.route("/v1/text-to-speech/<voice_id>", methods=["POST"])
+    @app.route("/v1/text-to-speech/<voice_id>/stream", methods=["POST"])
+    def elevenlabs_tts(voice_id):
+        count("tts_requests")
+        error = simulate_network()
+        if error is not None:
+            return error
+        return Response(FAKE_MP3, mimetype="audio/mpeg")
+
+    @app.route("/2010-04-01/Accounts/<account_sid>/Calls.json", methods=["POST"])
+    def twilio_create_call(account_sid):
+        count("twilio_calls_requested")
+        error = simulate_network()
+        if error is not None:
+            return error
+
+        to = request.form.get("To")
+        from_ = request.form.get("From")
+        if not to or not from_ or not (request.form.get("Url") or request.form.get("Twiml")):
+            return jsonify({"code": 21205, "message": "To, From and Url or Twiml are required", "status": 400}), 400
+
+        call_sid = f"CA{uuid.uuid4().hex}"
+        schedule_call(call_sid, to, from_, request.form.get("StatusCallback"))
+        count("twilio_calls_accepted")
+        return jsonify({
+            "sid": call_sid,
+            "account_sid": account_sid,
+            "to": to,
+            "from": from_,
+            "status": "queued",
+            "direction": "outbound-api",
+            "uri": f"/2010-04-01/Accounts/{account_sid}/Calls/{call_sid}.json",
+        }), 201
+
+    @app.route("/_standin/config", methods=["GET", "POST"])
+    def standin_config():
+        if request.method == "POST":
+            config.update(request.get_json(silent=True) or {})
+        return jsonify(config.as_dict())
+
+    @app.route("/_standin/stats", methods=["GET"])
+    def standin_stats():
+        with counters_lock:
+            snapshot = dict(counters)
+        snapshot.update({
+            "callbacks_delivered": callbacks.delivered,
+            "callbacks_failed": callbacks.failed,
+            "callbacks_pending": callbacks.pending,
+        })
+        return jsonify(snapshot)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--webhook-base", default="http://127.0.0.1:8080", help="Backend base URL for callbacks")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Mean API response latency")
+    parser.add_argument("--jitter-ms", type=float, default=30.0, help="Std-dev of API response latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of API requests failing with 429")
+    parser.add_argument("--no-answer-rate", type=float, default=0.0, help="Fraction of calls ending in no-answer")
+    parser.add_argument("--call-duration", type=float, default=3.0, help="Mean simulated call length in seconds")
+    parser.add_argument("--fixtures", help="JSON file with a list of {transcript, summary, call_successful}")
+    args = parser.parse_args()
+
+    fixtures = None
+    if args.fixtures:
+        with open(args.fixtures) as f:
+            fixtures = json.load(f)
+
+    config = StandinConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        no_answer_rate=args.no_answer_rate,
+        call_duration=args.call_duration,
+        webhook_base=args.webhook_base,
+        fixtures=fixtures,
+    )
+    print(f"📞 Telephony stand-in listening on http://{args.host}:{args.port} -> callbacks to {args.webhook_base}")
+    create_app(config).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
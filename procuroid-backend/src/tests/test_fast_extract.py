@@ -0,0 +1,124 @@
+"""
+Checks the rule-based conclusion fast path against real call summaries.
+
+The fast path must only answer when a summary is unambiguous and leave
+everything else to the LLM; a wrong value here is worse than no value, so
+most cases below are summaries it has to stay quiet on. Runs offline:
+
+    python src/tests/test_fast_extract.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from services.fast_extract import fast_extract, resolved_fields
+from services.llm import CONCLUSION_FIELDS, _call_llm, _fields_request, _merge, _unresolved
+
+OUTCOME_FIELDS = ("call_success", "decision_reason", "important_notes")
+
+
+def resolved(summary):
+    return resolved_fields(fast_extract(summary))
+
+
+def test_formulaic_quote():
+    fields = resolved(
+        "The supplier quoted $4.20 per unit with an MOQ of 500 units. "
+        "Payment terms are Net 30 and delivery is FOB Shanghai within 3 weeks."
+    )
+    assert fields["quoted_price"] == "$4.20 per unit", fields
+    assert fields["moq"] == "500 units", fields
+    assert fields["payment_terms"] == "Net 30", fields
+    assert fields["terms_of_delivery"] == "FOB Shanghai; delivery within 3 weeks", fields
+
+
+def test_no_quote_with_shipping_cost():
+    fields = resolved("The supplier did not provide a quote. Shipping costs would be $200.")
+    assert "quoted_price" not in fields, fields
+
+
+def test_amount_without_price_word():
+    fields = resolved("They have 200 units in stock and mentioned a $5,000 order last month.")
+    assert "quoted_price" not in fields, fields
+
+
+def test_tooling_fee_is_not_the_price():
+    fields = resolved("The supplier quoted a one-time tooling fee of $1,500 and will send unit pricing by email.")
+    assert "quoted_price" not in fields, fields
+
+
+def test_tiered_price():
+    fields = resolved(
+        "The supplier quoted $5 per unit for orders under 1000, otherwise $4.50 per unit. Payment is Net 30."
+    )
+    assert "quoted_price" not in fields, fields
+    assert fields["payment_terms"] == "Net 30", fields
+
+
+def test_declined_pricing_but_willing_to_supply():
+    fields = resolved(
+        "The supplier declined to share pricing today but is willing to supply the full quantity "
+        "on Net 30 terms once the drawings are received."
+    )
+    assert "quoted_price" not in fields, fields
+    assert fields["payment_terms"] == "Net 30", fields
+    for field in OUTCOME_FIELDS:
+        assert field not in fields, fields
+
+
+def test_cannot_supply_until_march():
+    fields = resolved("The supplier can't supply until March because their line is fully booked.")
+    for field in OUTCOME_FIELDS:
+        assert field not in fields, fields
+
+
+def test_outcome_never_resolved_by_rules():
+    fields = resolved(
+        "The supplier quoted $4.20 per unit and agreed to proceed. No meeting was requested."
+    )
+    assert fields["quoted_price"] == "$4.20 per unit", fields
+    assert fields["meeting_requested"] is False, fields
+    for field in OUTCOME_FIELDS:
+        assert field not in fields, fields
+
+
+def test_rule_values_are_kept():
+    fast = {"quoted_price": "$4.20 per unit", "payment_terms": "Net 30"}
+    llm_result = {"call_success": True, "important_notes": "Cannot ship until March"}
+    merged = _merge(fast, llm_result)
+    assert merged["quoted_price"] == "$4.20 per unit", merged
+    assert merged["payment_terms"] == "Net 30", merged
+    assert merged["call_success"] is True, merged
+    assert merged["important_notes"] == "Cannot ship until March", merged
+
+
+def test_llm_asked_only_for_unresolved_fields():
+    summary = (
+        "The supplier quoted $4.20 per unit with an MOQ of 500 units. "
+        "Payment terms are Net 30 and delivery is FOB Shanghai within 3 weeks. No meeting was requested."
+    )
+    fields = _unresolved(resolved(summary))
+    assert set(fields) < set(CONCLUSION_FIELDS), fields
+    assert "quoted_price" not in fields and "call_success" in fields, fields
+    _, _, response_format = _fields_request(summary, fields)
+    requested = response_format["json_schema"]["schema"]["required"]
+    assert requested == list(fields), requested
+
+
+def test_nothing_unresolved_skips_llm():
+    assert _call_llm("The supplier quoted $4.20 per unit.", ()) is None
+
+
+if __name__ == "__main__":
+    tests = [(name, test) for name, test in sorted(globals().items()) if name.startswith("test_")]
+    failed = 0
+    for name, test in tests:
+        try:
+            test()
+            print(f"✅ {name}")
+        except AssertionError as exc:
+            failed += 1
+            print(f"❌ {name}: {exc}")
+    print(f"{len(tests) - failed}/{len(tests)} passed")
+    sys.exit(1 if failed else 0)
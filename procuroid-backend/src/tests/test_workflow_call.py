@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 
 # Add project root to sys.path so imports work
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 from src.agents.quotation.quotation_agent import QuotationAgent
 